@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import json
+import random
+import resource
+import tempfile
+import multiprocessing
+from argparse import ArgumentParser
+from pathlib import Path
+from timeit import default_timer
+from typing import List, Dict, Tuple
+
+from db.database import Key, KeyType
+from db.db_json import JSONDatabase
+from db.db_tv import EpisodeDatabase
+
+# Same keys as EpisodeDatabase
+EPISODE_KEYS = [
+    Key("filename", primary=True),
+    Key("season_number", type=KeyType.Integer, optional=False),
+    Key("episode_number", type=KeyType.Integer, optional=False),
+    Key("released", type=KeyType.Integer),
+    Key("tvshow", optional=False),
+    Key("imdb"),
+    Key("tvmaze", type=KeyType.Integer),
+    Key("title", type=KeyType.String),
+    Key("scanned", type=KeyType.Integer),
+    Key("removed", type=KeyType.Boolean),
+    Key("removed_date", type=KeyType.Integer),
+]
+
+LOAD_MODES = {
+    "default": dict(streaming=False, trusted=False),
+    "streaming": dict(streaming=True, trusted=False),
+    "trusted": dict(streaming=False, trusted=True),
+    "streaming+trusted": dict(streaming=True, trusted=True),
+}
+
+
+def gen_episode_list(items: int = 100_000) -> List[Dict]:
+    _ret = []
+    for index in range(items):
+        _ret.append({
+            "filename": f"Some.Show.{index % 500:03d}.S{random.randint(1, 20):02d}E{random.randint(1, 20):02d}."
+                        f"1080p.WEB.H264-GRP{index:06d}.mkv",
+            "released": 1099173600 + index,
+            "season_number": random.randint(1, 20),
+            "episode_number": random.randint(1, 20),
+            "tvshow": f"Some Show {index % 500:03d}",
+            "scanned": 1262304061 + index
+        })
+    return _ret
+
+
+def _load_in_process(file_path: Path, mode: str, queue: multiprocessing.Queue) -> None:
+    _db = JSONDatabase(file_path)
+    _db.set_valid_keys(EPISODE_KEYS)
+    _start = default_timer()
+    _db.load(**LOAD_MODES[mode])
+    _elapsed = default_timer() - _start
+    queue.put((_elapsed, _peak_rss_kb()))
+
+
+def _peak_rss_kb() -> int:
+    # ru_maxrss is inherited over exec from the (benchmark) parent process, prefer VmHWM when available
+    try:
+        with open("/proc/self/status", "r") as _fp:
+            for _line in _fp:
+                if _line.startswith("VmHWM:"):
+                    return int(_line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure_load(file_path: Path, mode: str) -> Tuple[float, int]:
+    """Loads in a fresh interpreter so the peak RSS only reflects the load itself"""
+    _ctx = multiprocessing.get_context("spawn")
+    _queue = _ctx.Queue()
+    _proc = _ctx.Process(target=_load_in_process, args=(file_path, mode, _queue))
+    _proc.start()
+    _ret = _queue.get()
+    _proc.join()
+    return _ret
+
+
+def run(items: int) -> None:
+    with tempfile.TemporaryDirectory() as _dir:
+        _file = Path(_dir) / "episodes.json"
+        _items = gen_episode_list(items)
+        with open(_file, "w") as _fp:
+            json.dump(_items, _fp)
+        _start = default_timer()
+        _db = EpisodeDatabase(file_path=_file, use_json_db=True)
+        _elapsed_load = default_timer() - _start
+        _names = [i["filename"] for i in random.sample(_items, min(10_000, items))]
+        _start = default_timer()
+        for _name in _names:
+            assert _name in _db
+        _elapsed_lookup = default_timer() - _start
+        print(f"entries: {items}, file size: {_file.stat().st_size / 1024 / 1024:.1f}MiB")
+        print(f"EpisodeDatabase load: {_elapsed_load:.3f}s")
+        print(f"lookup: {_elapsed_lookup:.3f}s ({len(_names)} lookups)")
+        del _db, _items
+        for _mode in LOAD_MODES:
+            _elapsed, _peak_kb = measure_load(_file, _mode)
+            print(f"load [{_mode}]: {_elapsed:.3f}s, peak RSS: {_peak_kb / 1024:.1f}MiB")
+
+
+def main():
+    parser = ArgumentParser("JSONDatabase load benchmark")
+    parser.add_argument("--items", "-n", type=int, default=100_000)
+    args = parser.parse_args()
+    run(args.items)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import gc
+import json
+import random
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from timeit import default_timer
+
+from db.database import Key
+from db.db_json import JSONDatabase
+from benchmarks.db_json_load import EPISODE_KEYS, gen_episode_list
+
+
+def measure(file_path: Path, compact: bool) -> None:
+    gc.collect()
+    tracemalloc.start()
+    _db = JSONDatabase(file_path, compact=compact)
+    _db.set_valid_keys([Key(k.name, type=k.type, primary=k.primary, optional=k.optional) for k in EPISODE_KEYS])
+    _db.load()
+    _db.create_index("tvshow")
+    gc.collect()
+    _used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    _count = len(_db.entry_primary_values())
+    _names = random.sample(_db.entry_primary_values(), min(10_000, _count))
+    _start = default_timer()
+    for _name in _names:
+        assert _db.get(_name, "tvshow") is not None
+    _elapsed_get = default_timer() - _start
+    _start = default_timer()
+    _ = _db.find(filter_by={"tvshow": _db.get(_names[0], "tvshow")}, sort_by_key="scanned")
+    _elapsed_find = default_timer() - _start
+    _label = "compact" if compact else "dict"
+    print(f"[{_label}] memory: {_used / 1024 / 1024:.1f}MiB ({_used / _count:.0f} bytes/entry), "
+          f"get: {_elapsed_get:.3f}s ({len(_names)}), find: {_elapsed_find * 1000:.2f}ms")
+
+
+def main():
+    parser = ArgumentParser("JSONDatabase entry storage memory benchmark")
+    parser.add_argument("--items", "-n", type=int, default=50_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as _dir:
+        _file = Path(_dir) / "episodes.json"
+        with open(_file, "w") as _fp:
+            json.dump(gen_episode_list(args.items), _fp)
+        print(f"entries: {args.items}")
+        measure(_file, compact=False)
+        measure(_file, compact=True)
+
+
+if __name__ == "__main__":
+    main()
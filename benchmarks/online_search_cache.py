@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import gc
+import random
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from timeit import default_timer
+from typing import List, Tuple, Optional
+
+from media.online_search.memory_cache import LRUCache
+
+Trace = List[Tuple[str, int]]  # url, response size
+
+
+def load_trace(file_path: Path) -> Trace:
+    """One request per line: url and optionally the response size in bytes"""
+    _ret = []
+    with open(file_path) as _fp:
+        for _line in _fp:
+            _parts = _line.split()
+            if _parts:
+                _ret.append((_parts[0], int(_parts[1]) if len(_parts) > 1 else 2048))
+    return _ret
+
+
+def gen_trace(requests: int, shows: int) -> Trace:
+    """Scanner like trace: show lookups and episode lists, a few popular shows are requested most often"""
+    random.seed(1)
+    _ret = []
+    _weights = [1 / (_ix + 1) for _ix in range(shows)]
+    for _show in random.choices(range(shows), weights=_weights, k=requests):
+        if random.random() < 0.5:
+            _ret.append((f"http://api.tvmaze.com/singlesearch/shows?q=show+{_show}", 2048))
+        else:
+            _ret.append((f"http://api.tvmaze.com/shows/{_show}/episodes", 1000 * random.randint(10, 200)))
+    return _ret
+
+
+def replay(trace: Trace, max_entries: int, max_bytes: Optional[int]) -> None:
+    gc.collect()
+    tracemalloc.start()
+    _cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes, size_func=len)
+    _start = default_timer()
+    for _url, _size in trace:
+        if _cache.get(_url) is None:
+            _cache[_url] = "x" * _size
+    _elapsed = default_timer() - _start
+    _, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    _stats = _cache.stats()
+    _label = f"entries<={max_entries}" + (f", bytes<={max_bytes // 1024}KiB" if max_bytes is not None else "")
+    print(f"[{_label}] hit rate: {_stats['hit_rate']:.3f}, evictions: {_stats['evictions']}, "
+          f"peak memory: {_peak / 1024 / 1024:.1f}MiB, replay: {_elapsed:.3f}s")
+
+
+def main():
+    parser = ArgumentParser("Online search memory cache benchmark, replays a request trace")
+    parser.add_argument("--trace", type=Path, default=None, help="file with one 'url [size]' per line")
+    parser.add_argument("--requests", "-n", type=int, default=50_000)
+    parser.add_argument("--shows", type=int, default=2_000)
+    args = parser.parse_args()
+    _trace = load_trace(args.trace) if args.trace else gen_trace(args.requests, args.shows)
+    print(f"requests: {len(_trace)}, unique urls: {len(set(_url for _url, _ in _trace))}")
+    replay(_trace, max_entries=len(_trace), max_bytes=None)  # unbounded, as the old dicts
+    for _entries, _bytes in ((4096, None), (4096, 32 * 1024 * 1024), (1024, 8 * 1024 * 1024), (256, None)):
+        replay(_trace, max_entries=_entries, max_bytes=_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+import random
+import re
+from argparse import ArgumentParser
+from pathlib import Path
+from timeit import default_timer
+from typing import List, Callable
+
+from media import regex
+from media.regex import ReleaseNameParser
+
+_WORDS = ["The", "Last", "Dark", "Night", "House", "Of", "Dragon", "Star", "Blue", "City", "Lost", "Cool", "Show",
+          "Movie", "Planet", "Wild", "Secret", "Life", "Deep", "Red"]
+_QUALITIES = ["2160p", "1080p", "720p", "DVD", "BDRip"]
+_SOURCES = ["WEB", "WEB-DL.DD5.1", "BluRay", "HDTV", "AMZN.WEB-DL.DDP5.1", "NF.WEB-DL.DDP5.1.Atmos"]
+_CODECS = ["H264", "H.265", "x264", "x265", "HEVC"]
+
+
+def gen_corpus(names: int, unique: int) -> List[str]:
+    """Release names of movies, episodes and season packs, unique distinct ones repeated as in file listings"""
+    random.seed(1)
+    _unique = []
+    for _ in range(unique):
+        _title = ".".join(random.sample(_WORDS, random.randint(1, 4)))
+        _tail = f"{random.choice(_QUALITIES)}.{random.choice(_SOURCES)}.{random.choice(_CODECS)}" \
+                f"-GRP{random.randint(1, 99)}"
+        _kind = random.random()
+        if _kind < 0.4:
+            _unique.append(f"{_title}.{random.randint(1950, 2024)}.{_tail}")
+        elif _kind < 0.9:
+            _unique.append(f"{_title}.S{random.randint(1, 15):02d}E{random.randint(1, 24):02d}.{_tail}.mkv")
+        else:
+            _unique.append(f"{_title}.S{random.randint(1, 15):02d}.{_tail}")
+    return [random.choice(_unique) for _ in range(names)]
+
+
+def parse_uncompiled(name: str) -> tuple:
+    """Previous media.regex behaviour: pattern strings passed to re per call"""
+    _item = name.replace(" ", ".")
+    _match = re.search(regex.SEASON_EPISODE_REGEX_PATTERN, _item)
+    _splits = re.split(regex.SEASON_EPISODE_REGEX_PATTERN, _item)
+    _years = re.compile(regex.YEAR_REGEX_PATTERN).findall(name)
+    _quality = re.compile(regex.RES_REGEX_PATTERN).search(name)
+    return (_match.groupdict() if _match else None, _splits[0], _years, _quality,
+            re.search(regex.MOVIE_REGEX_PATTERN, _item, re.IGNORECASE),
+            re.search(regex.SEASON_REGEX_PATTERN, _item, re.IGNORECASE))
+
+
+def measure(label: str, func: Callable[[str], object], corpus: List[str]) -> None:
+    _start = default_timer()
+    for _name in corpus:
+        func(_name)
+    _elapsed = default_timer() - _start
+    print(f"[{label}] {_elapsed:.3f}s ({_elapsed / len(corpus) * 1e6:.2f}us/name)")
+
+
+def main():
+    parser = ArgumentParser("Release name parsing benchmark")
+    parser.add_argument("--corpus", type=Path, default=None, help="file with one release name per line")
+    parser.add_argument("--names", "-n", type=int, default=100_000)
+    parser.add_argument("--unique", type=int, default=20_000)
+    args = parser.parse_args()
+    if args.corpus:
+        with open(args.corpus) as _fp:
+            _corpus = [_line.strip() for _line in _fp if _line.strip()]
+    else:
+        _corpus = gen_corpus(args.names, args.unique)
+    print(f"names: {len(_corpus)}, unique: {len(set(_corpus))}")
+    measure("uncompiled patterns", parse_uncompiled, _corpus)
+    measure("ReleaseNameParser, no memoization", ReleaseNameParser._parse, _corpus)
+    _parser = ReleaseNameParser()
+    measure("ReleaseNameParser, memoized", _parser.parse, _corpus)
+    measure("ReleaseNameParser, memoized (warm)", _parser.parse, _corpus)
+    print(_parser.cache_info())
+
+
+if __name__ == "__main__":
+    main()
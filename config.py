@@ -14,9 +14,13 @@ class SettingKeys(Enum):
     PATH_HOME = "home"
     PATH_MOVIE_DATABASE = "path_movdb"
     PATH_EPISODE_DATABASE = "path_epdb"
-    PATH_MOVIE_CACHE_DATABASE = "path_mov_cachedb"
-    PATH_TV_CACHE_DATABASE = "path_tv_cachedb"
+    PATH_MOVIE_FS_INDEX = "path_mov_fsindex"
+    PATH_TV_FS_INDEX = "path_tv_fsindex"
+    PATH_HTTP_CACHE = "path_http_cache"
+    PATH_TVMAZE_SHOW_INDEX = "path_tvmaze_show_index"
+    PATH_WB_LISTING_CACHE = "path_wb_listing_cache"
     PATH_TVSHOW_DATABASE = "path_showdb"
+    PATH_MEDIA_SQLITE_DATABASE = "path_media_sqlitedb"
     PATH_DOWNLOADS = "path_download"
     PATH_MISC = "path_misc"
     PATH_MOVIES = "path_film"
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Union, Any, Tuple
+from typing import List, Optional, Dict, Union, Any, Tuple, Set, Iterator
 from dataclasses import dataclass
 from enum import Enum, auto
 
@@ -7,6 +7,7 @@ from enum import Enum, auto
 class DatabaseType(Enum):
     JSON = auto()
     Mongo = auto()
+    SQLite = auto()
 
 
 class KeyType(Enum):
@@ -40,7 +41,32 @@ class Key:
         return False
 
 
-class Entry:
+class BaseEntry(ABC):
+    """Entry interface without storage, subclasses define their own __slots__"""
+    __slots__ = ()
+
+    @abstractmethod
+    def update(self, key: str, val: Any):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def data(self) -> Dict:
+        raise NotImplementedError
+
+    def __str__(self):
+        return f"Entry: {self.data()}"
+
+    def __eq__(self, other: "BaseEntry"):
+        return self.data() == other.data()
+
+
+class Entry(BaseEntry):
+    __slots__ = ("_data",)
+
     def __init__(self, data: Optional[Dict] = None):
         self._data: Dict[str] = data or {}
 
@@ -53,17 +79,11 @@ class Entry:
     def data(self) -> Dict:
         return self._data
 
-    def __str__(self):
-        return f"Entry: {self._data}"
-
-    def __eq__(self, other: "Entry"):
-        return self._data == other._data
-
 
 class DataBase(ABC):
     def __init__(self):
         self._keys: List[Key] = []
-        self._entry_primary_value_cache: Optional[Tuple[Any]] = None
+        self._entry_primary_value_cache: Optional[Set[Any]] = None
 
     @abstractmethod
     def save(self) -> bool:
@@ -74,7 +94,7 @@ class DataBase(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def get_entry(self, entry_primary_value: str) -> Optional[Entry]:
+    def get_entry(self, entry_primary_value: str) -> Optional[BaseEntry]:
         raise NotImplementedError
 
     @abstractmethod
@@ -86,21 +106,48 @@ class DataBase(ABC):
              filter_by: Optional[Dict[str, Any]] = None,
              sort_by_key: Optional[str] = None,
              limit: Optional[int] = None,
-             reversed_sort: bool = False) -> List[Dict]:
+             reversed_sort: bool = False,
+             fields: Optional[List[str]] = None) -> List[Dict]:
         raise NotImplementedError
 
     @abstractmethod
-    def update_entry(self, entry: Entry) -> bool:
+    def iter_find(self,
+                  filter_by: Optional[Dict[str, Any]] = None,
+                  fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Like find, but yields matches one by one (unsorted), fields limits the keys of each match"""
         raise NotImplementedError
 
     @abstractmethod
-    def insert_entry(self, entry: Entry) -> bool:
+    def update_entry(self, entry: BaseEntry) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def insert_entry(self, entry: BaseEntry) -> bool:
         raise NotImplementedError
 
     @abstractmethod
     def find_duplicates(self, key: Union[Key, str]) -> Dict[Any, List[str]]:
         raise NotImplementedError
 
+    @abstractmethod
+    def create_index(self, key: Union[Key, str]) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def insert_many(self, entries: List[Entry]) -> bool:
+        """Inserts all entries in one operation, raises ValueError if any of them already exists"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_many(self, entries: List[Entry]) -> bool:
+        """Updates existing entries (matched by primary key value) in one operation"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_many(self, entries: List[Entry]) -> bool:
+        """Updates existing and inserts new entries in one operation"""
+        raise NotImplementedError
+
     @property
     def primary_key(self) -> Optional[Key]:
         for key in self._keys:
@@ -110,7 +157,7 @@ class DataBase(ABC):
 
     def __contains__(self, primary_key_value: Any):
         if self._entry_primary_value_cache is None:
-            self._entry_primary_value_cache = self.entry_primary_values()
+            self._entry_primary_value_cache = set(self.entry_primary_values())
         return primary_key_value in self._entry_primary_value_cache
 
     def __iter__(self):
@@ -142,6 +189,15 @@ class DataBase(ABC):
         return True
 
     def insert(self, **data) -> bool:
+        new_entry = self.create_entry(**data)
+        _value = new_entry.get(self.primary_key.name)
+        if self.get_entry(_value) is not None:
+            raise ValueError(f"entry {self.primary_key.name}={_value} already exists! use update instead!")
+        self._entry_primary_value_cache = None
+        return self.insert_entry(new_entry)
+
+    def create_entry(self, **data) -> Entry:
+        """Creates an Entry from data, after validating keys and value types"""
         if self.primary_key.name not in data.keys():
             raise ValueError(f"data does not contain primary key: {self.primary_key.name}")
         new_entry = Entry()
@@ -151,13 +207,8 @@ class DataBase(ABC):
                 raise ValueError(f"cannot insert entry, {column} is not a valid key")
             if not _key.matches_type(value):
                 raise TypeError(f"value {value} is not of type {_key.type.name} for key {_key}")
-            if self.primary_key.name == column:
-                _entry = self.get_entry(value)
-                if _entry is not None:
-                    raise ValueError(f"entry {self.primary_key.name}={value} already exists! use update instead!")
-            self._entry_primary_value_cache = None
             new_entry.update(column, value)
-        return self.insert_entry(new_entry)
+        return new_entry
 
     def get(self, entry_name: str, column: Union[Key, str]) -> Optional[Any]:
         _entry = self.get_entry(entry_name)
@@ -173,6 +224,17 @@ class DataBase(ABC):
                 raise ValueError(f"cannot add {key}, name \"{key.name}\" is already taken")
         self._keys.append(key)
 
+    def _field_names(self, fields: Optional[List[Union[Key, str]]]) -> Optional[List[str]]:
+        if fields is None:
+            return None
+        _ret = []
+        for _field in fields:
+            _key = self._get_key(_field)
+            if _key is None:
+                raise ValueError(f"invalid field: {_field}")
+            _ret.append(_key.name)
+        return _ret
+
     def _get_key(self, key: Union[Key, str]) -> Optional[Key]:
         for _key in self._keys:
             if key == _key or key == _key.name:
@@ -1,46 +1,263 @@
 #!/usr/bin/env python3
 
+import itertools
 import json
+import os
+import re
 import shutil
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Union, Tuple
+from typing import Optional, List, Dict, Any, Union, Tuple, Generator, TextIO, Iterator
 from datetime import datetime
 
 from config import ConfigurationManager, SettingKeys
 
-from db.database import DataBase, Entry, Key
+from db.database import DataBase, BaseEntry, Entry, Key, KeyType
+
+
+_WHITESPACE = re.compile(r"\s*")
+_MISSING = object()  # value not set in CompactEntry, differs from None which is a valid (optional) value
+
+
+class _RowSchema:
+    """Fixed column layout, from database keys, shared by all CompactEntry rows"""
+
+    def __init__(self, keys: List[Key]):
+        self.names: Tuple[str, ...] = tuple(k.name for k in keys)
+        self.positions: Dict[str, int] = {name: ix for ix, name in enumerate(self.names)}
+        self._interned: Tuple[bool, ...] = tuple(k.type == KeyType.String and not k.primary for k in keys)
+        self._strings: Dict[str, str] = {}
+
+    def value(self, position: int, value: Any) -> Any:
+        """Returns value to store, repeated strings (show names etc.) share the same object"""
+        if self._interned[position] and isinstance(value, str):
+            return self._strings.setdefault(value, value)
+        return value
+
+    def row(self, data: Dict[str, Any]) -> Tuple[Any, ...]:
+        _row = [_MISSING] * len(self.names)
+        for _name, _val in data.items():
+            _pos = self.positions.get(_name, None)
+            if _pos is None:
+                raise ValueError(f"{_name} is not a valid key")
+            _row[_pos] = self.value(_pos, _val)
+        return tuple(_row)
+
+
+class CompactEntry(BaseEntry):
+    """Entry stored as a tuple of values in key order instead of a dict, data() builds a dict on demand"""
+    __slots__ = ("_schema", "_row")
+
+    def __init__(self, schema: _RowSchema, data: Dict[str, Any]):
+        self._schema: _RowSchema = schema
+        self._row: Tuple[Any, ...] = schema.row(data)
+
+    def update(self, key: str, val: Any):
+        _pos = self._schema.positions.get(key, None)
+        if _pos is None:
+            raise ValueError(f"{key} is not a valid key")
+        _row = list(self._row)
+        _row[_pos] = self._schema.value(_pos, val)
+        self._row = tuple(_row)
+
+    def get(self, key: str) -> Optional[Any]:
+        _pos = self._schema.positions.get(key, None)
+        if _pos is None:
+            return None
+        _val = self._row[_pos]
+        return None if _val is _MISSING else _val
+
+    def data(self) -> Dict:
+        return {_name: _val for _name, _val in zip(self._schema.names, self._row) if _val is not _MISSING}
+
+
+def _iter_json_array(fp: TextIO, chunk_size: int = 1 << 16) -> Generator[Any, None, None]:
+    """Yields the items of a top level JSON array one by one, without reading the whole file into memory"""
+    _keys: Dict[str, str] = {}
+    # share key strings between items, json.load does this for the whole document but raw_decode only per item
+    _decoder = json.JSONDecoder(object_pairs_hook=lambda pairs: {_keys.setdefault(k, k): v for k, v in pairs})
+    _buf = ""
+    _pos = 0
+    _eof = False
+
+    def _fill() -> bool:
+        nonlocal _buf, _pos, _eof
+        _chunk = fp.read(chunk_size)
+        if not _chunk:
+            _eof = True
+            return False
+        _buf = _buf[_pos:] + _chunk
+        _pos = 0
+        return True
+
+    def _next_char() -> Optional[str]:
+        nonlocal _pos
+        while True:
+            _pos = _WHITESPACE.match(_buf, _pos).end()
+            if _pos < len(_buf):
+                return _buf[_pos]
+            if not _fill():
+                return None
+
+    if _next_char() != "[":
+        raise ValueError("expected a JSON array")
+    _pos += 1
+    if _next_char() == "]":
+        return
+    while True:
+        _next_char()
+        try:
+            _item, _end = _decoder.raw_decode(_buf, _pos)
+        except json.JSONDecodeError:
+            if _eof or not _fill():
+                raise
+            continue
+        _sep = _WHITESPACE.match(_buf, _end).end()
+        if (_sep == len(_buf) or _buf[_sep] not in ",]") and not _eof and _fill():
+            continue  # value might be cut off at chunk boundary (e.g. a number), decode again
+        _pos = _end
+        yield _item
+        _char = _next_char()
+        if _char == "]":
+            return
+        if _char != ",":
+            raise ValueError(f"expected ',' or ']' in JSON array, got: {_char}")
+        _pos += 1
+
+
+class _KeyIndex:
+    """Multi-value index of entries on a (non primary) key, value -> entries"""
+
+    def __init__(self, key_name: str):
+        self._key_name: str = key_name
+        self._buckets: Dict[Any, Dict[int, BaseEntry]] = {}
+        self._values: Dict[int, Any] = {}  # id(entry) -> currently indexed value
+
+    def add(self, entry: BaseEntry):
+        _val = entry.get(self._key_name)
+        self._values[id(entry)] = _val
+        self._buckets.setdefault(_val, {})[id(entry)] = entry
+
+    def update(self, entry: BaseEntry):
+        _old = self._values.get(id(entry), None)
+        if id(entry) in self._values and _old == entry.get(self._key_name):
+            return
+        _bucket = self._buckets.get(_old, {})
+        _bucket.pop(id(entry), None)
+        if not _bucket:
+            self._buckets.pop(_old, None)
+        self.add(entry)
+
+    def remove(self, entry: BaseEntry):
+        _val = self._values.pop(id(entry), None)
+        _bucket = self._buckets.get(_val, {})
+        _bucket.pop(id(entry), None)
+        if not _bucket:
+            self._buckets.pop(_val, None)
+
+    def lookup(self, value: Any) -> List[BaseEntry]:
+        return list(self._buckets.get(value, {}).values())
+
+    def count(self, value: Any) -> int:
+        return len(self._buckets.get(value, {}))
+
+    def buckets(self) -> Dict[Any, List[BaseEntry]]:
+        return {_val: list(_entries.values()) for _val, _entries in self._buckets.items()}
 
 
 class JSONDatabase(DataBase):
-    def __init__(self, file_path: Optional[Path] = None):
+    JOURNAL_SUFFIX = ".journal"
+    JOURNAL_COMPACT_SIZE = 4 * 1024 * 1024  # bytes
+
+    def __init__(self, file_path: Optional[Path] = None, use_journal: bool = False,
+                 journal_compact_size: Optional[int] = None, compact: bool = False):
+        """
+        Args:
+         file_path: path to JSON file
+         use_journal: append changes to a sidecar journal file on save, instead of rewriting the whole file
+         journal_compact_size: journal size (bytes) at which it is merged into the JSON file
+         compact: store entries as CompactEntry rows, uses less memory for large databases
+        """
         super().__init__()
         self._path: Optional[Path] = file_path
-        self._entries: List[Entry] = []
+        self._entries: List[BaseEntry] = []
+        self._index: Dict[Any, BaseEntry] = {}  # primary key value -> entry
+        self._key_indexes: Dict[str, _KeyIndex] = {}
         self._need_save: bool = False
+        self._use_journal: bool = use_journal
+        self._journal_compact_size: int = journal_compact_size or self.JOURNAL_COMPACT_SIZE
+        self._journal_ops: List[Tuple[str, Any]] = []  # ("put", Entry) or ("del", primary key value)
+        self._compact: bool = compact
+        self._schema: Optional[_RowSchema] = None
+
+    @property
+    def journal_path(self) -> Optional[Path]:
+        if self._path is None:
+            return None
+        return self._path.with_name(self._path.name + self.JOURNAL_SUFFIX)
 
     def save(self, create_backup: bool = True) -> bool:
         if not self._need_save:
             return True
         if not self._path.exists():
             return False
+        if self._use_journal:
+            self._write_journal()
+            if self.journal_path.stat().st_size < self._journal_compact_size:
+                self._need_save = False
+                return True
         if create_backup:
             self._backup()
-        with open(self._path, "w") as _fp:
-            json.dump([e.data() for e in self._entries], _fp)
+        self._write_atomic()
+        if self._use_journal:
+            self._truncate_journal()
+        self._journal_ops = []
+        self._need_save = False
         return True
 
-    def load(self) -> bool:
+    def load(self, streaming: bool = False, trusted: bool = False) -> bool:
+        """
+        Load entries from file
+            Args:
+             streaming: parse the file item by item instead of reading the whole document at once
+             trusted: file was written by save(), skip key/type validation of each item
+        """
         if not self.primary_key or not self._keys:
             raise ValueError(f"keys are not yet set, will not load file, {self._path}")
         if not self._path.exists():
             raise FileNotFoundError(f"cannot load file: {self._path}")
         with open(self._path, "r") as _fp:
-            for _item in json.load(_fp):
-                self.insert(**_item)
+            _items = _iter_json_array(_fp) if streaming else json.load(_fp)
+            for _item in _items:
+                if trusted:
+                    self.insert_entry(Entry(_item))
+                else:
+                    self.insert(**_item)
+        if self._use_journal:
+            self._replay_journal()
+        self._journal_ops = []
         self._need_save = False
         return True
 
+    def create_index(self, key: Union[Key, str]) -> bool:
+        _key = self._get_key(key)
+        if _key is None:
+            raise ValueError(f"cannot create index, {key} is not a valid key")
+        if _key.type == KeyType.List:
+            raise ValueError(f"cannot create index on key {_key} of type {_key.type.name}")
+        if _key.primary or _key.name in self._key_indexes:
+            return True
+        _index = _KeyIndex(_key.name)
+        for entry in self._entries:
+            _index.add(entry)
+        self._key_indexes[_key.name] = _index
+        return True
+
     def find_duplicates(self, key: Union[Key, str]) -> Dict[Any, List[str]]:
+        _index = self._key_indexes.get(str(key), None)
+        if _index is not None:
+            return {_val: [e.get(self.primary_key.name) for e in _entries]
+                    for _val, _entries in _index.buckets().items()
+                    if _val is not None and len(_entries) > 1}
         _all = {}
         for entry in self._entries:
             _val = entry.get(str(key))
@@ -51,45 +268,246 @@ class JSONDatabase(DataBase):
                     _all[_val] = [entry.get(self.primary_key.name)]
         return {k: v for k, v in _all.items() if len(v) > 1}
 
-    def get_entry(self, entry_primary_value: str) -> Optional[Entry]:
-        for entry in self._entries:
-            if entry.get(self.primary_key.name) == entry_primary_value:
-                return entry
-        return None
+    def get_entry(self, entry_primary_value: str) -> Optional[BaseEntry]:
+        return self._index.get(entry_primary_value, None)
 
-    def update_entry(self, _):
+    def update_entry(self, entry: BaseEntry):
+        _val = entry.get(self.primary_key.name)
+        if self._index.get(_val, None) is not entry:
+            self._reindex_entry(entry)
+        for _index in self._key_indexes.values():
+            _index.update(entry)
+        if self._use_journal:
+            self._journal_ops.append(("put", entry))
         self._need_save = True
         return True
 
-    def insert_entry(self, new_entry: Entry):
+    def insert_entry(self, new_entry: BaseEntry):
+        if self._compact and not isinstance(new_entry, CompactEntry):
+            if self._schema is None:
+                self._schema = _RowSchema(self._keys)
+            new_entry = CompactEntry(self._schema, new_entry.data())
         self._entries.append(new_entry)
+        self._index[new_entry.get(self.primary_key.name)] = new_entry
+        for _index in self._key_indexes.values():
+            _index.add(new_entry)
+        if self._use_journal:
+            self._journal_ops.append(("put", new_entry))
+        self._need_save = True
+        return True
+
+    def remove(self, entry_primary_value: Any) -> bool:
+        _entry = self._index.get(entry_primary_value, None)
+        if _entry is None:
+            return False
+        self._remove_entry(_entry)
+        if self._use_journal:
+            self._journal_ops.append(("del", entry_primary_value))
         self._need_save = True
         return True
 
+    def insert_many(self, entries: List[Entry]) -> bool:
+        _pk = self.primary_key.name
+        _new = set()
+        for _entry in entries:
+            _val = _entry.get(_pk)
+            if _val in self._index or _val in _new:
+                raise ValueError(f"entry {_pk}={_val} already exists! use update_many instead!")
+            _new.add(_val)
+        for _entry in entries:
+            self.insert_entry(Entry(dict(_entry.data())))
+        return self._save_many()
+
+    def update_many(self, entries: List[Entry]) -> bool:
+        _pk = self.primary_key.name
+        for _entry in entries:
+            _stored = self._index.get(_entry.get(_pk), None)
+            if _stored is None:
+                raise ValueError(f"entry {_pk}={_entry.get(_pk)} does not exist! use insert_many instead!")
+            self._copy_to_stored(_stored, _entry)
+        return self._save_many()
+
+    def upsert_many(self, entries: List[Entry]) -> bool:
+        _pk = self.primary_key.name
+        for _entry in entries:
+            _stored = self._index.get(_entry.get(_pk), None)
+            if _stored is None:
+                self.insert_entry(Entry(dict(_entry.data())))
+            else:
+                self._copy_to_stored(_stored, _entry)
+        return self._save_many()
+
+    def _copy_to_stored(self, stored: BaseEntry, entry: BaseEntry):
+        for _key, _val in entry.data().items():
+            stored.update(_key, _val)
+        self.update_entry(stored)
+
+    def _save_many(self) -> bool:
+        """Batched writes are persisted with a single save, if the database is backed by a file"""
+        if self._path is None:
+            return True
+        return self.save()
+
     def entry_primary_values(self) -> Tuple[Optional[Any]]:
-        return tuple([e.get(self.primary_key.name) for e in self._entries])
+        return tuple(self._index.keys())
+
+    def __contains__(self, primary_key_value: Any):
+        return primary_key_value in self._index
+
+    def _reindex_entry(self, entry: BaseEntry):
+        """Primary key value of entry has changed, move it in the index"""
+        for _val, _entry in self._index.items():
+            if _entry is entry:
+                del self._index[_val]
+                if self._use_journal:
+                    self._journal_ops.append(("del", _val))
+                break
+        self._index[entry.get(self.primary_key.name)] = entry
+
+    def _remove_entry(self, entry: BaseEntry):
+        for _ix, _entry in enumerate(self._entries):
+            if _entry is entry:
+                del self._entries[_ix]
+                break
+        self._index.pop(entry.get(self.primary_key.name), None)
+        for _index in self._key_indexes.values():
+            _index.remove(entry)
+
+    def _write_atomic(self):
+        """Writes all entries to a temporary file which then replaces the JSON file"""
+        _tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with open(_tmp_path, "w") as _fp:
+            json.dump([e.data() for e in self._entries], _fp)
+            _fp.flush()
+            os.fsync(_fp.fileno())
+        os.replace(_tmp_path, self._path)
+        self._fsync_dir()
+
+    def _write_journal(self):
+        _lines = []
+        _written = set()
+        for _op, _val in reversed(self._journal_ops):  # only the last put of an entry is needed
+            if _op == "put":
+                if id(_val) in _written:
+                    continue
+                _written.add(id(_val))
+                _lines.append(json.dumps({"op": _op, "data": _val.data()}))
+            else:
+                _lines.append(json.dumps({"op": _op, "key": _val}))
+        with open(self.journal_path, "a") as _fp:
+            _fp.writelines(f"{_line}\n" for _line in reversed(_lines))
+            _fp.flush()
+            os.fsync(_fp.fileno())
+        self._journal_ops = []
+
+    def _truncate_journal(self):
+        if not self.journal_path.exists():
+            return
+        with open(self.journal_path, "w") as _fp:
+            _fp.flush()
+            os.fsync(_fp.fileno())
+
+    def _replay_journal(self):
+        if not self.journal_path.exists():
+            return
+        _pk = self.primary_key.name
+        with open(self.journal_path, "r") as _fp:
+            for _line in _fp:
+                try:
+                    _record = json.loads(_line)
+                except json.JSONDecodeError:
+                    break  # incomplete last line, save was interrupted
+                if _record["op"] == "del":
+                    _entry = self._index.get(_record["key"], None)
+                    if _entry is not None:
+                        self._remove_entry(_entry)
+                    continue
+                _data = _record["data"]
+                _entry = self._index.get(_data[_pk], None)
+                if _entry is None:
+                    self.insert_entry(Entry(_data))
+                    continue
+                for _key, _val in _data.items():
+                    _entry.update(_key, _val)
+                self.update_entry(_entry)
+
+    def _fsync_dir(self):
+        try:
+            _fd = os.open(self._path.parent, os.O_RDONLY)
+        except OSError:
+            return  # not supported on all platforms
+        try:
+            os.fsync(_fd)
+        finally:
+            os.close(_fd)
 
     def find(self,
              filter_by: Optional[Dict[str, Any]] = None,
              limit: Optional[int] = None,
              sort_by_key: Optional[str] = None,
-             reversed_sort: bool = False) -> List[Dict]:
-        _matches = []
-        for entry in self._entries:
-            if filter_by is None:
-                _matches.append(entry.data())
-            else:
-                _add = True
-                for k, v in filter_by:
-                    if entry.get(k) != v:
-                        _add = False
-                if _add:
-                    _matches.append(entry.data())
-        if sort_by_key is not None:
-            if self._get_key(sort_by_key) is None:
-                raise ValueError(f"invalid key: {sort_by_key}")
-            _matches.sort(key=lambda i: i[sort_by_key], reverse=reversed_sort)
-        return _matches[:limit] if limit is not None else _matches
+             reversed_sort: bool = False,
+             fields: Optional[List[str]] = None) -> List[Dict]:
+        _fields = self._field_names(fields)
+        if sort_by_key is None:
+            _matches = self._iter_matches(filter_by)
+            if limit is not None:
+                _matches = itertools.islice(_matches, limit)
+            return [self._project(_entry, _fields) for _entry in _matches]
+        if self._get_key(sort_by_key) is None:
+            raise ValueError(f"invalid key: {sort_by_key}")
+        _matches = list(self._iter_matches(filter_by))
+        _matches.sort(key=lambda e: e.get(sort_by_key), reverse=reversed_sort)
+        if limit is not None:
+            _matches = _matches[:limit]
+        return [self._project(_entry, _fields) for _entry in _matches]
+
+    def iter_find(self,
+                  filter_by: Optional[Dict[str, Any]] = None,
+                  fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        _fields = self._field_names(fields)
+        for _entry in self._iter_matches(filter_by):
+            yield self._project(_entry, _fields)
+
+    def _iter_matches(self, filter_by: Optional[Dict[str, Any]] = None) -> Iterator[BaseEntry]:
+        for entry in self._candidates(filter_by):
+            if filter_by is None or all(entry.get(k) == v for k, v in filter_by.items()):
+                yield entry
+
+    @staticmethod
+    def _project(entry: BaseEntry, fields: Optional[List[str]]) -> Dict:
+        """Only the requested fields are copied out of the entry, the full data dict is not built"""
+        if fields is None:
+            return entry.data()
+        _ret = {}
+        for _field in fields:
+            _val = entry.get(_field)
+            if _val is not None:
+                _ret[_field] = _val
+        return _ret
+
+    def _candidates(self, filter_by: Optional[Dict[str, Any]] = None) -> List[BaseEntry]:
+        """Narrows down entries to check for filter using the smallest matching index, if any"""
+        if not filter_by:
+            return self._entries
+        if self.primary_key.name in filter_by:
+            try:
+                _entry = self._index.get(filter_by[self.primary_key.name], None)
+            except TypeError:  # unhashable filter value
+                return self._entries
+            return [_entry] if _entry is not None else []
+        _best: Optional[Tuple[_KeyIndex, Any]] = None
+        for k, v in filter_by.items():
+            _index = self._key_indexes.get(k, None)
+            if _index is None:
+                continue
+            try:
+                if _best is None or _index.count(v) < _best[0].count(_best[1]):
+                    _best = (_index, v)
+            except TypeError:  # unhashable filter value
+                continue
+        if _best is None:
+            return self._entries
+        return _best[0].lookup(_best[1])
 
     def _backup(self):
         _backup_path = ConfigurationManager().path(SettingKeys.PATH_BACKUP, assert_path_exists=True)
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from typing import Optional, List, Callable, Dict
+from typing import Optional, List, Callable, Dict, Any
 from pathlib import Path
 from dataclasses import dataclass
 from enum import Enum, auto
@@ -8,6 +8,7 @@ from printout import Color, cstr
 import util
 from db.db_json import JSONDatabase
 from db.db_mongo import MongoDatabase, MongoDbSettings
+from db.db_sqlite import SQLiteDatabase
 from db.database import DatabaseType, DataBase, Key
 from base_log import BaseLog
 
@@ -52,18 +53,27 @@ class MediaDatabase(BaseLog):
         self._init()
 
     @staticmethod
-    def get_database(media_type: MediaType, use_json_db: bool = False) -> Optional["MediaDatabase"]:
+    def get_database(media_type: MediaType, use_json_db: bool = False,
+                     use_sqlite_db: bool = False) -> Optional["MediaDatabase"]:
         if media_type == MediaType.Movie:
             from db.db_mov import MovieDatabase
-            return MovieDatabase(use_json_db=use_json_db)
+            return MovieDatabase(use_json_db=use_json_db, use_sqlite_db=use_sqlite_db)
         if media_type == MediaType.Episode:
             from db.db_tv import EpisodeDatabase
-            return EpisodeDatabase(use_json_db=use_json_db)
+            return EpisodeDatabase(use_json_db=use_json_db, use_sqlite_db=use_sqlite_db)
         if media_type == MediaType.Show:
             from db.db_tv import ShowDatabase
-            return ShowDatabase(use_json_db=use_json_db)
+            return ShowDatabase(use_json_db=use_json_db, use_sqlite_db=use_sqlite_db)
         return None
 
+    @staticmethod
+    def sqlite_settings(table_name: str, file_path: Optional[Path] = None) -> MediaDbSettings:
+        if file_path is None:
+            import config
+            file_path = config.ConfigurationManager().path(config.SettingKeys.PATH_MEDIA_SQLITE_DATABASE,
+                                                           convert_to_path=True)
+        return MediaDbSettings(type=DatabaseType.SQLite, path=file_path, collection_name=table_name)
+
     def _init(self):
         if self._settings.type == DatabaseType.JSON:
             assert self._settings.path is not None
@@ -83,6 +93,11 @@ class MediaDatabase(BaseLog):
             )
             self._db = MongoDatabase(_settings)
             self.log("init Mongo")
+        elif self._settings.type == DatabaseType.SQLite:
+            assert self._settings.path is not None
+            assert self._settings.collection_name is not None
+            self._db = SQLiteDatabase(self._settings.path, table_name=self._settings.collection_name)
+            self.log("init SQLite")
         else:
             raise ValueError(f"invalid db type: {self._settings.type}")
 
@@ -102,6 +117,21 @@ class MediaDatabase(BaseLog):
     def last_removed(self, limit: int):
         return self._get_last_of(self.REMOVED_DATE_KEY_STR, limit=limit, filter_by={"removed": True})
 
+    def add_many(self, items: List[Dict]) -> bool:
+        """Inserts items, only the first of items with the same primary key value is added"""
+        if not items:
+            return True
+        _pk = self._db.primary_key.name
+        _unique: Dict[Any, Dict] = {}
+        for item in items:
+            if item.get(_pk) in _unique:
+                self.warn(f"skipping duplicate {_pk}: {cstr(str(item.get(_pk)), Color.Orange)}")
+                continue
+            _unique[item.get(_pk)] = item
+        _ret = self._db.insert_many([self._db.create_entry(**item) for item in _unique.values()])
+        self.log(f"added {len(_unique)} items")
+        return _ret
+
     def mark_removed(self, item: str):
         self._db.update(item, removed=True, removed_date=util.now_timestamp())
         self.log(f"marked {cstr(item, Color.Orange)} as removed")
@@ -1,13 +1,15 @@
 from enum import Enum, auto
-from typing import Optional, Union, Any, List, Dict, Tuple
+from typing import Optional, Union, Any, List, Dict, Tuple, Iterator, Set
 from dataclasses import dataclass
 
 import pymongo  # Do not use "from pymongo import MongoClient", mongomock in unit tests require this way...
 from pymongo.cursor import Cursor
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo.errors import ServerSelectionTimeoutError, OperationFailure
 from pymongo.collection import Collection
+from pymongo import monitoring
 
 from db.database import DataBase, Key, Entry, KeyType
+from singleton import Singleton
 
 
 @dataclass
@@ -20,6 +22,132 @@ class MongoDbSettings:
     port: int = 27017
 
 
+class _PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool events of a MongoClient"""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = dict(created=0, closed=0, checked_out=0, checked_in=0, check_out_failed=0)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.counters["created"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.counters["closed"] += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.counters["check_out_failed"] += 1
+
+    def connection_checked_out(self, event):
+        self.counters["checked_out"] += 1
+
+    def connection_checked_in(self, event):
+        self.counters["checked_in"] += 1
+
+
+class MongoClientRegistry(metaclass=Singleton):
+    """
+    Process wide registry of MongoClients, one pooled client per host/credentials.
+    Database/collection existence is only probed the first time a collection is requested,
+    indexes are only created the first time they are requested.
+    """
+    MAX_POOL_SIZE = 10
+
+    def __init__(self):
+        self._clients: Dict[Tuple, pymongo.MongoClient] = {}
+        self._listeners: Dict[Tuple, _PoolStatsListener] = {}
+        self._verified: Set[Tuple] = set()
+        self._indexes: Set[Tuple] = set()
+        self._stats: Dict[str, int] = dict(clients_created=0, clients_reused=0, probes=0, probes_skipped=0,
+                                           indexes_created=0, indexes_skipped=0)
+
+    @staticmethod
+    def _client_key(settings: MongoDbSettings) -> Tuple:
+        return settings.ip, settings.port, settings.username, settings.password
+
+    def client(self, settings: MongoDbSettings) -> pymongo.MongoClient:
+        _key = self._client_key(settings)
+        if _key in self._clients:
+            self._stats["clients_reused"] += 1
+            return self._clients[_key]
+        _listener = _PoolStatsListener()
+        _client = pymongo.MongoClient(settings.ip,
+                                      settings.port,
+                                      username=settings.username,
+                                      password=settings.password,
+                                      serverSelectionTimeoutMS=1000,
+                                      maxPoolSize=self.MAX_POOL_SIZE,
+                                      event_listeners=[_listener])
+        try:
+            _client.server_info()
+        except ServerSelectionTimeoutError as _:
+            _client.close()
+            raise ConnectionError("Failed to connect to mongodb!")
+        self._stats["clients_created"] += 1
+        self._clients[_key] = _client
+        self._listeners[_key] = _listener
+        return _client
+
+    def collection(self, settings: MongoDbSettings) -> Collection:
+        _client = self.client(settings)
+        _db_name = settings.database_name
+        _coll_name = settings.collection_name
+        _key = self._client_key(settings) + (_db_name, _coll_name)
+        if _key in self._verified:
+            self._stats["probes_skipped"] += 1
+            return _client[_db_name][_coll_name]
+        self._stats["probes"] += 1
+        if _db_name not in _client.list_database_names():
+            raise ValueError(f"database {_db_name} does not exist!")
+        if _coll_name not in _client[_db_name].list_collection_names():
+            raise ValueError(f"collection {_coll_name} does not exist in db {_db_name}")
+        self._verified.add(_key)
+        return _client[_db_name][_coll_name]
+
+    def ensure_index(self, settings: MongoDbSettings, key: str) -> bool:
+        """Creates an index on key of the collection once per process, False if the index could not be created"""
+        _key = self._client_key(settings) + (settings.database_name, settings.collection_name, key)
+        if _key in self._indexes:
+            self._stats["indexes_skipped"] += 1
+            return True
+        try:
+            self.collection(settings).create_index(key)
+        except OperationFailure:  # e.g. user without createIndex privilege
+            return False
+        self._indexes.add(_key)  # only once created, failed attempts are retried
+        self._stats["indexes_created"] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        _pools = {f"{_key[0]}:{_key[1]}": dict(_listener.counters) for _key, _listener in self._listeners.items()}
+        return dict(self._stats, clients=len(self._clients), pools=_pools)
+
+    def close_all(self) -> None:
+        for _client in self._clients.values():
+            _client.close()
+        self._clients.clear()
+        self._listeners.clear()
+        self._verified.clear()
+        self._indexes.clear()
+
+
 class MongoDatabase(DataBase):
     class State(Enum):
         NotInitialized = auto()
@@ -38,25 +166,14 @@ class MongoDatabase(DataBase):
     def _connect(self) -> bool:
         if self._state == self.State.Connected:
             return True
-        if self._client is None:
-            self._client = pymongo.MongoClient(self._settings.ip,
-                                               self._settings.port,
-                                               username=self._settings.username,
-                                               password=self._settings.password,
-                                               serverSelectionTimeoutMS=1000)
-            try:
-                self._client.server_info()
-            except ServerSelectionTimeoutError as _:
-                self._state = self.State.FailedToConnect
-                raise ConnectionError("Failed to connect to mongodb!")
-        _db_name = self._settings.database_name
-        if _db_name not in self._client.list_database_names():
-            raise ValueError(f"database {_db_name} does not exist!")
-        _db = self._client[_db_name]
-        _coll_name = self._settings.collection_name
-        if _coll_name not in _db.list_collection_names():
-            raise ValueError(f"collection {_coll_name} does not exist in db {_coll_name}")
-        self._collection = self._client[_db_name][_coll_name]
+        try:
+            self._collection = MongoClientRegistry().collection(self._settings)
+        except ConnectionError:
+            self._state = self.State.FailedToConnect
+            raise
+        self._client = self._collection.database.client
+        self._state = self.State.Connected
+        return True
 
     def _find_all(self) -> Cursor:
         return self._collection.find(filter={})
@@ -76,26 +193,37 @@ class MongoDatabase(DataBase):
         return Entry(dict(_entry))
 
     def entry_primary_values(self) -> Tuple[Any]:
-        return tuple([_cur.get(self.primary_key.name) for _cur in self._find_all()])
+        _pk = self.primary_key.name
+        return tuple([_item.get(_pk) for _item in self.iter_find(fields=[_pk])])
 
     def find(self, filter_by: Optional[Dict[str, Any]] = None, sort_by_key: Optional[str] = None,
-             limit: Optional[int] = None, reversed_sort: bool = False) -> List[Dict]:
-        _query = filter_by or {}
-        if filter_by is not None:
-            _query = filter_by
-        _cur = self._collection.find(_query)
+             limit: Optional[int] = None, reversed_sort: bool = False,
+             fields: Optional[List[str]] = None) -> List[Dict]:
+        _cur = self._cursor(filter_by, fields)
         if not _cur:
             return []
         if sort_by_key:
             _cur.sort(str(sort_by_key), pymongo.DESCENDING if reversed_sort else pymongo.ASCENDING)
         _ret = []
         for item in _cur:
-            _ = item.pop("_id")  # Remove MongoDb Id
             _ret.append(dict(item))
             if len(_ret) == limit:
                 break
         return _ret
 
+    def iter_find(self,
+                  filter_by: Optional[Dict[str, Any]] = None,
+                  fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        for item in self._cursor(filter_by, fields):
+            yield item
+
+    def _cursor(self, filter_by: Optional[Dict[str, Any]] = None, fields: Optional[List[str]] = None) -> Cursor:
+        _projection = {"_id": False}  # Remove MongoDb Id
+        _fields = self._field_names(fields)
+        if _fields is not None:
+            _projection.update({_field: True for _field in _fields})
+        return self._collection.find(filter_by or {}, projection=_projection)
+
     def update_entry(self, entry: Entry) -> bool:
         _val = entry.get(self.primary_key.name)
         result = self._collection.update_one(
@@ -108,6 +236,55 @@ class MongoDatabase(DataBase):
         _id = self._collection.insert_one(entry.data())
         return _id is not None
 
+    def insert_many(self, entries: List[Entry]) -> bool:
+        if not entries:
+            return True
+        _pk = self.primary_key.name
+        _values = [_entry.get(_pk) for _entry in entries]
+        if len(set(_values)) != len(_values):
+            raise ValueError(f"cannot insert entries, duplicate {_pk} values in batch")
+        _existing = self._collection.find_one(filter={_pk: {"$in": _values}})
+        if _existing is not None:
+            raise ValueError(f"entry {_pk}={_existing.get(_pk)} already exists! use update_many instead!")
+        # insert_one/InsertOne adds "_id" to the passed dict, pass copies
+        return self._bulk_write([pymongo.InsertOne(dict(_entry.data())) for _entry in entries])
+
+    def update_many(self, entries: List[Entry]) -> bool:
+        return self._bulk_write([self._update_op(_entry, upsert=False) for _entry in entries])
+
+    def upsert_many(self, entries: List[Entry]) -> bool:
+        return self._bulk_write([self._update_op(_entry, upsert=True) for _entry in entries])
+
+    def replace_many(self, entries: List[Entry]) -> Dict[str, int]:
+        """
+        Replaces the whole stored documents (matched by primary key value) in one bulk write, keys not in entries
+        are removed. Returns the matched and modified document counts.
+        """
+        if not entries:
+            return dict(matched=0, modified=0)
+        _pk = self.primary_key.name
+        self._entry_primary_value_cache = None
+        result = self._collection.bulk_write(
+            [pymongo.ReplaceOne(filter={_pk: _entry.get(_pk)}, replacement=dict(_entry.data()), upsert=False)
+             for _entry in entries], ordered=False)
+        return dict(matched=result.matched_count, modified=result.modified_count)
+
+    def _update_op(self, entry: Entry, upsert: bool) -> pymongo.UpdateOne:
+        _pk = self.primary_key.name
+        return pymongo.UpdateOne(filter={_pk: entry.get(_pk)}, update={"$set": dict(entry.data())}, upsert=upsert)
+
+    def _bulk_write(self, operations: List) -> bool:
+        if not operations:
+            return True
+        self._entry_primary_value_cache = None
+        result = self._collection.bulk_write(operations, ordered=False)
+        return result.acknowledged
+
+    def create_index(self, key: Union[Key, str]) -> bool:
+        if self._get_key(key) is None:
+            raise ValueError(f"cannot create index, {key} is not a valid key")
+        return MongoClientRegistry().ensure_index(self._settings, str(key))
+
     def find_duplicates(self, key: Union[Key, str]) -> Dict[Any, List[str]]:
         _all = {}
         for _cur in self._collection.find(filter={str(key): {"$exists": True}}):
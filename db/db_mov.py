@@ -42,7 +42,7 @@ def _to_text_removed(movie_data: Dict) -> str:
 
 
 class MovieDatabase(MediaDatabase):
-    def __init__(self, file_path: Optional[Path] = None, use_json_db: bool = False):
+    def __init__(self, file_path: Optional[Path] = None, use_json_db: bool = False, use_sqlite_db: bool = False):
         keys = [
             Key("folder", primary=True),
             Key("title"),
@@ -53,7 +53,9 @@ class MovieDatabase(MediaDatabase):
             Key(self.REMOVED_DATE_KEY_STR, type=KeyType.Integer),
         ]
 
-        if use_json_db:
+        if use_sqlite_db:
+            _settings = self.sqlite_settings("movies", file_path)
+        elif use_json_db:
             if file_path is None:
                 _path = ConfigurationManager().path(SettingKeys.PATH_MOVIE_DATABASE,
                                                     assert_path_exists=True,
@@ -68,6 +70,8 @@ class MovieDatabase(MediaDatabase):
         MediaDatabase.__init__(self, _settings)
         self._db.set_valid_keys(keys)
         self._db.load()
+        self._db.create_index(self.REMOVED_KEY_STR)
+        self._db.create_index("imdb")
 
     def __contains__(self, movie: str):
         return movie in self._db
@@ -93,13 +97,12 @@ class MovieDatabase(MediaDatabase):
              A dict where the key is the IMDb id the value is a list of the movies
         """
         _ret = {}
+        _removed = {m.get("folder") for m in self._db.iter_find(filter_by={self.REMOVED_KEY_STR: True},
+                                                                fields=["folder"])}
         for _id, mov_list in self._db.find_duplicates(key=Key("imdb")).items():
             if _id is None:
                 continue
-            _duplicates = []
-            for mov in mov_list:
-                if not self.is_removed(mov):  # FIXME: this is slow..
-                    _duplicates.append(mov)
+            _duplicates = [mov for mov in mov_list if mov not in _removed]
             if len(_duplicates) > 1:
                 _ret[_id] = _duplicates
         return _ret
@@ -110,8 +113,10 @@ class MovieDatabase(MediaDatabase):
     def update(self, folder: str, **data):
         self._db.update(folder, **data)
 
-    def all_movies(self, include_removed: bool = True):
-        for item in self._db.find():
+    def all_movies(self, include_removed: bool = True, fields: Optional[List[str]] = None):
+        if fields is not None and not include_removed and self.REMOVED_KEY_STR not in fields:
+            fields = list(fields) + [self.REMOVED_KEY_STR]
+        for item in self._db.iter_find(fields=fields):
             if include_removed:
                 yield item
             elif not item.get(self.REMOVED_KEY_STR, False):
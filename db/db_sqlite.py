@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Union, Tuple, Iterator
+
+from db.database import DataBase, Entry, Key, KeyType
+
+_COLUMN_TYPES = {
+    KeyType.Integer: "INTEGER",
+    KeyType.String: "TEXT",
+    KeyType.Boolean: "INTEGER",
+    KeyType.List: "TEXT",  # stored as JSON
+}
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteDatabase(DataBase):
+    """
+    Stores entries in a table of a SQLite database file, one column per Key.
+    Every insert/update is committed directly (like MongoDatabase), save() does nothing.
+    """
+
+    def __init__(self, file_path: Union[Path, str], table_name: str):
+        super().__init__()
+        self._path: Union[Path, str] = file_path
+        self._table: str = table_name
+        self._conn: sqlite3.Connection = sqlite3.connect(str(file_path))
+        self._table_ready: bool = False
+
+    def save(self) -> bool:
+        return True
+
+    def load(self) -> bool:
+        if not self.primary_key or not self._keys:
+            raise ValueError(f"keys are not yet set, will not create table {self._table}")
+        self._create_table()
+        return True
+
+    def get_entry(self, entry_primary_value: str) -> Optional[Entry]:
+        _rows = list(self._select(where={self.primary_key.name: entry_primary_value}, limit=1))
+        if not _rows:
+            return None
+        return Entry(_rows[0])
+
+    def entry_primary_values(self) -> Tuple[Any]:
+        self._create_table()
+        _cur = self._conn.execute(f"SELECT {_quote(self.primary_key.name)} FROM {_quote(self._table)}")
+        return tuple(_row[0] for _row in _cur)
+
+    def __contains__(self, primary_key_value: Any):
+        self._create_table()
+        _cur = self._conn.execute(
+            f"SELECT 1 FROM {_quote(self._table)} WHERE {_quote(self.primary_key.name)} = ? LIMIT 1",
+            (primary_key_value,))
+        return _cur.fetchone() is not None
+
+    def find(self,
+             filter_by: Optional[Dict[str, Any]] = None,
+             sort_by_key: Optional[str] = None,
+             limit: Optional[int] = None,
+             reversed_sort: bool = False,
+             fields: Optional[List[str]] = None) -> List[Dict]:
+        if sort_by_key is not None and self._get_key(sort_by_key) is None:
+            raise ValueError(f"invalid key: {sort_by_key}")
+        return list(self._select(where=filter_by, sort_by_key=sort_by_key, limit=limit, reversed_sort=reversed_sort,
+                                 fields=fields))
+
+    def iter_find(self,
+                  filter_by: Optional[Dict[str, Any]] = None,
+                  fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        return self._select(where=filter_by, fields=fields)
+
+    def update_entry(self, entry: Entry) -> bool:
+        self._create_table()
+        with self._conn:
+            return self._execute_update(self._to_row(entry.data()))
+
+    def insert_entry(self, entry: Entry) -> bool:
+        self._create_table()
+        with self._conn:
+            self._execute_insert(self._to_row(entry.data()))
+        return True
+
+    def insert_many(self, entries: List[Entry]) -> bool:
+        self._create_table()
+        try:
+            with self._conn:
+                for _entry in entries:
+                    self._execute_insert(self._to_row(_entry.data()))
+        except sqlite3.IntegrityError as error:
+            raise ValueError(f"cannot insert entries, {error}") from error
+        return True
+
+    def update_many(self, entries: List[Entry]) -> bool:
+        self._create_table()
+        _ret = True
+        with self._conn:
+            for _entry in entries:
+                _ret = self._execute_update(self._to_row(_entry.data())) and _ret
+        return _ret
+
+    def upsert_many(self, entries: List[Entry]) -> bool:
+        self._create_table()
+        with self._conn:
+            for _entry in entries:
+                _data = self._to_row(_entry.data())
+                if not self._execute_update(_data):
+                    self._execute_insert(_data)
+        return True
+
+    def find_duplicates(self, key: Union[Key, str]) -> Dict[Any, List[str]]:
+        _key = self._get_key(key)
+        if _key is None:
+            raise ValueError(f"invalid key: {key}")
+        self._create_table()
+        _col, _pk, _table = _quote(_key.name), _quote(self.primary_key.name), _quote(self._table)
+        _cur = self._conn.execute(
+            f"SELECT {_col}, {_pk} FROM {_table} WHERE {_col} IN "
+            f"(SELECT {_col} FROM {_table} WHERE {_col} IS NOT NULL GROUP BY {_col} HAVING COUNT(*) > 1)")
+        _ret = {}
+        for _val, _primary in _cur:
+            _ret.setdefault(self._from_column(_key, _val), []).append(_primary)
+        return _ret
+
+    def create_index(self, key: Union[Key, str]) -> bool:
+        _key = self._get_key(key)
+        if _key is None:
+            raise ValueError(f"cannot create index, {key} is not a valid key")
+        self._create_table()
+        if _key.primary:
+            return True
+        _name = _quote(f"idx_{self._table}_{_key.name}")
+        with self._conn:
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {_name} ON {_quote(self._table)} ({_quote(_key.name)})")
+        return True
+
+    def _create_table(self):
+        if self._table_ready:
+            return
+        _table = _quote(self._table)
+        _columns = []
+        for _key in self._keys:
+            _col = f"{_quote(_key.name)} {_COLUMN_TYPES[_key.type]}"
+            if _key.primary:
+                _col += " PRIMARY KEY NOT NULL"
+            _columns.append(_col)
+        with self._conn:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {_table} ({', '.join(_columns)})")
+            _existing = [_row[1] for _row in self._conn.execute(f"PRAGMA table_info({_table})")]
+            for _key in self._keys:
+                if _key.name not in _existing:  # key added since table was created
+                    self._conn.execute(f"ALTER TABLE {_table} ADD COLUMN {_quote(_key.name)} "
+                                       f"{_COLUMN_TYPES[_key.type]}")
+        self._table_ready = True
+
+    def _execute_update(self, data: Dict[str, Any]) -> bool:
+        _pk = self.primary_key.name
+        _columns = [c for c in data if c != _pk]
+        if not _columns:
+            return self.__contains__(data[_pk])
+        _set = ", ".join(f"{_quote(c)} = ?" for c in _columns)
+        _cur = self._conn.execute(f"UPDATE {_quote(self._table)} SET {_set} WHERE {_quote(_pk)} = ?",
+                                  [data[c] for c in _columns] + [data[_pk]])
+        return _cur.rowcount > 0
+
+    def _execute_insert(self, data: Dict[str, Any]):
+        _columns = ", ".join(_quote(c) for c in data)
+        _values = ", ".join("?" for _ in data)
+        self._conn.execute(f"INSERT INTO {_quote(self._table)} ({_columns}) VALUES ({_values})",
+                           list(data.values()))
+
+    def _select(self,
+                where: Optional[Dict[str, Any]] = None,
+                sort_by_key: Optional[str] = None,
+                limit: Optional[int] = None,
+                reversed_sort: bool = False,
+                fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        self._create_table()
+        _fields = self._field_names(fields)
+        _keys = self._keys if _fields is None else [self._get_key(f) for f in _fields]
+        _query = f"SELECT {', '.join(_quote(k.name) for k in _keys)} FROM {_quote(self._table)}"
+        _params = []
+        if where:
+            _conditions = []
+            for _name, _val in where.items():
+                _key = self._get_key(_name)
+                if _key is None:
+                    raise ValueError(f"invalid key: {_name}")
+                if _val is None:
+                    _conditions.append(f"{_quote(_key.name)} IS NULL")
+                else:
+                    _conditions.append(f"{_quote(_key.name)} = ?")
+                    _params.append(self._to_column(_key, _val))
+            _query += " WHERE " + " AND ".join(_conditions)
+        if sort_by_key is not None:
+            _query += f" ORDER BY {_quote(str(sort_by_key))} {'DESC' if reversed_sort else 'ASC'}"
+        if limit is not None:
+            _query += " LIMIT ?"
+            _params.append(limit)
+        for _row in self._conn.execute(_query, _params):
+            yield {_key.name: self._from_column(_key, _val) for _key, _val in zip(_keys, _row) if _val is not None}
+
+    def _to_row(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        _ret = {}
+        for _name, _val in data.items():
+            _key = self._get_key(_name)
+            if _key is None:
+                raise ValueError(f"{_name} is not a valid key")
+            _ret[_key.name] = self._to_column(_key, _val)
+        return _ret
+
+    @staticmethod
+    def _to_column(key: Key, value: Any) -> Any:
+        if value is None:
+            return None
+        if key.type == KeyType.List:
+            return json.dumps(value)
+        if key.type == KeyType.Boolean:
+            return int(value)
+        return value
+
+    @staticmethod
+    def _from_column(key: Key, value: Any) -> Any:
+        if value is None:
+            return None
+        if key.type == KeyType.List:
+            return json.loads(value)
+        if key.type == KeyType.Boolean:
+            return bool(value)
+        return value
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, List
 from pathlib import Path
 
 from config import ConfigurationManager, SettingKeys
@@ -25,7 +25,7 @@ def _to_text_removed(episode_data: Dict) -> str:
 
 
 class ShowDatabase(MediaDatabase):
-    def __init__(self, file_path: Optional[Path] = None, use_json_db: bool = False):
+    def __init__(self, file_path: Optional[Path] = None, use_json_db: bool = False, use_sqlite_db: bool = False):
         keys = [
             Key("folder", primary=True),
             Key("title", optional=False),
@@ -37,7 +37,9 @@ class ShowDatabase(MediaDatabase):
             Key(self.REMOVED_DATE_KEY_STR, type=KeyType.Integer),
         ]
 
-        if use_json_db:
+        if use_sqlite_db:
+            _settings = self.sqlite_settings("shows", file_path)
+        elif use_json_db:
             if file_path is None:
                 _path = ConfigurationManager().path(SettingKeys.PATH_TVSHOW_DATABASE,
                                                     assert_path_exists=True,
@@ -52,6 +54,7 @@ class ShowDatabase(MediaDatabase):
         MediaDatabase.__init__(self, _settings)
         self._db.set_valid_keys(keys)
         self._db.load()
+        self._db.create_index(self.REMOVED_KEY_STR)
 
     def __contains__(self, show: str):
         return show in self._db
@@ -62,13 +65,13 @@ class ShowDatabase(MediaDatabase):
     def update(self, show_folder: str, **data):
         self._db.update(show_folder, **data)
 
-    def all_shows(self):
-        for item in self._db.find():
+    def all_shows(self, fields: Optional[List[str]] = None):
+        for item in self._db.iter_find(fields=fields):
             yield item
 
 
 class EpisodeDatabase(MediaDatabase):
-    def __init__(self, file_path: Optional[Path] = None, use_json_db: bool = False):
+    def __init__(self, file_path: Optional[Path] = None, use_json_db: bool = False, use_sqlite_db: bool = False):
         keys = [
             Key("filename", primary=True),
             Key("season_number", type=KeyType.Integer, optional=False),
@@ -83,7 +86,9 @@ class EpisodeDatabase(MediaDatabase):
             Key(self.REMOVED_DATE_KEY_STR, type=KeyType.Integer),
         ]
 
-        if use_json_db:
+        if use_sqlite_db:
+            _settings = self.sqlite_settings("episodes", file_path)
+        elif use_json_db:
             if file_path is None:
                 _path = ConfigurationManager().path(SettingKeys.PATH_EPISODE_DATABASE,
                                                     assert_path_exists=True,
@@ -98,6 +103,7 @@ class EpisodeDatabase(MediaDatabase):
         MediaDatabase.__init__(self, _settings)
         self._db.set_valid_keys(keys)
         self._db.load()
+        self._db.create_index(self.REMOVED_KEY_STR)
 
     def export_latest_added_episodes(self):
         _path = ConfigurationManager().path(SettingKeys.PATH_TV,
@@ -119,8 +125,8 @@ class EpisodeDatabase(MediaDatabase):
     def update(self, file_name: str, **data):
         self._db.update(file_name, **data)
 
-    def all_episodes(self):
-        for item in self._db.find():
+    def all_episodes(self, fields: Optional[List[str]] = None):
+        for item in self._db.iter_find(fields=fields):
             yield item
 
     def __contains__(self, file_name: str):
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from timeit import default_timer
+from typing import Optional, List, Dict, Generator, Tuple, Iterable, Union
+
+from base_log import BaseLog
+from config import ConfigurationManager, SettingKeys
+from db.database import Key, KeyType
+from db.db_json import JSONDatabase
+
+
+@dataclass
+class RefreshStats:
+    dirs_checked: int = 0
+    dirs_scanned: int = 0
+    dirs_removed: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self):
+        return (f"checked {self.dirs_checked} dirs, scanned {self.dirs_scanned}, "
+                f"removed {self.dirs_removed} in {self.elapsed:.3f}s")
+
+
+class FileSystemIndex(BaseLog):
+    """
+    Persistent index of all directories below a root directory.
+    Each directory is stored with its mtime and inode, and the names of its sub directories and files.
+    refresh() stats every indexed directory but only lists the contents of directories that changed,
+    so a refresh of an unchanged tree costs one stat per directory.
+    """
+    ROOT = ""
+    _shared: Dict[SettingKeys, "FileSystemIndex"] = {}
+
+    def __init__(self, root: Path, file_path: Path, verbose: bool = False):
+        BaseLog.__init__(self, verbose=verbose)
+        self.set_log_prefix("FS_INDEX")
+        self._root: Path = Path(root)
+        self._db: JSONDatabase = JSONDatabase(Path(file_path), use_journal=True)
+        self._db.set_valid_keys([
+            Key("dir", primary=True),  # relative to root, posix separators
+            Key("mtime", type=KeyType.Integer),  # ns
+            Key("inode", type=KeyType.Integer),
+            Key("dirs", type=KeyType.List),
+            Key("files", type=KeyType.List),
+        ])
+        if Path(file_path).exists():
+            self._db.load(trusted=True)
+        else:
+            with open(file_path, "w") as _fp:
+                _fp.write("[]")
+        self.last_refresh: Optional[RefreshStats] = None
+
+    @classmethod
+    def movies(cls) -> "FileSystemIndex":
+        return cls._get_shared(SettingKeys.PATH_MOVIES, SettingKeys.PATH_MOVIE_FS_INDEX)
+
+    @classmethod
+    def tv(cls) -> "FileSystemIndex":
+        return cls._get_shared(SettingKeys.PATH_TV, SettingKeys.PATH_TV_FS_INDEX)
+
+    @classmethod
+    def _get_shared(cls, root_key: SettingKeys, index_key: SettingKeys) -> "FileSystemIndex":
+        """One index per media root and process, refreshed when first used"""
+        if root_key not in cls._shared:
+            _cfg = ConfigurationManager()
+            _index = cls(root=_cfg.path(root_key, convert_to_path=True, assert_path_exists=True),
+                         file_path=_cfg.path(index_key, convert_to_path=True))
+            _index.refresh()
+            cls._shared[root_key] = _index
+        return cls._shared[root_key]
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def refresh(self, force: bool = False) -> RefreshStats:
+        """Rescans directories with a changed mtime or inode (all directories if force), drops removed ones"""
+        _start = default_timer()
+        _stats = RefreshStats()
+        _visited = set()
+        _pending = [self.ROOT]
+        while _pending:
+            _dir = _pending.pop()
+            _stats.dirs_checked += 1
+            try:
+                _stat = os.stat(self._full_path(_dir))
+            except (FileNotFoundError, NotADirectoryError):
+                continue  # removed since last refresh, dropped below
+            _visited.add(_dir)
+            _entry = self._db.get_entry(_dir)
+            if force or _entry is None or _entry.get("mtime") != _stat.st_mtime_ns \
+                    or _entry.get("inode") != _stat.st_ino:
+                _sub_dirs = self._scan(_dir, _stat)
+                _stats.dirs_scanned += 1
+            else:
+                _sub_dirs = _entry.get("dirs")
+            _pending.extend(self._join(_dir, _name) for _name in _sub_dirs)
+        for _dir in [d for d in self._db if d not in _visited]:
+            self._db.remove(_dir)
+            _stats.dirs_removed += 1
+        self._db.save(create_backup=False)
+        _stats.elapsed = default_timer() - _start
+        self.last_refresh = _stats
+        self.log(f"refreshed {self._root}: {_stats}")
+        return _stats
+
+    def sub_dirs(self, rel_dir: Union[str, Path] = ROOT) -> List[Path]:
+        _entry = self._db.get_entry(self._rel(rel_dir))
+        if _entry is None:
+            return []
+        return [self._full_path(self._join(_entry.get("dir"), _name)) for _name in _entry.get("dirs")]
+
+    def files(self, rel_dir: Union[str, Path] = ROOT, recursive: bool = True,
+              extensions: Optional[Iterable[str]] = None) -> Generator[Path, None, None]:
+        """Yields full paths of files in rel_dir (and below if recursive), optionally only with given suffixes"""
+        _extensions = tuple(extensions) if extensions is not None else None
+        _pending = [self._rel(rel_dir)]
+        while _pending:
+            _dir = _pending.pop()
+            _entry = self._db.get_entry(_dir)
+            if _entry is None:
+                continue
+            for _name in _entry.get("files"):
+                if _extensions is None or _name.endswith(_extensions):
+                    yield self._full_path(self._join(_dir, _name))
+            if recursive:
+                _pending.extend(self._join(_dir, _name) for _name in _entry.get("dirs"))
+
+    def _scan(self, rel_dir: str, stat: os.stat_result) -> List[str]:
+        _dirs, _files = [], []
+        with os.scandir(self._full_path(rel_dir)) as _it:
+            for _item in _it:
+                if _item.is_dir():
+                    _dirs.append(_item.name)
+                else:
+                    _files.append(_item.name)
+        _dirs.sort()
+        _files.sort()
+        _data = dict(dir=rel_dir, mtime=stat.st_mtime_ns, inode=stat.st_ino, dirs=_dirs, files=_files)
+        if rel_dir in self._db:
+            self._db.update(rel_dir, **{k: v for k, v in _data.items() if k != "dir"})
+        else:
+            self._db.insert(**_data)
+        return _dirs
+
+    def _rel(self, rel_dir: Union[str, Path]) -> str:
+        if isinstance(rel_dir, Path):
+            rel_dir = rel_dir.relative_to(self._root).as_posix() if rel_dir.is_absolute() else rel_dir.as_posix()
+        return "" if rel_dir in (".", "/") else rel_dir.strip("/")
+
+    def _full_path(self, rel_dir: str) -> Path:
+        return self._root / rel_dir if rel_dir else self._root
+
+    @staticmethod
+    def _join(rel_dir: str, name: str) -> str:
+        return f"{rel_dir}/{name}" if rel_dir else name
+
+
+def main():
+    from argparse import ArgumentParser
+    parser = ArgumentParser("Filesystem index")
+    parser.add_argument("--force", action="store_true", help="rescan all directories")
+    args = parser.parse_args()
+    _cfg = ConfigurationManager()
+    _items: List[Tuple[SettingKeys, SettingKeys]] = [
+        (SettingKeys.PATH_MOVIES, SettingKeys.PATH_MOVIE_FS_INDEX),
+        (SettingKeys.PATH_TV, SettingKeys.PATH_TV_FS_INDEX),
+    ]
+    for _root_key, _index_key in _items:
+        _index = FileSystemIndex(root=_cfg.path(_root_key, convert_to_path=True, assert_path_exists=True),
+                                 file_path=_cfg.path(_index_key, convert_to_path=True),
+                                 verbose=True)
+        _index.refresh(force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Any, Iterable
+from dataclasses import dataclass, field
+from timeit import default_timer
+import hashlib
 import json
 from pathlib import Path
 from argparse import ArgumentParser
 
 from config import ConfigurationManager, SettingKeys
 from db.db_media import MediaType, MediaDatabase
+from db.database import Entry
 from printout import pfcs
 
 
@@ -25,36 +29,96 @@ def db_json_convert_old_format(source: Path, destination: Path, primary_key_name
     print(f"converted {source} -> {destination}")
 
 
-def compare_mongo_json_media_databases(media_type: Optional[MediaType] = None, sync: bool = False):
+@dataclass
+class DatabaseDiff:
+    """Primary key values of entries only in source (added), only in target (removed) or differing (changed)"""
+    added: List[Any] = field(default_factory=list)
+    removed: List[Any] = field(default_factory=list)
+    changed: List[Any] = field(default_factory=list)
+    unchanged: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(added=self.added, removed=self.removed, changed=self.changed, unchanged=self.unchanged)
+
+
+def entry_hash(data: Dict[str, Any]) -> str:
+    """Hash of the canonical (sorted keys, compact) JSON form of entry data"""
+    _canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(_canonical.encode("utf-8")).hexdigest()
+
+
+def diff_entries(source: Iterable[Dict], target: Iterable[Dict], primary_key: str) -> DatabaseDiff:
+    """Diffs two sets of entries in one pass over each side, compares entries by hash of their canonical form"""
+    _target_hashes: Dict[Any, str] = {_item[primary_key]: entry_hash(_item) for _item in target}
+    _diff = DatabaseDiff()
+    for _item in source:
+        _pk = _item[primary_key]
+        _hash = _target_hashes.pop(_pk, None)
+        if _hash is None:
+            _diff.added.append(_pk)
+        elif _hash != entry_hash(_item):
+            _diff.changed.append(_pk)
+        else:
+            _diff.unchanged += 1
+    _diff.removed = list(_target_hashes)
+    return _diff
+
+
+def compare_mongo_json_media_databases(media_type: Optional[MediaType] = None, sync: bool = False,
+                                       json_report: bool = False) -> Dict[str, Dict]:
+    """Diffs the JSON (source) and Mongo (target) databases, sync inserts/replaces entries in Mongo"""
     if media_type is None:
         _types = [mt for mt in MediaType]
     else:
         _types = [media_type]
+    _report = {}
     for media_type in _types:
-        print(f"running comparison on type: {media_type.name}")
+        if not json_report:
+            print(f"running comparison on type: {media_type.name}")
         _db_json = MediaDatabase.get_database(media_type, use_json_db=True)
         _db_mongo = MediaDatabase.get_database(media_type, use_json_db=False)
         if any([db is None for db in (_db_json, _db_mongo)]):
             print("could not get both json and mongo databases")
-            return
-        _keys = _db_json.get_keys()
-        for item in _db_json:
-            if item not in _db_mongo:
-                pfcs(f"o[{item}] -> not in mongo db!")
-                if sync:
-                    pfcs(f"inserting into mongo: i[{item}]")
-                    _entry_j = _db_json._db.get_entry(item)
-                    _db_mongo._db.insert_entry(_entry_j)
-            else:
-                _entry_j = _db_json._db.get_entry(item)
-                _entry_m = _db_mongo._db.get_entry(item)
-                if _entry_m == _entry_j:
-                    continue
-                pfcs(f"entries diff:\n  i[{_entry_j}] \nvs\n   o[{_entry_m}]")
-                if sync:
-                    pfcs(f"updating mongo: i[{item}]")
-                    _entry_j = _db_json._db.get_entry(item)
-                    _db_mongo._db.update_entry(_entry_j)
+            return _report
+        _pk = _db_json._db.primary_key.name
+        _start = default_timer()
+        _items_json: Dict[Any, Dict] = {_item[_pk]: _item for _item in _db_json._db.find()}
+        _items_mongo: List[Dict] = _db_mongo._db.find()
+        _elapsed_fetch = default_timer() - _start
+        _start = default_timer()
+        _diff = diff_entries(_items_json.values(), _items_mongo, primary_key=_pk)
+        _elapsed_diff = default_timer() - _start
+        _elapsed_sync = 0.0
+        _replaced = dict(matched=0, modified=0)
+        if sync:
+            _start = default_timer()
+            if _diff.added:
+                _db_mongo._db.insert_many([Entry(_items_json[_val]) for _val in _diff.added])
+            if _diff.changed:
+                # replace, not $set: keys only present in mongo would make the entries differ on every run
+                _replaced = _db_mongo._db.replace_many([Entry(_items_json[_val]) for _val in _diff.changed])
+            _elapsed_sync = default_timer() - _start
+        _report[media_type.name.lower()] = dict(
+            **_diff.to_dict(),
+            replaced=_replaced,
+            timing=dict(fetch=round(_elapsed_fetch, 3), diff=round(_elapsed_diff, 3), sync=round(_elapsed_sync, 3)))
+        if json_report:
+            continue
+        for _val in _diff.added:
+            pfcs(f"o[{_val}] -> not in mongo db!")
+        for _val in _diff.removed:
+            pfcs(f"o[{_val}] -> not in json db!")
+        for _val in _diff.changed:
+            pfcs(f"entries diff: i[{_val}]")
+        pfcs(f"added: i[{len(_diff.added)}] removed: i[{len(_diff.removed)}] "
+             f"changed: i[{len(_diff.changed)}] unchanged: i[{_diff.unchanged}]")
+        if sync:
+            pfcs(f"replaced: matched i[{_replaced['matched']}] modified i[{_replaced['modified']}]")
+        _synced = f" sync: {_elapsed_sync:.3f}s" if sync else ""
+        print(f"fetch: {_elapsed_fetch:.3f}s diff: {_elapsed_diff:.3f}s{_synced}")
+    if json_report:
+        print(json.dumps(_report, indent=2))
+    return _report
 
 
 def get_args():
@@ -67,6 +131,10 @@ def get_args():
                         type=str,
                         default=None,
                         choices=[mt.name.lower() for mt in MediaType])
+    parser.add_argument("--json",
+                        dest="json_report",
+                        action="store_true",
+                        help="print compare/sync result as a json report")
     return parser.parse_args()
 
 
@@ -78,8 +146,6 @@ def main():
             (SettingKeys.PATH_TVSHOW_DATABASE, "folder"),
             (SettingKeys.PATH_EPISODE_DATABASE, "filename"),
             (SettingKeys.PATH_EPISODE_DATABASE, "filename"),
-            (SettingKeys.PATH_TV_CACHE_DATABASE, "season_dir"),
-            (SettingKeys.PATH_MOVIE_CACHE_DATABASE, "letter_dir"),
         ]
 
         for setting_key, primary_key_name in _items:
@@ -88,9 +154,11 @@ def main():
             _destination = _source.with_name(f"CONVERTED_{_source.name}")
             db_json_convert_old_format(_source, _destination, primary_key_name=primary_key_name)
     elif args.command == "compare":
-        compare_mongo_json_media_databases(MediaType.from_string(args.media_type), sync=False)
+        compare_mongo_json_media_databases(MediaType.from_string(args.media_type), sync=False,
+                                           json_report=args.json_report)
     elif args.command == "sync":
-        compare_mongo_json_media_databases(MediaType.from_string(args.media_type), sync=True)
+        compare_mongo_json_media_databases(MediaType.from_string(args.media_type), sync=True,
+                                           json_report=args.json_report)
 
 
 if __name__ == "__main__":
@@ -9,6 +9,7 @@ from pathlib import Path
 
 import config
 import run
+import release
 import util
 import util_movie
 import util_tv
@@ -180,11 +181,12 @@ def extract_item(source_item_path):
     if not source_item_path:
         return
     name = source_item_path.name
-    if util_movie.is_movie(name):
+    _release = release.classify(name)
+    if _release.is_movie:
         process_movie(source_item_path)
-    elif util_tv.is_episode(name):
+    elif _release.is_episode:
         process_episode(source_item_path)
-    elif util_tv.is_season(name):
+    elif _release.is_season:
         if source_item_path.is_dir():
             pfcs(f"processing: i[{name}] as type b[season dir]")
             for item in source_item_path.iterdir():
@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from media.base import MediaItem
 from media.enums import Type, Language, MOVIE_EXTRAS
 from media.util import Util, MediaPaths
-from media.regex import matches_movie_regex, parse_year, parse_quality
+from media.regex import matches_movie_regex, parse_release_name
 
 
 @dataclass
@@ -18,9 +18,10 @@ class MovieData:
     def __post_init__(self):
         if self.name is None:
             return
-        _y = parse_year(self.name)
+        _rel = parse_release_name(self.name)
+        _y = _rel.year
         if _y is None:
-            _q = parse_quality(self.name)
+            _q = _rel.quality
             if _q is None:
                 return
             self._split_by(_q)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import json
+import sqlite3
+import time
+import urllib.parse
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Dict, Union, Any
+
+from config import ConfigurationManager, SettingKeys
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    expires: Optional[float] = None  # None: never expires
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires is None or self.expires > time.time()
+
+    @property
+    def can_revalidate(self) -> bool:
+        return self.etag is not None or self.last_modified is not None
+
+
+class HttpCache:
+    """
+    Persistent cache of HTTP response bodies keyed by URL, stored in a SQLite database.
+    Entries expire after a TTL, expired entries with an ETag or Last-Modified header can be revalidated.
+    The least recently used entries are evicted when the total size of the bodies exceeds max_bytes.
+    Credential query parameters (KEY_EXCLUDED_PARAMS) are removed from the URLs, they are never written to disk.
+    """
+    MAX_BYTES = 256 * 1024 * 1024
+    KEY_EXCLUDED_PARAMS = ("apikey",)
+    _STATS = ("hits", "misses", "stale", "revalidated", "stores", "evictions")
+    _default: Optional["HttpCache"] = None
+    _default_lock: Lock = Lock()
+
+    def __init__(self, file_path: Union[Path, str], max_bytes: Optional[int] = None):
+        self._path: Path = Path(file_path)
+        self._max_bytes: int = max_bytes or self.MAX_BYTES
+        self._lock: Lock = Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(str(file_path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY NOT NULL, body BLOB, "
+                               "etag TEXT, last_modified TEXT, expires REAL, accessed REAL, size INTEGER)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY NOT NULL, value INTEGER)")
+            for _param in self.KEY_EXCLUDED_PARAMS:  # stored by earlier versions
+                self._conn.execute("DELETE FROM responses WHERE url LIKE ?", (f"%{_param}=%",))
+
+    @classmethod
+    def default(cls) -> Optional["HttpCache"]:
+        """Cache shared by the online search clients, None if no cache path is configured"""
+        with cls._default_lock:
+            if cls._default is None:
+                _path = ConfigurationManager().path(SettingKeys.PATH_HTTP_CACHE, convert_to_path=False)
+                if not _path:
+                    return None
+                cls._default = cls(_path)
+            return cls._default
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @classmethod
+    def key(cls, url: str) -> str:
+        """url without the KEY_EXCLUDED_PARAMS query parameters"""
+        _parts = urllib.parse.urlsplit(url)
+        if not _parts.query:
+            return url
+        _query = [(_name, _val) for _name, _val in urllib.parse.parse_qsl(_parts.query, keep_blank_values=True)
+                  if _name.lower() not in cls.KEY_EXCLUDED_PARAMS]
+        return urllib.parse.urlunsplit(_parts._replace(query=urllib.parse.urlencode(_query)))
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Returns the cached response (fresh or stale) of url, counts a hit if it is fresh"""
+        url = self.key(url)
+        with self._lock, self._conn:
+            _row = self._conn.execute("SELECT body, etag, last_modified, expires FROM responses WHERE url = ?",
+                                      (url,)).fetchone()
+            if _row is None:
+                self._count("misses")
+                return None
+            _ret = CachedResponse(*_row)
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url))
+            self._count("hits" if _ret.fresh else "stale")
+            return _ret
+
+    def put(self, url: str, body: Union[bytes, str, Dict, list], ttl: Optional[float] = None,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Stores body for url, ttl in seconds (None: never expires). str/dict/list bodies are stored as JSON"""
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        url = self.key(url)
+        _now = time.time()
+        _expires = _now + ttl if ttl is not None else None
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (url, body, etag, last_modified, _expires, _now, len(body)))
+            self._count("stores")
+            self._evict()
+
+    def preload(self, url: str, body: Union[bytes, str, Dict, list]) -> None:
+        """Stores a response that never expires, e.g. test fixtures"""
+        self.put(url, body, ttl=None)
+
+    def revalidated(self, url: str, ttl: Optional[float] = None) -> None:
+        """Server reported the cached response of url as not modified, extends its expiry"""
+        url = self.key(url)
+        _expires = time.time() + ttl if ttl is not None else None
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET expires = ? WHERE url = ?", (_expires, url))
+            self._count("revalidated")
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM stats")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            _entries, _bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            _ret = {_name: 0 for _name in self._STATS}
+            _ret.update(dict(self._conn.execute("SELECT name, value FROM stats")))
+        _lookups = _ret["hits"] + _ret["misses"] + _ret["stale"]
+        _ret.update(entries=_entries, bytes=_bytes, max_bytes=self._max_bytes,
+                    hit_rate=round(_ret["hits"] / _lookups, 3) if _lookups else 0.0)
+        return _ret
+
+    def _count(self, name: str, value: int = 1) -> None:
+        self._conn.execute("INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                           (name, value, value))
+
+    def _evict(self) -> None:
+        _total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if _total <= self._max_bytes:
+            return
+        _evicted = 0
+        for _url, _size in self._conn.execute("SELECT url, size FROM responses ORDER BY accessed").fetchall():
+            if _total <= self._max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (_url,))
+            _total -= _size
+            _evicted += 1
+        self._count("evictions", _evicted)
+
+
+def print_cache_stats(cache: Optional[HttpCache] = None) -> None:
+    cache = cache or HttpCache.default()
+    if cache is None:
+        print("http cache is not configured")
+        return
+    print(f"http cache: {cache.path}")
+    for _name, _value in cache.stats().items():
+        print(f"  {_name}: {_value}")
+
+
+def main():
+    from argparse import ArgumentParser
+    parser = ArgumentParser("HTTP response cache")
+    parser.add_argument("--clear", action="store_true", help="remove all cached responses")
+    args = parser.parse_args()
+    _cache = HttpCache.default()
+    if _cache is not None and args.clear:
+        _cache.clear()
+    print_cache_stats(_cache)
+
+
+if __name__ == "__main__":
+    main()
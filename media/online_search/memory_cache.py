@@ -0,0 +1,88 @@
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional, Callable, Dict, Hashable
+
+
+def approx_size(value: Any) -> int:
+    """Approximate size (bytes) of a search result or parsed JSON value, as its serialized JSON length"""
+    if isinstance(value, list):
+        return sum(approx_size(v) for v in value) + 2
+    _raw = getattr(value, "_raw", value)  # SearchResult
+    try:
+        return len(json.dumps(_raw, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+class LRUCache:
+    """
+    In-memory mapping limited to max_entries items and (optionally) max_bytes total size,
+    the least recently used items are evicted first. Thread safe.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None,
+                 size_func: Callable[[Any], int] = approx_size):
+        self._max_entries: int = max_entries
+        self._max_bytes: Optional[int] = max_bytes
+        self._size_func: Callable[[Any], int] = size_func
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes: int = 0
+        self._lock: Lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+
+    def __getitem__(self, key: Hashable) -> Any:
+        _missing = object()
+        _val = self.get(key, _missing)
+        if _val is _missing:
+            raise KeyError(key)
+        return _val
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        _size = self._size_func(value) if self._max_bytes is not None else 0
+        with self._lock:
+            if key in self._items:
+                self._bytes -= self._sizes.pop(key)
+                del self._items[key]
+            self._items[key] = value
+            self._sizes[key] = _size
+            self._bytes += _size
+            self._evict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        _lookups = self.hits + self.misses
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions, entries=len(self._items),
+                    bytes=self._bytes, max_entries=self._max_entries, max_bytes=self._max_bytes,
+                    hit_rate=round(self.hits / _lookups, 3) if _lookups else 0.0)
+
+    def _evict(self) -> None:
+        while len(self._items) > self._max_entries or \
+                (self._max_bytes is not None and self._bytes > self._max_bytes and len(self._items) > 1):
+            _key, _ = self._items.popitem(last=False)
+            self._bytes -= self._sizes.pop(_key)
+            self.evictions += 1
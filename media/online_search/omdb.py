@@ -1,10 +1,8 @@
 #!/usr/bin/env python3
 
-from typing import Dict, Optional, Union
+from typing import Dict, Optional, Union, Any
 import json
 import urllib.parse
-import urllib.request
-from http.client import HTTPResponse
 from argparse import ArgumentParser
 
 from base_log import BaseLog
@@ -12,6 +10,11 @@ from config import ConfigurationManager, SettingKeys
 from media.movie import MovieData
 from media.imdb_id import IMDBId
 from media.online_search.result import SearchResult
+from media.online_search.rate_limit import TokenBucket
+from media.online_search.scheduler import RequestScheduler
+from media.online_search.http_cache import HttpCache
+from media.online_search.memory_cache import LRUCache
+from media.online_search.transport import HttpTransport
 
 MovieSearchQuery = Union[MovieData, IMDBId]
 
@@ -62,10 +65,18 @@ class OMDbMovieSearchResult(SearchResult):
 
 class OMDb(BaseLog):
     URL = "http://www.omdbapi.com"
-    _results: Dict[str, OMDbMovieSearchResult] = {}
-
-    def __init__(self, verbose=False):
+    _scheduler: RequestScheduler = RequestScheduler(TokenBucket(rate=10.0, capacity=10))  # 10 calls per second
+    CACHE_TTL = 7 * 24 * 60 * 60
+    MEMORY_CACHE_ENTRIES = 2048
+    MEMORY_CACHE_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, verbose=False, http_cache: Optional[HttpCache] = None,
+                 cache_max_entries: int = MEMORY_CACHE_ENTRIES, cache_max_bytes: Optional[int] = MEMORY_CACHE_BYTES,
+                 transport: Optional[HttpTransport] = None):
         BaseLog.__init__(self, verbose=verbose)
+        self._http_cache: Optional[HttpCache] = http_cache or HttpCache.default()
+        self._transport: Optional[HttpTransport] = transport  # None: shared default transport
+        self._results: LRUCache = LRUCache(max_entries=cache_max_entries, max_bytes=cache_max_bytes)
         self.set_log_prefix("OMDb")
         self._api_key: Optional[str] = ConfigurationManager().get(SettingKeys.API_KEY_OMDB, assert_exists=True)
         self.log("init")
@@ -74,14 +85,28 @@ class OMDb(BaseLog):
     def valid(self):
         return self._api_key is not None
 
+    def memory_cache_stats(self) -> Dict[str, Any]:
+        return self._results.stats()
+
+    @classmethod
+    def scheduler(cls) -> RequestScheduler:
+        """Request scheduler shared by all instances"""
+        return cls._scheduler
+
     def _search(self, url):
         self.log_fs(f"searching... url: i[{url}]")
-        _resp: HTTPResponse = urllib.request.urlopen(url, timeout=4)
-        if _resp.getcode() != 200:
-            raise ConnectionError(f"got response code: {_resp.status}")
-        _res = _resp.read().decode("utf-8")
+        _res = self._scheduler.fetch(url, cache=self._http_cache, ttl=self.CACHE_TTL,
+                                     transport=self._transport, cacheable=self._cacheable).decode("utf-8")
         return json.loads(_res)
 
+    @staticmethod
+    def _cacheable(body: bytes) -> bool:
+        """OMDb errors (invalid key, request limit, not found) are sent with status 200, Response set to False"""
+        try:
+            return json.loads(body).get("Response", None) != "False"
+        except (ValueError, AttributeError):
+            return False
+
     def _args(self) -> Dict[str, str]:
         return {"apikey": self._api_key, "type": "movie"}
 
@@ -119,7 +144,8 @@ class OMDb(BaseLog):
         if _existing is not None:
             return _existing
         _ret = OMDbMovieSearchResult(self._search(url))
-        self._results[url] = _ret
+        if _ret.valid:
+            self._results[url] = _ret
         return _ret
 
 
@@ -0,0 +1,28 @@
+from threading import Lock
+from time import monotonic, sleep
+
+
+class TokenBucket:
+    """Allows bursts of up to capacity requests, refilled at rate requests per second, shared between threads"""
+
+    def __init__(self, rate: float, capacity: int):
+        self._rate: float = rate
+        self._capacity: int = capacity
+        self._tokens: float = float(capacity)
+        self._updated: float = monotonic()
+        self._lock: Lock = Lock()
+
+    def wait(self) -> float:
+        """Blocks until a token is available, returns the time waited (seconds)"""
+        _waited = 0.0
+        while True:
+            with self._lock:
+                _now = monotonic()
+                self._tokens = min(self._capacity, self._tokens + (_now - self._updated) * self._rate)
+                self._updated = _now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return _waited
+                _delay = (1.0 - self._tokens) / self._rate
+            sleep(_delay)
+            _waited += _delay
@@ -0,0 +1,45 @@
+from typing import Optional, Callable
+
+from media.online_search.http_cache import HttpCache
+from media.online_search.rate_limit import TokenBucket
+from media.online_search.transport import HttpTransport, default_transport
+
+
+class HttpStatusError(ConnectionError):
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        ConnectionError.__init__(self, f"got response code: {status}")
+        self.status: int = status
+        self.retry_after: Optional[float] = retry_after  # seconds, from the Retry-After header
+
+
+def fetch(url: str, cache: Optional[HttpCache] = None, ttl: Optional[float] = None,
+          rate_limit: Optional[TokenBucket] = None,
+          transport: Optional[HttpTransport] = None,
+          cacheable: Optional[Callable[[bytes], bool]] = None) -> bytes:
+    """
+    GET url and return the response body. Fresh cached responses are returned without any network I/O,
+    stale ones are revalidated using ETag/Last-Modified if the server sent those.
+    Requests are sent using transport, or the shared default transport.
+    Response bodies for which cacheable returns False (e.g. API errors sent with status 200) are not cached.
+    """
+    _cached = cache.get(url) if cache is not None else None
+    if _cached is not None and _cached.fresh:
+        return _cached.body
+    _headers = {}
+    if _cached is not None and _cached.can_revalidate:
+        if _cached.etag:
+            _headers["If-None-Match"] = _cached.etag
+        if _cached.last_modified:
+            _headers["If-Modified-Since"] = _cached.last_modified
+    if rate_limit is not None:
+        rate_limit.wait()
+    _resp = (transport or default_transport()).get(url, headers=_headers)
+    if _resp.status == 304 and _cached is not None:
+        cache.revalidated(url, ttl)
+        return _cached.body
+    if _resp.status != 200:
+        _retry_after = _resp.header("Retry-After")
+        raise HttpStatusError(_resp.status, float(_retry_after) if _retry_after and _retry_after.isdigit() else None)
+    if cache is not None and (cacheable is None or cacheable(_resp.body)):
+        cache.put(url, _resp.body, ttl=ttl, etag=_resp.header("ETag"), last_modified=_resp.header("Last-Modified"))
+    return _resp.body
@@ -0,0 +1,113 @@
+import http.client
+import random
+from concurrent.futures import Future
+from contextlib import contextmanager
+from threading import Lock, Condition
+from time import sleep
+from typing import Optional, Dict, Any, Generator, Callable
+
+from media.online_search.http_cache import HttpCache
+from media.online_search.rate_limit import TokenBucket
+from media.online_search.request import fetch, HttpStatusError
+from media.online_search.transport import HttpTransport
+
+
+class RequestScheduler:
+    """
+    Sends the requests of one API: rate limited, at most max_concurrent at a time, identical urls requested
+    concurrently are sent once. Rate limited (429), server errors (5xx) and network errors are retried
+    with exponential backoff.
+    """
+    MAX_CONCURRENT = 4
+    MAX_RETRIES = 5
+    BACKOFF_BASE = 0.5  # seconds, doubled for each retry
+    BACKOFF_MAX = 30.0
+
+    def __init__(self, rate_limit: Optional[TokenBucket] = None,
+                 max_concurrent: int = MAX_CONCURRENT, max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE, backoff_max: float = BACKOFF_MAX):
+        self._rate_limit: Optional[TokenBucket] = rate_limit
+        self._max_concurrent: int = max(1, max_concurrent)
+        self._max_retries: int = max_retries
+        self._backoff_base: float = backoff_base
+        self._backoff_max: float = backoff_max
+        self._active: int = 0
+        self._slots: Condition = Condition()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock: Lock = Lock()
+        self._stats: Dict[str, int] = dict(requests=0, deduplicated=0, retries=0, failures=0)
+
+    def set_max_concurrent(self, value: int) -> None:
+        with self._slots:
+            self._max_concurrent = max(1, value)
+            self._slots.notify_all()
+
+    def fetch(self, url: str, cache: Optional[HttpCache] = None, ttl: Optional[float] = None,
+              transport: Optional[HttpTransport] = None, cacheable: Optional[Callable[[bytes], bool]] = None) -> bytes:
+        """Same as request.fetch, waits for the result of an identical request that is already in flight"""
+        with self._lock:
+            self._stats["requests"] += 1
+            _future = self._in_flight.get(url, None)
+            _leader = _future is None
+            if _leader:
+                _future = Future()
+                self._in_flight[url] = _future
+            else:
+                self._stats["deduplicated"] += 1
+        if not _leader:
+            return _future.result()
+        try:
+            _body = self._fetch_with_retries(url, cache, ttl, transport, cacheable)
+        except BaseException as error:
+            _future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[url]
+        _future.set_result(_body)
+        return _body
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, max_concurrent=self._max_concurrent)
+
+    def _fetch_with_retries(self, url: str, cache: Optional[HttpCache], ttl: Optional[float],
+                            transport: Optional[HttpTransport],
+                            cacheable: Optional[Callable[[bytes], bool]] = None) -> bytes:
+        _attempt = 0
+        while True:
+            try:
+                with self._slot():
+                    return fetch(url, cache=cache, ttl=ttl, rate_limit=self._rate_limit, transport=transport,
+                                 cacheable=cacheable)
+            except (OSError, http.client.HTTPException) as error:
+                if _attempt >= self._max_retries or not self._retryable(error):
+                    with self._lock:
+                        self._stats["failures"] += 1
+                    raise
+                _delay = min(self._backoff_max, self._backoff_base * 2 ** _attempt) * random.uniform(0.5, 1.0)
+                if isinstance(error, HttpStatusError) and error.retry_after is not None:
+                    _delay = max(_delay, min(self._backoff_max, error.retry_after))
+                with self._lock:
+                    self._stats["retries"] += 1
+                _attempt += 1
+            sleep(_delay)
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        if isinstance(error, HttpStatusError):
+            return error.status == 429 or error.status >= 500
+        return True  # timeouts, connection reset/refused
+
+    @contextmanager
+    def _slot(self) -> Generator[None, None, None]:
+        with self._slots:
+            while self._active >= self._max_concurrent:
+                self._slots.wait()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._slots:
+                self._active -= 1
+                self._slots.notify()
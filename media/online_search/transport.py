@@ -0,0 +1,214 @@
+import gzip
+import http.client
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Lock
+from timeit import default_timer
+from typing import Dict, Optional, List, Tuple, Deque, Any
+
+TIMEOUT = 4
+USER_AGENT = "media-scanner"
+
+_ConnectionKey = Tuple[str, str, Optional[int]]  # scheme, host, port
+
+
+@dataclass
+class TransportResponse:
+    status: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)  # lower case names
+
+    def header(self, name: str) -> Optional[str]:
+        return self.headers.get(name.lower(), None)
+
+
+class HttpTransport:
+    """Sends GET requests, records the latency of each request"""
+    LATENCY_SAMPLES = 1000
+
+    def __init__(self, timeout: float = TIMEOUT):
+        self._timeout: float = timeout
+        self._stats_lock: Lock = Lock()
+        self._latencies: Deque[Tuple[str, float]] = deque(maxlen=self.LATENCY_SAMPLES)
+        self._requests: int = 0
+        self._errors: int = 0
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> TransportResponse:
+        _start = default_timer()
+        try:
+            return self._get(url, headers or {})
+        except Exception:
+            with self._stats_lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self._requests += 1
+                self._latencies.append((url, default_timer() - _start))
+
+    def latencies(self) -> List[Tuple[str, float]]:
+        """Most recent (url, seconds) samples"""
+        with self._stats_lock:
+            return list(self._latencies)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            _times = sorted(_t for _, _t in self._latencies)
+            _ret: Dict[str, Any] = dict(requests=self._requests, errors=self._errors)
+        if _times:
+            _ret.update(latency_mean=sum(_times) / len(_times),
+                        latency_p50=_times[len(_times) // 2],
+                        latency_p95=_times[min(len(_times) - 1, int(len(_times) * 0.95))],
+                        latency_max=_times[-1])
+        return _ret
+
+    def close(self) -> None:
+        pass
+
+    def _get(self, url: str, headers: Dict[str, str]) -> TransportResponse:
+        raise NotImplementedError
+
+
+class UrllibTransport(HttpTransport):
+    """One connection per request using urllib.request.urlopen"""
+
+    def _get(self, url: str, headers: Dict[str, str]) -> TransportResponse:
+        _request = urllib.request.Request(url, headers=headers) if headers else url
+        try:
+            _resp = urllib.request.urlopen(_request, timeout=self._timeout)
+        except urllib.error.HTTPError as error:
+            return TransportResponse(error.code, b"", _header_dict(error.headers))
+        return TransportResponse(_resp.getcode(), _resp.read(), _header_dict(_resp.headers))
+
+
+class PooledTransport(HttpTransport):
+    """
+    Keeps idle HTTP/1.1 connections per host open for reuse, requests and decodes gzip compressed responses,
+    follows redirects (as urlopen does). A connection is used by one request at a time, so the transport
+    can be shared between threads.
+    """
+    MAX_IDLE_PER_HOST = 8
+    MAX_REDIRECTS = 5
+    _REDIRECT_STATUS = (301, 302, 303, 307, 308)
+
+    def __init__(self, timeout: float = TIMEOUT, max_idle_per_host: int = MAX_IDLE_PER_HOST):
+        HttpTransport.__init__(self, timeout=timeout)
+        self._max_idle: int = max_idle_per_host
+        self._idle: Dict[_ConnectionKey, List[http.client.HTTPConnection]] = {}
+        self._lock: Lock = Lock()
+        self._opened: int = 0
+        self._reused: int = 0
+
+    def stats(self) -> Dict[str, Any]:
+        _ret = HttpTransport.stats(self)
+        _ret.update(connections_opened=self._opened, connections_reused=self._reused)
+        return _ret
+
+    def close(self) -> None:
+        with self._lock:
+            for _conns in self._idle.values():
+                for _conn in _conns:
+                    _conn.close()
+            self._idle.clear()
+
+    def _get(self, url: str, headers: Dict[str, str]) -> TransportResponse:
+        _resp = self._get_once(url, headers)
+        for _ in range(self.MAX_REDIRECTS):
+            _location = _resp.header("Location")
+            if _resp.status not in self._REDIRECT_STATUS or not _location:
+                break
+            # connections are pooled per scheme, host and port, a redirect to another host uses its own pool
+            url = urllib.parse.urljoin(url, _location)
+            _resp = self._get_once(url, headers)
+        return _resp
+
+    def _get_once(self, url: str, headers: Dict[str, str]) -> TransportResponse:
+        _parts = urllib.parse.urlsplit(url)
+        _key: _ConnectionKey = (_parts.scheme, _parts.hostname, _parts.port)
+        _path = (_parts.path or "/") + (f"?{_parts.query}" if _parts.query else "")
+        _headers = {"Accept-Encoding": "gzip", "User-Agent": USER_AGENT, **headers}
+        _conn, _reused = self._acquire(_key)
+        try:
+            _resp, _body = self._request(_conn, _path, _headers)
+        except (http.client.HTTPException, ConnectionError):
+            _conn.close()
+            if not _reused:
+                raise
+            # server closed the idle connection, retry once on a new one
+            _conn, _ = self._acquire(_key, reuse=False)
+            try:
+                _resp, _body = self._request(_conn, _path, _headers)
+            except Exception:
+                _conn.close()
+                raise
+        except Exception:
+            _conn.close()
+            raise
+        if _resp.will_close:
+            _conn.close()
+        else:
+            self._release(_key, _conn)
+        if (_resp.getheader("Content-Encoding") or "").lower() == "gzip":
+            _body = gzip.decompress(_body)
+        return TransportResponse(_resp.status, _body, _header_dict(_resp.headers))
+
+    @staticmethod
+    def _request(conn: http.client.HTTPConnection, path: str, headers: Dict[str, str]) -> \
+            Tuple[http.client.HTTPResponse, bytes]:
+        conn.request("GET", path, headers=headers)
+        _resp = conn.getresponse()
+        return _resp, _resp.read()
+
+    def _acquire(self, key: _ConnectionKey, reuse: bool = True) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            _conns = self._idle.get(key, None)
+            if reuse and _conns:
+                self._reused += 1
+                return _conns.pop(), True
+            self._opened += 1
+        _scheme, _host, _port = key
+        if _scheme == "https":
+            return http.client.HTTPSConnection(_host, _port, timeout=self._timeout), False
+        return http.client.HTTPConnection(_host, _port, timeout=self._timeout), False
+
+    def _release(self, key: _ConnectionKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            _conns = self._idle.setdefault(key, [])
+            if len(_conns) < self._max_idle:
+                _conns.append(conn)
+                return
+        conn.close()
+
+
+def _header_dict(headers: Any) -> Dict[str, str]:
+    if headers is None:
+        return {}
+    try:
+        return {_name.lower(): _val for _name, _val in headers.items() if isinstance(_val, str)}
+    except (AttributeError, TypeError, ValueError):
+        return {}
+
+
+_default_transport: Optional[HttpTransport] = None
+_default_lock: Lock = Lock()
+
+
+def default_transport() -> HttpTransport:
+    """Transport shared by the online search clients"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = PooledTransport()
+        return _default_transport
+
+
+def set_default_transport(transport: Optional[HttpTransport]) -> None:
+    """Replaces the shared transport, None: a new PooledTransport is created when needed"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is not None and _default_transport is not transport:
+            _default_transport.close()
+        _default_transport = transport
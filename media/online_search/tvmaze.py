@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
 
-from typing import Dict, Optional, Union, List, Any
+from typing import Dict, Optional, Union, List, Any, Tuple, Iterable
 import json
 import urllib.parse
-import urllib.request
-from http.client import HTTPResponse
 from datetime import datetime
 
 from argparse import ArgumentParser
 
 from base_log import BaseLog
 from media.online_search.result import SearchResult
+from media.online_search.rate_limit import TokenBucket
+from media.online_search.scheduler import RequestScheduler
+from media.online_search.request import HttpStatusError
+from media.online_search.tvmaze_index import TvMazeShowIndex
+from media.online_search.http_cache import HttpCache
+from media.online_search.memory_cache import LRUCache
+from media.online_search.transport import HttpTransport
 from media.show import ShowData
 from media.episode import EpisodeData
 from media.imdb_id import IMDBId
@@ -19,6 +24,7 @@ from media.enums import Type as MediaType
 
 EpisodeSearchQuery = Union[ShowData, IMDBId, TvMazeId, EpisodeData, str]
 ShowSearchQuery = Union[ShowData, IMDBId, TvMazeId, str]
+EpisodeNumber = Tuple[int, int]  # season, episode
 
 
 class TvMazeShowSearchResult(SearchResult):
@@ -107,25 +113,82 @@ class TvMazeEpisodeSearchResult(SearchResult):
                f"episode={self.episode}, id={self.id}, year={self.year})"
 
 
+class TvMazeEpisodeList(list):
+    """Episode search results of a show, indexed by (season, episode) number"""
+
+    def __init__(self, results: Iterable[TvMazeEpisodeSearchResult]):
+        list.__init__(self, results)
+        self._by_number: Dict[EpisodeNumber, TvMazeEpisodeSearchResult] = {}
+        for _result in self:
+            self._by_number.setdefault((_result.season, _result.episode), _result)
+
+    def get(self, season_num: int, episode_num: int) -> Optional[TvMazeEpisodeSearchResult]:
+        return self._by_number.get((season_num, episode_num), None)
+
+
 class TvMaze(BaseLog):
     URL = "http://api.tvmaze.com"
-    _results: Dict[str, Union[TvMazeShowSearchResult, TvMazeEpisodeSearchResult, List]] = {}
-    _cached_ep_list: Dict[str, List[TvMazeEpisodeSearchResult]] = {}
-
-    def __init__(self, verbose=False, use_cache: bool = True):
+    # api allows (at least) 20 calls per 10 seconds, 429 responses are retried by the scheduler
+    _scheduler: RequestScheduler = RequestScheduler(TokenBucket(rate=2.0, capacity=20))
+    CACHE_TTL = 24 * 60 * 60
+    MEMORY_CACHE_ENTRIES = 4096
+    MEMORY_CACHE_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, verbose=False, use_cache: bool = True, http_cache: Optional[HttpCache] = None,
+                 cache_max_entries: int = MEMORY_CACHE_ENTRIES, cache_max_bytes: Optional[int] = MEMORY_CACHE_BYTES,
+                 transport: Optional[HttpTransport] = None, show_index: Optional[TvMazeShowIndex] = None):
         BaseLog.__init__(self, verbose=verbose)
         self._use_cache = use_cache
+        self._http_cache: Optional[HttpCache] = (http_cache or HttpCache.default()) if use_cache else None
+        self._show_index: Optional[TvMazeShowIndex] = (show_index or TvMazeShowIndex.default()) if use_cache else None
+        # search results and episode lists by url
+        self._transport: Optional[HttpTransport] = transport  # None: shared default transport
+        self._results: LRUCache = LRUCache(max_entries=cache_max_entries, max_bytes=cache_max_bytes)
         self.set_log_prefix("TVMaze")
         self.log("init")
 
+    def memory_cache_stats(self) -> Dict[str, Any]:
+        return self._results.stats()
+
+    @classmethod
+    def scheduler(cls) -> RequestScheduler:
+        """Request scheduler shared by all instances"""
+        return cls._scheduler
+
     def _search(self, url) -> Any:
         self.log_fs(f"searching... url: i[{url}]")
-        _resp: HTTPResponse = urllib.request.urlopen(url, timeout=4)
-        if _resp.getcode() != 200:
-            raise ConnectionError(f"got response code: {_resp.status}")
-        _res = _resp.read().decode("utf-8")
+        _res = self._scheduler.fetch(url, cache=self._http_cache, ttl=self.CACHE_TTL,
+                                     transport=self._transport).decode("utf-8")
         return json.loads(_res)
 
+    def show_index_page(self, page: int) -> Optional[List[Dict]]:
+        """Page of the show index, None past the last page"""
+        _url = f"{self.URL}/shows?page={page}"
+        self.log_fs(f"downloading... url: i[{_url}]")
+        try:
+            _res = self._scheduler.fetch(_url, transport=self._transport)
+        except HttpStatusError as error:
+            if error.status == 404:
+                return None
+            raise
+        return json.loads(_res.decode("utf-8"))
+
+    def _search_show_index(self, data: ShowSearchQuery) -> Optional[TvMazeShowSearchResult]:
+        if self._show_index is None:
+            return None
+        if isinstance(data, IMDBId):
+            _show = self._show_index.find_imdb(data)
+        elif isinstance(data, ShowData) and data.title:
+            _show = self._show_index.find(data.title, data.year)
+        elif isinstance(data, str):
+            _show = self._show_index.find(data)
+        else:
+            return None
+        if _show is None:
+            return None
+        self.log_fs(f"found in show index: i[{_show['name']}]")
+        return TvMazeShowSearchResult(_show)
+
     def _url_from_imdb(self, imdb_id: IMDBId) -> Optional[str]:
         if not imdb_id.valid():
             self.error("IMDbId invalid, cannot build search request")
@@ -151,6 +214,9 @@ class TvMaze(BaseLog):
         if not data:
             self.error("search requires either ShowData or IMDBId to be set")
             return None
+        _indexed = self._search_show_index(data)
+        if _indexed is not None:
+            return _indexed
         if isinstance(data, IMDBId):
             url = self._url_from_imdb(data)
         elif isinstance(data, ShowData):
@@ -170,41 +236,42 @@ class TvMaze(BaseLog):
             if _existing is not None:
                 return _existing
         _ret = TvMazeShowSearchResult(self._search(url))
-        self._results[url] = _ret
+        if self._use_cache:
+            self._results[url] = _ret
         return _ret
 
-    def episode_search_list_all(self, show_data: ShowSearchQuery) -> List[TvMazeEpisodeSearchResult]:
+    def episode_search_list_all(self, show_data: ShowSearchQuery) -> TvMazeEpisodeList:
         _show_result = self.show_search(show_data)
         if _show_result is None:
-            return []
-        if self._use_cache and str(_show_result.id) in self._cached_ep_list:
-            return self._cached_ep_list[str(_show_result.id)]
-        _ret = []
+            return TvMazeEpisodeList([])
         _url = f"{self._url_from_show_mazeid(_show_result.id)}/episodes"
-        if _url not in self._results:
-            _res = self._search(_url)
-            if not isinstance(_res, list):
-                raise TypeError("got invalid type in search response")
-            self._results[_url] = _res
-        else:
-            _res = self._results[_url]
+        if self._use_cache:
+            _existing = self._results.get(_url, None)
+            if _existing is not None:
+                return _existing
+        _res = self._search(_url)
+        if not isinstance(_res, list):
+            raise TypeError("got invalid type in search response")
+        _results = []
         for _data in _res:
             _ep_url = _data.get("_links", {}).get("self", {}).get("href", None)
             if _ep_url is None:
                 raise TypeError(f"could not get url from show list data: {_data}")
-            _search_result = TvMazeEpisodeSearchResult(_data)
-            _ret.append(_search_result)
-            self._results[_ep_url] = _search_result
+            _results.append(TvMazeEpisodeSearchResult(_data))
+        _ret = TvMazeEpisodeList(_results)
         if self._use_cache:
-            self._cached_ep_list[str(_show_result.id)] = _ret
+            self._results[_url] = _ret
         return _ret
 
     def _ep_from_show_search(self, show_data: ShowSearchQuery, episode_num: int, season_num: int) -> \
             Optional[TvMazeEpisodeSearchResult]:
-        for _ep in self.episode_search_list_all(show_data):
-            if _ep.season == season_num and _ep.episode == episode_num:
-                return _ep
-        return None
+        return self.episode_search_list_all(show_data).get(season_num, episode_num)
+
+    def episode_search_many(self, show_data: ShowSearchQuery, numbers: Iterable[EpisodeNumber]) -> \
+            List[Optional[TvMazeEpisodeSearchResult]]:
+        """Searches several episodes, given as (season, episode) numbers, of a show with one episode list lookup"""
+        _episodes = self.episode_search_list_all(show_data)
+        return [_episodes.get(_season, _episode) for _season, _episode in numbers]
 
     def episode_search(self, data: EpisodeSearchQuery, episode_num: Optional[int] = None,
                        season_num: Optional[int] = None) -> Optional[TvMazeEpisodeSearchResult]:
@@ -213,7 +280,14 @@ class TvMaze(BaseLog):
             _url = self._url_from_show_mazeid(data)
             if _url is None:
                 raise TypeError(f"could not get url from maze id: {data}")
-            return TvMazeEpisodeSearchResult(self._search(_url))
+            if self._use_cache:
+                _existing = self._results.get(_url, None)
+                if _existing is not None:
+                    return _existing
+            _ret = TvMazeEpisodeSearchResult(self._search(_url))
+            if self._use_cache:
+                self._results[_url] = _ret
+            return _ret
         if isinstance(data, str):
             if episode_num is None or season_num is None:
                 raise TypeError("episode_num or season_num missing")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import gzip
+import json
+import re
+import time
+import unicodedata
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Dict, List, Any, Union, TYPE_CHECKING
+
+from base_log import BaseLog
+from config import ConfigurationManager, SettingKeys
+from media.imdb_id import IMDBId
+
+if TYPE_CHECKING:
+    from media.online_search.tvmaze import TvMaze
+
+# id, name, premiered, imdb id, weight, genres
+ShowRow = List[Any]
+
+_RE_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(title: str) -> str:
+    """Lower case ascii words, "&" as "and", without a leading "the" """
+    _title = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode("ascii").lower()
+    _title = _RE_NON_ALNUM.sub(" ", _title.replace("&", " and ")).strip()
+    if _title.startswith("the "):
+        _title = _title[4:]
+    return _title
+
+
+class TvMazeShowIndex(BaseLog):
+    """
+    Local copy of the TvMaze show index (/shows?page=N, 250 shows per page), a few fields per show,
+    stored as gzip compressed JSON. Shows are looked up by normalized title or IMDb id without network requests.
+    """
+    PAGE_SIZE = 250
+    _default: Optional["TvMazeShowIndex"] = None
+    _default_lock: Lock = Lock()
+
+    def __init__(self, file_path: Union[Path, str], verbose: bool = False):
+        BaseLog.__init__(self, verbose=verbose)
+        self.set_log_prefix("TVMAZE_INDEX")
+        self._path: Path = Path(file_path)
+        self._rows: Dict[int, ShowRow] = {}
+        self._by_title: Dict[str, List[ShowRow]] = {}
+        self._by_imdb: Dict[str, ShowRow] = {}
+        self._pages: int = 0
+        self.updated: Optional[float] = None
+        if self._path.exists():
+            self.load()
+
+    @classmethod
+    def default(cls) -> Optional["TvMazeShowIndex"]:
+        """Index used by TvMaze, None if no index path is configured or the index was not downloaded"""
+        with cls._default_lock:
+            if cls._default is None:
+                _path = ConfigurationManager().path(SettingKeys.PATH_TVMAZE_SHOW_INDEX, convert_to_path=False)
+                if not _path or not Path(_path).exists():
+                    return None
+                cls._default = cls(_path)
+            return cls._default
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def load(self) -> None:
+        with gzip.open(self._path, "rt", encoding="utf-8") as _fp:
+            _data = json.load(_fp)
+        self._pages = _data.get("pages", 0)
+        self.updated = _data.get("updated", None)
+        self._rows = {_row[0]: _row for _row in _data.get("shows", [])}
+        self._build_lookup()
+
+    def save(self) -> None:
+        _data = {"updated": self.updated, "pages": self._pages,
+                 "shows": [self._rows[_id] for _id in sorted(self._rows)]}
+        with gzip.open(self._path, "wt", encoding="utf-8") as _fp:
+            json.dump(_data, _fp, separators=(",", ":"))
+
+    def update(self, tvmaze: "TvMaze", full: bool = False) -> int:
+        """
+        Downloads index pages, starting with the last downloaded page (new shows are added at the end)
+        or the first page if full. Returns the number of pages downloaded.
+        """
+        _page = 0 if full else max(0, self._pages - 1)
+        if full:
+            self._rows = {}
+        _count = 0
+        while (_shows := tvmaze.show_index_page(_page)) is not None:
+            for _show in _shows:
+                _row = self._row(_show)
+                self._rows[_row[0]] = _row
+            _count += 1
+            _page += 1
+            self.log(f"downloaded page {_page}, {len(self._rows)} shows")
+        self._pages = max(self._pages, _page)
+        self.updated = time.time()
+        self._build_lookup()
+        return _count
+
+    def find(self, title: str, year: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Show data (as in a TvMaze show response) of the best matching show, the most popular one if ambiguous"""
+        _rows = self._by_title.get(normalize_title(title), [])
+        if year is not None:
+            _rows = [_row for _row in _rows if _row[2] and _row[2].startswith(str(year))] or _rows
+        if not _rows:
+            return None
+        return self._show(max(_rows, key=lambda _row: _row[4] or 0))
+
+    def find_imdb(self, imdb_id: IMDBId) -> Optional[Dict[str, Any]]:
+        _row = self._by_imdb.get(str(imdb_id), None)
+        return self._show(_row) if _row is not None else None
+
+    def _build_lookup(self) -> None:
+        self._by_title, self._by_imdb = {}, {}
+        for _row in self._rows.values():
+            self._by_title.setdefault(normalize_title(_row[1] or ""), []).append(_row)
+            if _row[3]:
+                self._by_imdb[_row[3]] = _row
+
+    @staticmethod
+    def _row(show: Dict[str, Any]) -> ShowRow:
+        return [show["id"], show.get("name"), show.get("premiered"), (show.get("externals") or {}).get("imdb"),
+                show.get("weight"), show.get("genres") or []]
+
+    @staticmethod
+    def _show(row: ShowRow) -> Dict[str, Any]:
+        _id, _name, _premiered, _imdb, _weight, _genres = row
+        return {"id": _id, "name": _name, "premiered": _premiered, "genres": _genres, "weight": _weight,
+                "externals": {"imdb": _imdb}}
+
+
+def main():
+    from argparse import ArgumentParser
+    from media.online_search.tvmaze import TvMaze
+    parser = ArgumentParser("TvMaze show index")
+    parser.add_argument("--update", action="store_true", help="download new index pages")
+    parser.add_argument("--full", action="store_true", help="download all index pages")
+    parser.add_argument("--find", type=str, default=None, help="find show by title")
+    args = parser.parse_args()
+    _path = ConfigurationManager().path(SettingKeys.PATH_TVMAZE_SHOW_INDEX, convert_to_path=True)
+    _index = TvMazeShowIndex(_path, verbose=True)
+    if args.update or args.full:
+        _pages = _index.update(TvMaze(verbose=True, use_cache=False), full=args.full)
+        _index.save()
+        print(f"downloaded {_pages} page(s), {len(_index)} shows")
+    if args.find:
+        print(_index.find(args.find))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
-from typing import Optional, Tuple, List
+from functools import lru_cache
+from typing import Optional, Tuple, NamedTuple, Callable
 import re
 
 MOVIE_REGEX_PATTERN = r"^.+\.(2160p|1080p|720p|dvd|bdrip).+(\-|\.)[a-z0-9]+$"
@@ -9,59 +10,119 @@ SEASON_EPISODE_REGEX_PATTERN = r"\.[sS](?P<season_num>\d{2,4})([Ee](?P<episode_n
 SEASON_SUBDIR_REGEX_PATTERN = r"^[Ss]\d{2}$"
 YEAR_REGEX_PATTERN = r"(?P<year>(19|20)\d{2})"
 RES_REGEX_PATTERN = r"(2160p|1080p|720p|dvd|bdrip)"
+MOVIE_TITLE_REGEX_PATTERN = r".+?(?=\.(\d{4}|REPACK|720p|1080p|2160|DVD|BluRay))"
+MOVIE_TITLE_TAGS_REGEX_PATTERN = r"(REPACK|LiMiTED|EXTENDED|Unrated)"
+
+
+MOVIE_REGEX = re.compile(MOVIE_REGEX_PATTERN, re.IGNORECASE)
+SEASON_REGEX = re.compile(SEASON_REGEX_PATTERN, re.IGNORECASE)
+SEASON_EPISODE_REGEX = re.compile(SEASON_EPISODE_REGEX_PATTERN)
+SEASON_SUBDIR_REGEX = re.compile(SEASON_SUBDIR_REGEX_PATTERN)
+YEAR_REGEX = re.compile(YEAR_REGEX_PATTERN)
+RES_REGEX = re.compile(RES_REGEX_PATTERN)
+MOVIE_TITLE_REGEX = re.compile(MOVIE_TITLE_REGEX_PATTERN)
+MOVIE_TITLE_TAGS_REGEX = re.compile(MOVIE_TITLE_TAGS_REGEX_PATTERN)
+
+
+class ReleaseName(NamedTuple):
+    season: Optional[int]
+    episode: Optional[int]
+    show_title: Optional[str]
+    year: Optional[int]
+    quality: Optional[str]
+    matches_movie: bool
+    matches_season: bool
+
+
+class ReleaseNameParser:
+    """Parses all fields of a release name at once, results are memoized by name"""
+    CACHE_SIZE = 100_000
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.parse: Callable[[str], ReleaseName] = lru_cache(maxsize=cache_size)(self._parse)
+
+    @staticmethod
+    def _parse(name: str) -> ReleaseName:
+        """Parses name with whitespace replaced by dots"""
+        _item = name.replace(" ", ".")
+        _season, _episode, _show_title = None, None, None
+        _match = SEASON_EPISODE_REGEX.search(_item)
+        if _match:
+            _s, _e = _match.group("season_num", "episode_num")
+            _season = int(_s) if _s is not None else None
+            _episode = int(_e) if _e is not None else None
+            _show_title = _item[:_match.start()].replace(".", " ")
+        _years = YEAR_REGEX.findall(_item)
+        _quality = RES_REGEX.search(_item)
+        return ReleaseName(season=_season,
+                           episode=_episode,
+                           show_title=_show_title,
+                           year=int(_years[-1][0]) if _years else None,
+                           quality=_quality.group() if _quality else None,
+                           matches_movie=MOVIE_REGEX.search(_item) is not None,
+                           matches_season=SEASON_REGEX.search(_item) is not None)
+
+    def cache_info(self):
+        return self.parse.cache_info()
+
+
+_parser = ReleaseNameParser()
+
+
+def parse_release_name(name: str) -> ReleaseName:
+    return _parser.parse(name)
 
 
 def matches_movie_regex(item: str, replace_whitespace: bool = True) -> bool:
     if replace_whitespace:
-        item = item.replace(" ", ".")
-    return re.search(MOVIE_REGEX_PATTERN, item, re.IGNORECASE) is not None
+        return parse_release_name(item).matches_movie
+    return MOVIE_REGEX.search(item) is not None
 
 
 def matches_season_regex(item: str, replace_whitespace: bool = True) -> bool:
     if replace_whitespace:
-        item = item.replace(" ", ".")
-    return re.search(SEASON_REGEX_PATTERN, item, re.IGNORECASE) is not None
+        return parse_release_name(item).matches_season
+    return SEASON_REGEX.search(item) is not None
 
 
 def matches_season_subdir(item: str) -> bool:
-    return re.search(SEASON_SUBDIR_REGEX_PATTERN, item) is not None
+    return SEASON_SUBDIR_REGEX.search(item) is not None
 
 
 def parse_season_and_episode(item: str, replace_whitespace: bool = True) -> Tuple[Optional[int], Optional[int]]:
     if replace_whitespace:
-        item = item.replace(" ", ".")
-    match = re.search(SEASON_EPISODE_REGEX_PATTERN, item)
+        _rel = parse_release_name(item)
+        return _rel.season, _rel.episode
+    match = SEASON_EPISODE_REGEX.search(item)
     if not match:
         return None, None
-    _dict = match.groupdict()
-    _s = _dict.get("season_num", None)
-    _e = _dict.get("episode_num", None)
+    _s, _e = match.group("season_num", "episode_num")
     return int(_s) if _s is not None else None, int(_e) if _e is not None else None
 
 
 def parse_show_title_from_episode(item: str, replace_whitespace: bool = True) -> Optional[str]:
     if replace_whitespace:
-        item = item.replace(" ", ".")
-    _splits = re.split(SEASON_EPISODE_REGEX_PATTERN, item)
-    if len(_splits) > 1:
-        return _splits[0].replace(".", " ")
+        return parse_release_name(item).show_title
+    match = SEASON_EPISODE_REGEX.search(item)
+    if match:
+        return item[:match.start()].replace(".", " ")
     return None
 
 
 def parse_year(string: str) -> Optional[int]:
-    re_year = re.compile(YEAR_REGEX_PATTERN)
-    matches: List[Tuple] = re_year.findall(string)
-    if not matches:
-        return None
-    return int(matches[-1][0])
+    return parse_release_name(string).year
 
 
 def parse_quality(string: str) -> Optional[str]:
-    re_year = re.compile(RES_REGEX_PATTERN)
-    match = re_year.search(string)
-    if not match:
+    return parse_release_name(string).quality
+
+
+def parse_movie_title(string: str) -> Optional[str]:
+    """Guessed movie title: words before the year or quality, tags removed"""
+    _match = MOVIE_TITLE_REGEX.search(string)
+    if not _match:
         return None
-    return match.group()
+    return MOVIE_TITLE_TAGS_REGEX.sub(".", _match.group(0)).replace(".", " ")
 
 
 def main():
@@ -0,0 +1,116 @@
+import re
+from enum import IntEnum
+from functools import lru_cache
+from typing import Optional, NamedTuple, Iterable, Dict
+
+import util
+from media.regex import parse_release_name, parse_movie_title
+
+EDU_SITES = ['packt', 'pluralsight', 'linkedin', 'technics']
+
+
+class ReleaseType(IntEnum):
+    TvShowEpisodeFile = 0
+    TvShowEpisodeDir = 1
+    MovieFile = 2
+    MovieDir = 3
+    TvShowSeasonPackDir = 4
+    Education = 5
+    AnimeEpisodeFile = 6
+    AnimeEpisodeDir = 7
+    SubPack = 8
+    Unknown = 999
+
+    @property
+    def strshort(self):
+        rt = ReleaseType(self.value)
+        if rt == ReleaseType.TvShowEpisodeFile:
+            return 'TvEpF'
+        if rt == ReleaseType.TvShowEpisodeDir:
+            return 'TvEpD'
+        if rt == ReleaseType.TvShowSeasonPackDir:
+            return 'TvSea'
+        if rt == ReleaseType.MovieDir:
+            return "MoviD"
+        if rt == ReleaseType.MovieFile:
+            return "MoviF"
+        if rt == ReleaseType.Education:
+            return "Educa"
+        if rt == ReleaseType.SubPack:
+            return "SubPk"
+        return "Unkwn"
+
+
+class Release(NamedTuple):
+    name: str
+    type: "ReleaseType"
+    season: Optional[int]
+    episode: Optional[int]
+    show: Optional[str]  # guessed show name of episodes
+    title: Optional[str]  # guessed movie title
+    year: Optional[int]  # first year in the name
+    is_movie: bool  # has a year or a title, and is not an episode or season
+    is_video_file: bool
+    # strict scene release patterns of media.regex, used by the scanner (media.util.Util) and wb
+    matches_movie: bool
+    matches_episode: bool
+    matches_season: bool
+
+    @property
+    def is_episode(self) -> bool:
+        return self.season is not None and self.episode is not None
+
+    @property
+    def is_season(self) -> bool:
+        return self.season is not None and self.episode is None
+
+
+# util_tv rules: any separator (or none at the ends), 1-2 digit numbers, "S01E02E03" is episode 2.
+# Not preceded by a letter or digit, so "DTS5.1" is not season 5
+RE_SEASON_EPISODE = re.compile(r"(?<![a-zA-Z0-9])[Ss](\d{1,4})[Ee](\d{1,3})(?!\d)")
+RE_SEASON = re.compile(r"(?<![a-zA-Z0-9])[Ss](\d{1,4})(?![a-zA-Z0-9])")
+RE_YEAR = re.compile(r"(19|20)\d{2}")
+
+
+@lru_cache(maxsize=65536)
+def classify(release_name: str) -> Release:
+    """Release type and parsed fields of a release (file or directory) name"""
+    _season, _episode, _show = None, None, None
+    _match = RE_SEASON_EPISODE.search(release_name) or RE_SEASON.search(release_name)
+    if _match:
+        _season = int(_match.group(1))
+        if _match.re is RE_SEASON_EPISODE:
+            _episode = int(_match.group(2))
+            _show = release_name[:_match.start()].replace(".", " ").strip()
+    _year = RE_YEAR.search(release_name)
+    _title = parse_movie_title(release_name)
+    _is_movie = _season is None and (_year is not None or (_title is not None and _title != release_name))
+    _is_video_file = util.str_is_vid_file(release_name)
+    _lower = release_name.lower()
+    if "subpack" in _lower:
+        _type = ReleaseType.SubPack
+    elif any(_lower.startswith(edu_site) for edu_site in EDU_SITES):
+        _type = ReleaseType.Education
+    elif _episode is not None:
+        _type = ReleaseType.TvShowEpisodeFile if _is_video_file else ReleaseType.TvShowEpisodeDir
+    elif _season is not None:
+        _type = ReleaseType.TvShowSeasonPackDir
+    elif _is_movie:
+        _type = ReleaseType.MovieFile if _is_video_file else ReleaseType.MovieDir
+    else:
+        _type = ReleaseType.Unknown
+    _parsed = parse_release_name(release_name)
+    _matches_episode = _parsed.season is not None and _parsed.episode is not None
+    return Release(name=release_name, type=_type, season=_season, episode=_episode, show=_show, title=_title,
+                   year=int(_year.group()) if _year else None, is_movie=_is_movie, is_video_file=_is_video_file,
+                   matches_movie=_parsed.matches_movie and not _matches_episode, matches_episode=_matches_episode,
+                   matches_season=_parsed.matches_season)
+
+
+def classify_many(release_names: Iterable[str]) -> Dict[str, Release]:
+    """Classifies a batch of names, each distinct name once"""
+    return {_name: classify(_name) for _name in dict.fromkeys(release_names)}
+
+
+def determine_release_type(release_name: str) -> ReleaseType:
+    return classify(release_name).type
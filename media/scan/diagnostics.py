@@ -56,8 +56,8 @@ class DiagnosticsScanner(BaseLog):
         self.log("scanning for removed movies...")
         _paths = MediaPaths()
         _count = 0
-        existing = [d.name for d in MediaPaths().movie_dirs()]
-        for mov in self._movie_db.all_movies(include_removed=False):
+        existing = {d.name for d in MediaPaths().movie_dirs()}
+        for mov in self._movie_db.all_movies(include_removed=False, fields=["folder"]):
             folder = mov.get("folder")
             if folder not in existing:
                 _count += 1
@@ -93,15 +93,20 @@ class DiagnosticsScanner(BaseLog):
         self.log("scanning for wrong access permissions...")
         _count = 0
         expected = 0o755
-        for _mov_dir in MediaPaths().movie_dirs():
-            _di = DirectoryInfo(_mov_dir)
+        for _record in MediaPaths().movie_dir_records():
+            _mov_dir = _record.path
+            try:
+                _di = DirectoryInfo(_mov_dir, stat_res=_record.stat)
+            except FileNotFoundError as _:
+                continue
             if not _di.has_permissions(expected):
                 self.warn_fs(f"wrong access: w[{oct(_di.stat.st_mode)}] -> i[{_mov_dir}]")
                 self._fix(_mov_dir)
         expected = 0o644
-        for _mov_file in MediaPaths().movie_files():
+        for _record in MediaPaths().movie_file_records():
+            _mov_file = _record.path
             try:
-                _fi = FileInfo(_mov_file)
+                _fi = FileInfo(_mov_file, stat_res=_record.stat)
             except FileNotFoundError as _:
                 self.warn_fs(f"e[{_mov_file}] is not a file!")
                 continue
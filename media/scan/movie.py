@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List, Dict
 
 from media.scan.scanner import MediaScanner, ScanType
 from db.db_mov import MovieDatabase
@@ -11,30 +11,42 @@ from printout import print_line
 
 
 class MovieScanner(MediaScanner):
-    def __init__(self, update_database: bool = False, verbose: bool = False):
-        MediaScanner.__init__(self, update_database, verbose=verbose)
+    def __init__(self, update_database: bool = False, verbose: bool = False, workers: int = 1):
+        MediaScanner.__init__(self, update_database, verbose=verbose, workers=workers)
         self.set_log_prefix("MOVIE_SCANNER")
         self._db: MovieDatabase = MovieDatabase()
         self._media_paths = MediaPaths()
+        self._new_entries: List[Dict] = []
 
     def scan(self) -> int:
-        _count = 0
+        _new_movies: List[Movie] = []
+        self._new_entries = []
         for movie_dir in self._media_paths.movie_dirs():
             if self.should_skip_dir(movie_dir):
                 continue
             if movie_dir.name not in self._db:
-                self._process_new_movie(Movie(movie_dir))
-                _count += 1
-        return _count
+                _new_movies.append(Movie(movie_dir))
+        _valid = [_movie for _movie in _new_movies if self._is_valid(_movie)]
+        try:
+            for _movie, _result in zip(_valid, self.run_lookups(self._search, _valid)):
+                self._add_to_db(_movie, _result)
+        finally:
+            # entries resolved before a failed lookup are still saved
+            if self._new_entries:
+                self._db.add_many(self._new_entries)
+        return len(_new_movies)
 
     @property
     def _omdb(self) -> omdb.OMDb:
         return self.online_search_tool(ScanType.Movie)
 
-    def _process_new_movie(self, movie: Movie):
+    def _is_valid(self, movie: Movie) -> bool:
         if not movie.is_valid():
             self.warn_fs(f"w[{movie}] is not valid! Skipping...")
-            return
+            return False
+        return True
+
+    def _search(self, movie: Movie) -> Optional[omdb.OMDbMovieSearchResult]:
         self.log_fs(f"processing new: i[{movie}]...", force=True)
         _id = IMDBId(movie.path)  # TODO: assert path is dir...
         if _id.valid():
@@ -45,7 +57,7 @@ class MovieScanner(MediaScanner):
             result = self._omdb.movie_search(movie.data)
         if result and result.valid:
             self.log(f"got: {result}")
-        self._add_to_db(movie, result)
+        return result
 
     def _add_to_db(self, movie: Movie, search_result: omdb.OMDbMovieSearchResult):
         _db_entry = {
@@ -60,7 +72,7 @@ class MovieScanner(MediaScanner):
             if search_result.year is not None:
                 _db_entry["year"] = search_result.year
         if self._update_db:
-            self._db.add(**_db_entry)
+            self._new_entries.append(_db_entry)
         else:
             self.log("not adding to database...")
             self.log_fs(f"data: i[{_db_entry}]")
@@ -1,5 +1,6 @@
 from enum import Enum, auto
-from typing import List, Union, Dict
+from typing import List, Union, Dict, Callable, TypeVar, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from base_log import BaseLog
 from abc import ABC, abstractmethod
 from pathlib import Path
@@ -9,6 +10,10 @@ from media.online_search.tvmaze import TvMaze
 from config import ConfigurationManager, SettingKeys, SettingSection
 
 
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
 class ScanType(Enum):
     Movie = auto()
     TvShow = auto()
@@ -17,10 +22,11 @@ class ScanType(Enum):
 
 
 class MediaScanner(ABC, BaseLog):
-    def __init__(self, update_database: bool = True, verbose: bool = False):
+    def __init__(self, update_database: bool = True, verbose: bool = False, workers: int = 1):
         BaseLog.__init__(self, verbose=verbose)
         self._verbose_logging: bool = verbose
         self._update_db: bool = update_database
+        self._workers: int = max(1, workers)
         self._ignore_dir_names: List[str] = self._load_ignored_dirs()
         self._search_tools: Dict[ScanType, Union[TvMaze, OMDb]] = {}
         self.set_log_prefix("MEDIA_SCANNER")
@@ -34,6 +40,16 @@ class MediaScanner(ABC, BaseLog):
             return dir_name.name in self._ignore_dir_names
         return dir_name in self._ignore_dir_names
 
+    def run_lookups(self, func: Callable[[_T], _R], items: Iterable[_T]) -> Iterator[_R]:
+        """Runs func (online lookups) for all items, concurrently if the scanner has more than one worker.
+        Results are yielded in item order as they complete, so callers keep the ones resolved before a failure"""
+        if self._workers == 1:
+            for item in items:
+                yield func(item)
+            return
+        with ThreadPoolExecutor(max_workers=self._workers) as _executor:
+            yield from _executor.map(func, items)
+
     def online_search_tool(self, scan_type: ScanType) -> Union[OMDb, TvMaze]:
         _ret = self._search_tools.get(scan_type, None)
         if _ret is not None:
@@ -1,9 +1,9 @@
-from typing import Optional
+from typing import Optional, List, Dict
 
 from media.scan.scanner import MediaScanner, ScanType
 from db.db_tv import ShowDatabase, EpisodeDatabase
 from media.util import MediaPaths
-from media.show import Show
+from media.show import Show, ShowData
 from media.episode import Episode
 from media.imdb_id import IMDBId
 from media.online_search import tvmaze
@@ -12,34 +12,61 @@ from printout import print_line
 
 
 class ShowScanner(MediaScanner):
-    def __init__(self, update_database: bool = False, verbose: bool = False):
-        MediaScanner.__init__(self, update_database, verbose=verbose)
+    def __init__(self, update_database: bool = False, verbose: bool = False, workers: int = 1):
+        MediaScanner.__init__(self, update_database, verbose=verbose, workers=workers)
         self.set_log_prefix("SHOW_SCANNER")
         self._db_show: ShowDatabase = ShowDatabase()
         self._db_ep: EpisodeDatabase = EpisodeDatabase()
         self._media_paths = MediaPaths()
+        self._new_shows: List[Dict] = []
+        self._new_episodes: List[Dict] = []
 
     def scan(self) -> int:
-        _count = 0
+        self._new_shows, self._new_episodes = [], []
+        _shows: List[Show] = []
         for show_dir in self._media_paths.show_dirs():
             if self.should_skip_dir(show_dir):
                 continue
             if show_dir.name not in self._db_show:
-                self._process_new_show(Show(show_dir))
+                _shows.append(Show(show_dir))
+        _shows = [_show for _show in _shows if self._is_valid_show(_show)]
+        try:
+            for _show, _result in zip(_shows, self.run_lookups(self._search_show, _shows)):
+                self._add_show_to_db(_show, _result)
+        finally:
+            # shows resolved before a failed lookup are still saved
+            if self._new_shows:
+                self._db_show.add_many(self._new_shows)
+        _episodes: List[Episode] = []
         for episode_file in self._media_paths.episode_files():
             if episode_file.name not in self._db_ep:
-                self._process_new_episode(Episode(episode_file))
-                _count += 1
-        return _count
+                _episodes.append(Episode(episode_file))
+        # episodes of the same show share the show episode list lookup, search them in the same worker
+        _by_show: Dict[str, List[Episode]] = {}
+        for _episode in _episodes:
+            if self._is_valid_episode(_episode):
+                _by_show.setdefault(_episode.show_name, []).append(_episode)
+        try:
+            for _show_episodes, _results in zip(_by_show.values(),
+                                                self.run_lookups(self._search_episodes, _by_show.values())):
+                for _episode, _result in zip(_show_episodes, _results):
+                    self._add_episode_to_db(_episode, _result)
+        finally:
+            if self._new_episodes:
+                self._db_ep.add_many(self._new_episodes)
+        return len(_episodes)
 
     @property
     def _tv_maze(self) -> tvmaze.TvMaze:
         return self.online_search_tool(ScanType.TvShow)
 
-    def _process_new_show(self, show: Show):
+    def _is_valid_show(self, show: Show) -> bool:
         if not show.is_valid():
             self.warn_fs(f"w[{str(show)}] is not valid! Skipping...")
-            return
+            return False
+        return True
+
+    def _search_show(self, show: Show) -> Optional[tvmaze.TvMazeShowSearchResult]:
         self.log_fs(f"processing new show: i[{show.name}]...", force=True)
         _id = IMDBId(show.path)  # TODO: or tvmaze_id
         if _id.valid():
@@ -52,27 +79,32 @@ class ShowScanner(MediaScanner):
             self.log(f"got: {result}")
         else:
             self.log("could not get a valid search result...")
-        self._add_show_to_db(show, result)
+        return result
 
-    def _process_new_episode(self, episode: Episode):
+    def _is_valid_episode(self, episode: Episode) -> bool:
         if not episode.is_valid():
             self.warn_fs(f"w[{episode.name}] is not valid! Skipping...")
-            return
-        self.log_fs(f"processing new episode: i[{episode.name}]...", force=True)
-        _id = IMDBId(episode.show_path)  # TODO: or tvmaze_id
+            return False
+        return True
+
+    def _search_episodes(self, episodes: List[Episode]) -> List[Optional[tvmaze.TvMazeEpisodeSearchResult]]:
+        """Searches episodes of the same show, the show episode list is looked up once"""
+        _first = episodes[0]
+        _id = IMDBId(_first.show_path)  # TODO: or tvmaze_id
         if _id.valid():
-            self.log_fs(f"searching using imdb: o[{_id}]")
-            result = self._tv_maze.episode_search(_id,
-                                                  episode_num=episode.episode_num,
-                                                  season_num=episode.season_num)
+            self.log_fs(f"searching {len(episodes)} episode(s) of i[{_first.show_name}] using imdb: o[{_id}]")
+            _query = _id
         else:
-            self.log_fs(f"searching using data: o[{episode.data}]")
-            result = self._tv_maze.episode_search(episode.data)
-        if result and result.valid:
-            self.log(f"got: {result}")
-        else:
-            self.log("could not get a valid search result...")
-        self._add_episode_to_db(episode, result)
+            self.log_fs(f"searching {len(episodes)} episode(s) using data: o[{_first.show_name}]")
+            _query = ShowData(title=_first.show_name)
+        _results = self._tv_maze.episode_search_many(_query, [(_ep.season_num, _ep.episode_num) for _ep in episodes])
+        for _episode, _result in zip(episodes, _results):
+            self.log_fs(f"processing new episode: i[{_episode.name}]...", force=True)
+            if _result and _result.valid:
+                self.log(f"got: {_result}")
+            else:
+                self.log("could not get a valid search result...")
+        return _results
 
     def _add_episode_to_db(self, ep: Episode, search_result: Optional[tvmaze.TvMazeEpisodeSearchResult]):
         _db_entry = {
@@ -91,7 +123,7 @@ class ShowScanner(MediaScanner):
             if search_result.aired_timestamp is not None:
                 _db_entry["released"] = search_result.aired_timestamp
         if self._update_db:
-            self._db_ep.add(**_db_entry)
+            self._new_episodes.append(_db_entry)
         else:
             self.log("not adding to database...")
             self.log_fs(f"data: i[{_db_entry}]")
@@ -111,7 +143,7 @@ class ShowScanner(MediaScanner):
             if search_result.year is not None:
                 _db_entry["year"] = search_result.year
         if self._update_db:
-            self._db_show.add(**_db_entry)
+            self._new_shows.append(_db_entry)
         else:
             self.log("not adding to database...")
             self.log_fs(f"data: i[{_db_entry}]")
@@ -1,11 +1,15 @@
+import os
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Union, List, Dict, Generator, Optional
+from typing import Union, List, Dict, Generator, Optional, Iterable
 
 from config import ConfigurationManager, SettingKeys
 from singleton import Singleton
+from db.fs_index import FileSystemIndex
+from utils.dir_util import scandir_walk
 
 from media.enums import MOVIE_LETTERS
-from media.regex import matches_movie_regex, parse_season_and_episode, matches_season_regex
+from media.release import classify
 
 VALID_VIDEO_FILE_EXTENSIONS = (".mkv", ".avi", ".mp4")
 VALID_SUBTITLE_FILE_EXTENSIONS = (".srt",)
@@ -13,9 +17,55 @@ VALID_NFO_FILE_EXTENSIONS = (".nfo",)
 VALID_FILE_EXTENSIONS = VALID_VIDEO_FILE_EXTENSIONS + VALID_SUBTITLE_FILE_EXTENSIONS + VALID_NFO_FILE_EXTENSIONS
 
 
+@dataclass(frozen=True)
+class PathRecord:
+    """Path with its stat result, as fetched while listing the parent directory (None if it could not be fetched)"""
+    path: Path
+    stat: Optional[os.stat_result] = None
+
+    @property
+    def mode(self) -> Optional[int]:
+        return self.stat.st_mode if self.stat else None
+
+    @property
+    def size(self) -> Optional[int]:
+        return self.stat.st_size if self.stat else None
+
+    @property
+    def mtime(self) -> Optional[float]:
+        return self.stat.st_mtime if self.stat else None
+
+
+def _record(entry: os.DirEntry) -> PathRecord:
+    try:
+        return PathRecord(Path(entry.path), entry.stat())
+    except OSError:
+        return PathRecord(Path(entry.path))
+
+
 class MediaPaths(metaclass=Singleton):
+    WALKER_WORKERS = 8
+
     def __init__(self):
         self._data: Dict[str, Union[Path, List[Path]]] = {}
+        self._use_index: bool = False
+        self._walker_workers: int = self.WALKER_WORKERS
+
+    def set_use_index(self, state: bool) -> None:
+        """List directories and files from the persistent filesystem index instead of the filesystem"""
+        self._use_index = state
+
+    def set_walker_workers(self, workers: int) -> None:
+        """Number of threads listing directories concurrently in movie_files/episode_files"""
+        self._walker_workers = max(1, workers)
+
+    def _walk_video_files(self, roots: Iterable[Path]) -> Generator[os.DirEntry, None, None]:
+        for _entry in scandir_walk(roots, workers=self._walker_workers):
+            if os.path.splitext(_entry.name)[1] in VALID_VIDEO_FILE_EXTENSIONS:
+                yield _entry
+
+    def _index(self, tv: bool = False) -> FileSystemIndex:
+        return FileSystemIndex.tv() if tv else FileSystemIndex.movies()
 
     def movie_dir(self) -> Path:
         _path = self._data.get("movie_dir", None)
@@ -38,51 +88,76 @@ class MediaPaths(metaclass=Singleton):
         return _path
 
     def movie_letter_dirs(self) -> Generator[Path, None, None]:
-        for _sub_dir in self.movie_dir().iterdir():
+        _sub_dirs = self._index().sub_dirs() if self._use_index else self.movie_dir().iterdir()
+        for _sub_dir in _sub_dirs:
             if _sub_dir.name.upper() not in MOVIE_LETTERS:
                 continue
             yield _sub_dir
 
     def movie_dirs(self) -> Generator[Path, None, None]:
         for _letter_dir in self.movie_letter_dirs():
-            for _movie_dir in _letter_dir.iterdir():
+            _movie_dirs = self._index().sub_dirs(_letter_dir) if self._use_index else _letter_dir.iterdir()
+            for _movie_dir in _movie_dirs:
                 yield _movie_dir
 
+    def movie_dir_records(self) -> Generator[PathRecord, None, None]:
+        if self._use_index:
+            yield from (PathRecord(_path) for _path in self.movie_dirs())
+            return
+        for _letter_dir in self.movie_letter_dirs():
+            with os.scandir(_letter_dir) as _it:
+                for _entry in _it:
+                    yield _record(_entry)
+
     def movie_files(self) -> Generator[Path, None, None]:
+        if not self._use_index:
+            yield from (Path(_entry.path) for _entry in self._walk_video_files(self.movie_dirs()))
+            return
         for _mov_dir in self.movie_dirs():
-            for _file in _mov_dir.rglob("*.*"):
-                if _file.suffix in VALID_VIDEO_FILE_EXTENSIONS:
-                    yield _file
+            yield from self._index().files(_mov_dir, extensions=VALID_VIDEO_FILE_EXTENSIONS)
+
+    def movie_file_records(self) -> Generator[PathRecord, None, None]:
+        """Same files as movie_files, with the stat result fetched when the directory was listed"""
+        if self._use_index:
+            yield from (PathRecord(_path) for _path in self.movie_files())
+            return
+        yield from (_record(_entry) for _entry in self._walk_video_files(self.movie_dirs()))
 
     def show_dirs(self) -> Generator[Path, None, None]:
+        if self._use_index:
+            yield from self._index(tv=True).sub_dirs()
+            return
         for _item in self.tv_dir().iterdir():
             if _item.is_dir():
                 yield _item
 
     def episode_files(self) -> Generator[Path, None, None]:
+        if not self._use_index:
+            yield from (Path(_entry.path) for _entry in self._walk_video_files(self.show_dirs()))
+            return
         for _show_dir in self.show_dirs():
-            for _file in _show_dir.rglob("*.*"):
-                if _file.suffix in VALID_VIDEO_FILE_EXTENSIONS:
-                    yield _file
+            yield from self._index(tv=True).files(_show_dir, extensions=VALID_VIDEO_FILE_EXTENSIONS)
+
+    def episode_file_records(self) -> Generator[PathRecord, None, None]:
+        """Same files as episode_files, with the stat result fetched when the directory was listed"""
+        if self._use_index:
+            yield from (PathRecord(_path) for _path in self.episode_files())
+            return
+        yield from (_record(_entry) for _entry in self._walk_video_files(self.show_dirs()))
 
 
 class Util:
     @staticmethod
     def is_movie(item: Union[str, Path]) -> bool:
-        item = Util._to_string(item)
-        if Util.is_episode(item):
-            return False
-        return matches_movie_regex(item)
+        return classify(Util._to_string(item)).matches_movie
 
     @staticmethod
     def is_episode(item: Union[str, Path]) -> bool:
-        item = Util._to_string(item)
-        return all([x is not None for x in parse_season_and_episode(item)])
+        return classify(Util._to_string(item)).matches_episode
 
     @staticmethod
     def is_season(item: Union[str, Path]) -> bool:
-        item = Util._to_string(item)
-        return matches_season_regex(item)
+        return classify(Util._to_string(item)).matches_season
 
     @staticmethod
     def _to_string(item: Union[str, Path]) -> str:
@@ -7,6 +7,12 @@ from media.scan.show import ShowScanner
 from media.scan.movie import MovieScanner
 from media.scan.diagnostics import DiagnosticsScanner
 from media.util import MediaPaths
+from db.fs_index import FileSystemIndex
+from media.online_search.http_cache import print_cache_stats
+from media.online_search.transport import default_transport
+from media.online_search.scheduler import RequestScheduler
+from media.online_search.omdb import OMDb
+from media.online_search.tvmaze import TvMaze
 
 from db.db_mov import MovieDatabase
 from db.db_tv import EpisodeDatabase
@@ -30,12 +36,35 @@ def get_args() -> Namespace:
     parser.add_argument("--fix",
                         action="store_true",
                         dest="fix_issues")
+    parser.add_argument("--use-index",
+                        action="store_true",
+                        dest="use_index",
+                        help="list media directories and files from the filesystem index")
+    parser.add_argument("--workers", "-j",
+                        type=int,
+                        default=1,
+                        help="number of concurrent online metadata lookups")
+    parser.add_argument("--max-requests",
+                        type=int,
+                        default=RequestScheduler.MAX_CONCURRENT,
+                        dest="max_requests",
+                        help="max number of concurrent requests per online search api")
+    parser.add_argument("--cache-stats",
+                        action="store_true",
+                        dest="cache_stats",
+                        help="print online search http cache and transport statistics after scanning")
+    parser.add_argument("--walker-workers",
+                        type=int,
+                        default=MediaPaths.WALKER_WORKERS,
+                        dest="walker_workers",
+                        help="number of threads listing media directories")
     return parser.parse_args()
 
 
 def scan_movies(args: Namespace) -> None:
     mov_scan = MovieScanner(update_database=not args.simulate,
-                            verbose=args.verbose)
+                            verbose=args.verbose,
+                            workers=args.workers)
     print("Scanning for new movies...")
     count = mov_scan.scan()
     if count == 0:
@@ -49,7 +78,8 @@ def scan_movies(args: Namespace) -> None:
 
 def scan_shows(args: Namespace) -> None:
     show_scan = ShowScanner(update_database=not args.simulate,
-                            verbose=args.verbose)
+                            verbose=args.verbose,
+                            workers=args.workers)
     print("Scanning for new episodes...")
     count = show_scan.scan()
     if count == 0:
@@ -111,8 +141,22 @@ def _args_to_funcs(args: Namespace) -> List[Callable[[Namespace], None]]:
 
 def main():
     args = get_args()
+    MediaPaths().set_walker_workers(args.walker_workers)
+    for _search_tool in (OMDb, TvMaze):
+        _search_tool.scheduler().set_max_concurrent(args.max_requests)
+    if args.use_index:
+        MediaPaths().set_use_index(True)
+        for _index in (FileSystemIndex.movies(), FileSystemIndex.tv()):
+            print(f"index {_index.root}: {_index.last_refresh}")
     for _func in _args_to_funcs(args):
         _func(args)
+    if args.cache_stats:
+        print_cache_stats()
+        print("http transport:")
+        for _name, _value in default_transport().stats().items():
+            print(f"  {_name}: {_value}")
+        for _search_tool in (OMDb, TvMaze):
+            print(f"{_search_tool.__name__} requests: {_search_tool.scheduler().stats()}")
 
 
 if __name__ == "__main__":
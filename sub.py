@@ -12,6 +12,7 @@ import requests
 from bs4 import BeautifulSoup
 
 import config
+import release
 import run
 import util
 import util_movie
@@ -50,25 +51,26 @@ class Subtitle():
         self._find_matching_media_files()
 
     def _determine_type(self):
-        if util_movie.is_movie(self.filename):
+        _release = release.classify(self.filename)
+        if _release.is_movie:
             self.type = SubtitleMediaType.Movie
-        elif util_tv.is_episode(self.filename):
+        elif _release.is_episode:
             self.type = SubtitleMediaType.Episode
         else:
             self.type = SubtitleMediaType.Unknown
 
     def _find_matching_media_files(self):
         matches = []
+        _release = release.classify(self.filename)
         if self.type in [SubtitleMediaType.Movie, SubtitleMediaType.Unknown]:
+            guessed_movie_name = _release.title
             for mov_name in util_movie.list_all():
-                guessed_movie_name = util_movie.determine_title(self.filename)
                 value = util.check_string_similarity(mov_name, self.filename)
                 if guessed_movie_name and guessed_movie_name.replace(" ", ".") in mov_name:
                     value += 0.5
                 matches.append((value, mov_name))
         if self.type in [SubtitleMediaType.Episode, SubtitleMediaType.Unknown]:
-            guessed_show = util_tv.guess_show_name_from_episode_name(
-                self.filename)
+            guessed_show = _release.show
             for path, ep_name in util_tv.list_all_episodes():
                 if guessed_show and guessed_show.lower() not in str(path).lower():
                     continue
@@ -299,11 +301,12 @@ class SubScene(BaseLog):
         super().__init__(verbose)
         self.set_log_prefix("SUBSCENE")
         self.search_str = search_str
-        self.movie_title = util_movie.determine_title(search_str)
-        self.movie_year = util_movie.parse_year(search_str)
+        _release = release.classify(search_str)
+        self.movie_title = _release.title
+        self.movie_year = str(_release.year) if _release.year else None
         self.verbose = verbose
         self.log("init")
-        if not util_movie.is_movie(search_str):
+        if not _release.is_movie:
             raise ValueError("Search string has to be a movie"
                              "release (for now)")
             # TODO: handle tv episodes...
@@ -1,22 +1,37 @@
 import json
 import random
+import shutil
+import sys
 from typing import List, Dict, Union, Optional, Callable, Any
 
 import config
 
 from db.database import Key, KeyType
-from db.db_json import JSONDatabase
+from db.db_json import JSONDatabase, CompactEntry
 from db.db_mov import MovieDatabase
 from db.db_tv import EpisodeDatabase, ShowDatabase
-from db.db_mongo import MongoDatabase, MongoDbSettings
+from db.db_mongo import MongoDatabase, MongoDbSettings, MongoClientRegistry
+from db.db_sqlite import SQLiteDatabase
 from db.db_media import MediaType
+from db.utils import diff_entries, entry_hash
+from db.fs_index import FileSystemIndex
 
 import mongomock
 import pymongo
+from pymongo.errors import OperationFailure
+from pymongo.results import BulkWriteResult
 
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def reset_mongo_clients():
+    # mongomock patches are per test, do not reuse clients created during other tests
+    MongoClientRegistry().close_all()
+    yield
+    MongoClientRegistry().close_all()
+
+
 class TestEnums:
     def test_media_type_from_string_movie(self):
         assert MediaType.from_string("movie") == MediaType.Movie
@@ -265,6 +280,74 @@ class TestDatBaseBaseJson:
         assert "Monica" in _db
         assert "Andrea" not in _db
 
+    def test_get_entry(self):
+        _db = JSONDatabase()
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer)])
+        _db.insert(name="Harold", age=55)
+        _db.insert(name="Linda", age=32)
+        assert _db.get_entry("Linda").get("age") == 32
+        assert _db.get_entry("Andrea") is None
+        assert _db.entry_primary_values() == ("Harold", "Linda")
+
+    def test_update_primary_key_value(self):
+        _db = JSONDatabase()
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer)])
+        _db.insert(name="Harold", age=55)
+        assert _db.update("Harold", name="Harry") is True
+        assert "Harold" not in _db
+        assert "Harry" in _db
+        assert _db.get("Harry", "age") == 55
+        assert _db.entry_primary_values() == ("Harry",)
+
+    def test_find_using_index(self):
+        _db = JSONDatabase()
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer),
+            Key("retired", type=KeyType.Boolean)])
+        _db.insert(name="Harold", age=67, retired=True)
+        _db.insert(name="Linda", age=55, retired=False)
+        assert _db.create_index("retired") is True
+        _db.insert(name="Oscar", age=70, retired=True)
+        _names = [e["name"] for e in _db.find(filter_by={"retired": True})]
+        assert sorted(_names) == ["Harold", "Oscar"]
+        _db.update("Linda", retired=True)
+        _db.update("Oscar", retired=False)
+        _names = [e["name"] for e in _db.find(filter_by={"retired": True})]
+        assert sorted(_names) == ["Harold", "Linda"]
+        assert [e["name"] for e in _db.find(filter_by={"retired": True, "age": 55})] == ["Linda"]
+        assert _db.find(filter_by={"retired": True, "age": 70}) == []
+
+    def test_find_duplicates_using_index(self):
+        _db = JSONDatabase()
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer)])
+        _db.create_index("age")
+        _db.insert(name="Harold", age=55)
+        _db.insert(name="Linda", age=55)
+        _db.insert(name="Oscar")
+        _db.insert(name="Nina")
+        dupes = _db.find_duplicates("age")
+        assert None not in dupes
+        assert sorted(dupes.get(55, [])) == ["Harold", "Linda"]
+        _db.update("Linda", age=56)
+        assert _db.find_duplicates("age") == {}
+
+    def test_create_index_invalid_key(self):
+        _db = JSONDatabase()
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("tags", type=KeyType.List)])
+        with pytest.raises(ValueError):
+            _db.create_index("age")
+        with pytest.raises(ValueError):
+            _db.create_index("tags")
+
     def test_load_valid_file(self, tmp_path):
         _file = tmp_path / "database.json"
         _items = [
@@ -283,6 +366,44 @@ class TestDatBaseBaseJson:
         assert "Sonny" in _db
         assert _db.get("Lenny", "age") == 12
 
+    @pytest.mark.parametrize("streaming,trusted", [(True, False), (False, True), (True, True)])
+    def test_load_valid_file_modes(self, tmp_path, streaming, trusted):
+        _file = tmp_path / "database.json"
+        _items = [{"name": f"Person{ix}", "age": ix, "nick": None} for ix in range(500)]
+        with open(_file, "w") as _fp:
+            json.dump(_items, _fp, indent=2)
+        _db = JSONDatabase(_file)
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer),
+            Key("nick")])
+        assert _db.load(streaming=streaming, trusted=trusted) is True
+        assert len(_db.entry_primary_values()) == 500
+        assert _db.get("Person123", "age") == 123
+        assert _db.find() == _items
+
+    def test_load_streaming_validates_items(self, tmp_path):
+        _file = tmp_path / "database.json"
+        with open(_file, "w") as _fp:
+            json.dump([{"name": "Sonny", "age": "43"}], _fp)
+        _db = JSONDatabase(_file)
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer)])
+        with pytest.raises(TypeError):
+            _db.load(streaming=True)
+
+    def test_load_streaming_invalid_json(self, tmp_path):
+        _file = tmp_path / "database.json"
+        with open(_file, "w") as _fp:
+            _fp.write('[{"name": "Sonny", "age": 43} {"name": "Lenny"}]')
+        _db = JSONDatabase(_file)
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer)])
+        with pytest.raises(ValueError):
+            _db.load(streaming=True)
+
     def test_load_invalid_file(self, tmp_path):
         _file = tmp_path / "database.json"
         assert not _file.exists()
@@ -293,6 +414,279 @@ class TestDatBaseBaseJson:
         with pytest.raises(FileNotFoundError):
             _db.load()
 
+    def test_bulk_insert_update_upsert(self):
+        _db = JSONDatabase()
+        _db.set_valid_keys([Key("name", primary=True), Key("age", type=KeyType.Integer)])
+        _db.create_index("age")
+        assert _db.insert_many([_db.create_entry(name="Harold", age=82),
+                                _db.create_entry(name="Linda", age=43)]) is True
+        assert _db.entry_primary_values() == ("Harold", "Linda")
+        with pytest.raises(ValueError):
+            _db.insert_many([_db.create_entry(name="Oscar"), _db.create_entry(name="Harold")])
+        assert "Oscar" not in _db
+        assert _db.update_many([_db.create_entry(name="Linda", age=44)]) is True
+        assert _db.get("Linda", "age") == 44
+        with pytest.raises(ValueError):
+            _db.update_many([_db.create_entry(name="Oscar", age=1)])
+        assert _db.upsert_many([_db.create_entry(name="Harold", age=83),
+                                _db.create_entry(name="Oscar", age=44)]) is True
+        assert _db.get("Harold", "age") == 83
+        assert sorted(_item["name"] for _item in _db.find(filter_by={"age": 44})) == ["Linda", "Oscar"]
+
+    def test_create_entry_validates(self):
+        _db = JSONDatabase()
+        _db.set_valid_keys([Key("name", primary=True), Key("age", type=KeyType.Integer)])
+        with pytest.raises(ValueError):
+            _db.create_entry(age=12)
+        with pytest.raises(ValueError):
+            _db.create_entry(name="Harold", height=180)
+        with pytest.raises(TypeError):
+            _db.create_entry(name="Harold", age="82")
+
+    def test_find_fields(self):
+        _db = JSONDatabase()
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer),
+            Key("removed", type=KeyType.Boolean)])
+        for _ix in range(5):
+            _db.insert(name=f"Person{_ix}", age=_ix, removed=_ix > 2)
+        assert _db.find(fields=["name"], sort_by_key="age", reversed_sort=True, limit=2) == \
+               [dict(name="Person4"), dict(name="Person3")]
+        _iter = _db.iter_find(filter_by={"removed": False}, fields=["name", "removed"])
+        assert next(_iter) == dict(name="Person0", removed=False)
+        assert len(list(_iter)) == 2
+        with pytest.raises(ValueError):
+            _db.find(fields=["height"])
+
+
+class TestJSONDatabaseJournal:
+    def _create_db(self, path, compact_size=None) -> JSONDatabase:
+        _db = JSONDatabase(path, use_journal=True, journal_compact_size=compact_size)
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer)])
+        _db.load()
+        return _db
+
+    def _write_file(self, tmp_path, items):
+        _file = tmp_path / "database.json"
+        with open(_file, "w") as _fp:
+            json.dump(items, _fp)
+        return _file
+
+    def test_save_appends_to_journal(self, tmp_path):
+        _file = self._write_file(tmp_path, [{"name": "Sonny", "age": 43}])
+        _db = self._create_db(_file)
+        _db.insert(name="Lenny", age=12)
+        _db.update("Sonny", age=44)
+        assert _db.save(create_backup=False) is True
+        with open(_file, "r") as _fp:
+            assert json.load(_fp) == [{"name": "Sonny", "age": 43}]
+        with open(_db.journal_path, "r") as _fp:
+            assert len(_fp.readlines()) == 2
+        _db = self._create_db(_file)
+        assert _db.get("Sonny", "age") == 44
+        assert _db.get("Lenny", "age") == 12
+
+    def test_save_compacts_journal(self, tmp_path):
+        _file = self._write_file(tmp_path, [{"name": "Sonny", "age": 43}])
+        _db = self._create_db(_file, compact_size=200)
+        for _ix in range(10):
+            _db.insert(name=f"Person{_ix}", age=_ix)
+            assert _db.save(create_backup=False) is True
+        assert _db.journal_path.stat().st_size < 200
+        _db = self._create_db(_file)
+        assert len(_db.entry_primary_values()) == 11
+        with open(_file, "r") as _fp:
+            assert len(json.load(_fp)) > 1
+
+    def test_replay_renamed_entry(self, tmp_path):
+        _file = self._write_file(tmp_path, [{"name": "Sonny", "age": 43}])
+        _db = self._create_db(_file)
+        _db.update("Sonny", name="Sunny")
+        _db.save(create_backup=False)
+        _db = self._create_db(_file)
+        assert _db.entry_primary_values() == ("Sunny",)
+        assert _db.get("Sunny", "age") == 43
+
+    def test_replay_ignores_incomplete_line(self, tmp_path):
+        _file = self._write_file(tmp_path, [{"name": "Sonny", "age": 43}])
+        _db = self._create_db(_file)
+        _db.insert(name="Lenny", age=12)
+        _db.save(create_backup=False)
+        with open(_db.journal_path, "a") as _fp:
+            _fp.write('{"op": "put", "data": {"name": "Ev')
+        _db = self._create_db(_file)
+        assert _db.entry_primary_values() == ("Sonny", "Lenny")
+
+    def test_bulk_insert_saves_once(self, tmp_path):
+        _file = self._write_file(tmp_path, [{"name": "Sonny", "age": 43}])
+        _db = self._create_db(_file)
+        assert _db.insert_many([_db.create_entry(name=f"Person{_ix}", age=_ix) for _ix in range(10)]) is True
+        with open(_db.journal_path, "r") as _fp:
+            assert len(_fp.readlines()) == 10
+        _db = self._create_db(_file)
+        assert len(_db.entry_primary_values()) == 11
+
+
+class TestJSONDatabaseCompact:
+    def _create_db(self) -> JSONDatabase:
+        _db = JSONDatabase(compact=True)
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer),
+            Key("city")])
+        return _db
+
+    def test_insert_and_get(self):
+        _db = self._create_db()
+        assert _db.insert(name="Harold", age=82, city="Gothenburg") is True
+        assert _db.insert(name="Linda", city="Gothenburg") is True
+        assert isinstance(_db.get_entry("Harold"), CompactEntry)
+        assert _db.get("Harold", "age") == 82
+        assert _db.get("Linda", "age") is None
+        assert _db.get_entry("Linda").data() == {"name": "Linda", "city": "Gothenburg"}
+        assert _db.get_entry("Harold").get("city") is _db.get_entry("Linda").get("city")
+
+    def test_entry_has_no_dict_slot(self):
+        class _TwoSlots:
+            __slots__ = ("a", "b")
+
+        _db = self._create_db()
+        _db.insert(name="Harold", age=82, city="Gothenburg")
+        _entry = _db.get_entry("Harold")
+        assert not hasattr(_entry, "_data")
+        assert sys.getsizeof(_entry) == sys.getsizeof(_TwoSlots())
+
+    def test_update(self):
+        _db = self._create_db()
+        _db.insert(name="Harold", age=82)
+        _db.create_index("age")
+        assert _db.update("Harold", age=12, city=None) is True
+        assert _db.get_entry("Harold").data() == {"name": "Harold", "age": 12, "city": None}
+        assert [e["name"] for e in _db.find(filter_by={"age": 12})] == ["Harold"]
+        with pytest.raises(ValueError):
+            _db.get_entry("Harold").update("height", 180)
+
+    def test_equals_dict_entry(self):
+        _db = self._create_db()
+        _db_dict = JSONDatabase()
+        _db_dict.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer),
+            Key("city")])
+        for _d in (_db, _db_dict):
+            _d.insert(name="Harold", age=82)
+        assert _db.get_entry("Harold") == _db_dict.get_entry("Harold")
+        assert _db.find() == _db_dict.find()
+
+
+class TestSQLiteDatabase:
+    def _create_db(self, path) -> SQLiteDatabase:
+        _db = SQLiteDatabase(path, table_name="people")
+        _db.set_valid_keys([
+            Key("name", primary=True),
+            Key("age", type=KeyType.Integer),
+            Key("retired", type=KeyType.Boolean),
+            Key("pets", type=KeyType.List)])
+        _db.load()
+        return _db
+
+    def test_insert_and_get(self, tmp_path):
+        _db = self._create_db(tmp_path / "db.sqlite")
+        assert _db.insert(name="Harold", age=82, retired=True, pets=["cat", "dog"]) is True
+        assert _db.insert(name="Linda") is True
+        assert "Harold" in _db
+        assert "Andrea" not in _db
+        assert _db.get("Harold", "age") == 82
+        assert _db.get("Harold", "retired") is True
+        assert _db.get("Harold", "pets") == ["cat", "dog"]
+        assert _db.get_entry("Linda").data() == {"name": "Linda"}
+        assert _db.entry_primary_values() == ("Harold", "Linda")
+        with pytest.raises(ValueError):
+            _db.insert(name="Harold", age=12)
+
+    def test_update(self, tmp_path):
+        _db = self._create_db(tmp_path / "db.sqlite")
+        _db.insert(name="Harold", age=82)
+        assert _db.update("Harold", age=12, retired=False) is True
+        assert _db.get("Harold", "age") == 12
+        assert _db.get("Harold", "retired") is False
+
+    def test_find(self, tmp_path):
+        _db = self._create_db(tmp_path / "db.sqlite")
+        for _ix in range(10):
+            _db.insert(name=f"Person{_ix}", age=_ix, retired=_ix % 2 == 0)
+        _db.create_index("retired")
+        _res = _db.find(filter_by={"retired": True}, sort_by_key="age", reversed_sort=True, limit=3)
+        assert [r["name"] for r in _res] == ["Person8", "Person6", "Person4"]
+        assert len(_db.find()) == 10
+        assert _db.find(filter_by={"pets": None, "age": 3}) == [dict(name="Person3", age=3, retired=False)]
+        with pytest.raises(ValueError):
+            _db.find(sort_by_key="height")
+
+    def test_find_fields(self, tmp_path):
+        _db = self._create_db(tmp_path / "db.sqlite")
+        for _ix in range(5):
+            _db.insert(name=f"Person{_ix}", age=_ix, retired=_ix % 2 == 0)
+        _res = _db.find(filter_by={"retired": True}, sort_by_key="age", fields=["name"])
+        assert _res == [dict(name="Person0"), dict(name="Person2"), dict(name="Person4")]
+        assert list(_db.iter_find(filter_by={"age": 1}, fields=["name", "retired"])) == \
+               [dict(name="Person1", retired=False)]
+        with pytest.raises(ValueError):
+            _db.find(fields=["height"])
+
+    def test_find_duplicates(self, tmp_path):
+        _db = self._create_db(tmp_path / "db.sqlite")
+        _db.insert(name="Harold", age=55)
+        _db.insert(name="Linda", age=55)
+        _db.insert(name="Oscar", age=32)
+        _db.insert(name="Nina")
+        _db.insert(name="Ivy")
+        assert _db.find_duplicates("age") == {55: ["Harold", "Linda"]}
+
+    def test_persists(self, tmp_path):
+        _db = self._create_db(tmp_path / "db.sqlite")
+        _db.insert(name="Harold", age=55)
+        _db = self._create_db(tmp_path / "db.sqlite")
+        assert _db.get("Harold", "age") == 55
+
+    def test_episode_database(self, tmp_path):
+        _db = EpisodeDatabase(file_path=tmp_path / "media.sqlite", use_sqlite_db=True)
+        _db.add(filename="new_cool_show_s01e02.mkv", season_number=1, episode_number=2, tvshow="New Cool Show",
+                scanned=123)
+        assert "new_cool_show_s01e02.mkv" in _db
+        _db.mark_removed("new_cool_show_s01e02.mkv")
+        assert _db.is_removed("new_cool_show_s01e02.mkv") is True
+        assert [e["filename"] for e in _db.last_removed(limit=10)] == ["new_cool_show_s01e02.mkv"]
+        _movie_db = MovieDatabase(file_path=tmp_path / "media.sqlite", use_sqlite_db=True)
+        assert list(_movie_db.all_movies()) == []
+
+    def test_add_many_skips_duplicates(self, tmp_path):
+        _db = EpisodeDatabase(file_path=tmp_path / "media.sqlite", use_sqlite_db=True)
+        _ep = dict(filename="Show.S01E01.mkv", season_number=1, episode_number=1, tvshow="Show", scanned=123)
+        _ep2 = dict(filename="Show.S01E02.mkv", season_number=1, episode_number=2, tvshow="Show", scanned=123)
+        assert _db.add_many([_ep2, _ep, dict(_ep, tvshow="Other Show")]) is True
+        assert "Show.S01E01.mkv" in _db
+        assert "Show.S01E02.mkv" in _db
+        assert [_e["tvshow"] for _e in _db.last_added(limit=10)] == ["Show", "Show"]
+
+    def test_bulk_insert_update_upsert(self, tmp_path):
+        _db = self._create_db(tmp_path / "db.sqlite")
+        assert _db.insert_many([_db.create_entry(name="Harold", age=82, pets=["cat"]),
+                                _db.create_entry(name="Linda", age=43)]) is True
+        with pytest.raises(ValueError):
+            _db.insert_many([_db.create_entry(name="Oscar"), _db.create_entry(name="Harold")])
+        assert "Oscar" not in _db
+        assert _db.update_many([_db.create_entry(name="Linda", retired=True)]) is True
+        assert _db.get("Linda", "retired") is True
+        assert _db.upsert_many([_db.create_entry(name="Harold", age=83),
+                                _db.create_entry(name="Oscar", age=12)]) is True
+        assert _db.get("Harold", "age") == 83
+        assert _db.get("Harold", "pets") == ["cat"]
+        assert _db.get("Oscar", "age") == 12
+
 
 class TestMovieDatabaseJSON:
     def _gen_list(self, items=100):
@@ -354,6 +748,20 @@ class TestMovieDatabaseJSON:
         assert len(list(_db.all_movies())) == 21
 
 
+    def test_find_duplicates(self, tmp_path):
+        _file = tmp_path / "database.json"
+        _items = self._gen_list(items=20)
+        _items[0]["imdb"] = _items[1]["imdb"] = _items[2]["imdb"] = "tt0106062"
+        _items[3]["imdb"] = _items[4]["imdb"] = "tt0944947"
+        _items[4]["removed"] = True
+        with open(_file, "w") as _fp:
+            json.dump(_items, _fp)
+        _db = MovieDatabase(file_path=_file, use_json_db=True)
+        _dupes = _db.find_duplicates()
+        assert list(_dupes.keys()) == ["tt0106062"]
+        assert sorted(_dupes["tt0106062"]) == [_items[ix]["folder"] for ix in range(3)]
+
+
 class TestShowDatabaseJSON:
     def _gen_list(self, items=100):
         _ret = []
@@ -629,6 +1037,24 @@ class TestMongoDatabase:
         _db.update("Linda", Age=33)
         assert _db.get("Linda", "Age") == 33
 
+    @mongomock.patch(servers=(("mocked.server.com", 27017),))
+    def test_create_index(self):
+        client = pymongo.MongoClient("mocked.server.com")
+        client.test_db.test_collection.insert_many(self._gen_items(10))
+        _settings = MongoDbSettings(
+            ip="mocked.server.com",
+            username="none",
+            password="none",
+            collection_name="test_collection",
+            database_name="test_db"
+        )
+        _db = MongoDatabase(settings=_settings)
+        _db.set_valid_keys([Key("Name"), Key("Age", type=KeyType.Integer)])
+        assert _db.create_index("Age") is True
+        assert "Age_1" in client.test_db.test_collection.index_information()
+        with pytest.raises(ValueError):
+            _db.create_index("Height")
+
     @mongomock.patch(servers=(("mocked.server.com", 27017),))
     def test_find_duplicates(self):
         client = pymongo.MongoClient("mocked.server.com")
@@ -663,3 +1089,200 @@ class TestMongoDatabase:
         assert len(age_28_list) == 3
         for name in ["Carl", "Ivy", "Nina"]:
             assert name in age_28_list
+
+    @mongomock.patch(servers=(("mocked.server.com", 27017),))
+    def test_find_fields(self):
+        client = pymongo.MongoClient("mocked.server.com")
+        client.test_db.test_collection.insert_many([dict(Name="Harold", Age=55), dict(Name="Linda", Age=32)])
+        _settings = MongoDbSettings(
+            ip="mocked.server.com",
+            username="none",
+            password="none",
+            collection_name="test_collection",
+            database_name="test_db"
+        )
+        _db = MongoDatabase(settings=_settings)
+        _db.set_valid_keys([
+            Key("Name", primary=True),
+            Key("Age", type=KeyType.Integer)])
+        assert _db.find(fields=["Name"], sort_by_key="Age") == [dict(Name="Linda"), dict(Name="Harold")]
+        assert list(_db.iter_find(filter_by={"Age": 55})) == [dict(Name="Harold", Age=55)]
+        assert _db.entry_primary_values() == ("Harold", "Linda")
+
+    @mongomock.patch(servers=(("mocked.server.com", 27017),))
+    def test_bulk_insert(self):
+        client = pymongo.MongoClient("mocked.server.com")
+        client.test_db.test_collection.insert_many([dict(Name="Harold", Age=55)])
+        _settings = MongoDbSettings(
+            ip="mocked.server.com",
+            username="none",
+            password="none",
+            collection_name="test_collection",
+            database_name="test_db"
+        )
+        _db = MongoDatabase(settings=_settings)
+        _db.set_valid_keys([
+            Key("Name", primary=True),
+            Key("Age", type=KeyType.Integer)])
+        _entries = [_db.create_entry(Name="Linda", Age=32), _db.create_entry(Name="Oscar", Age=28)]
+        assert _db.insert_many(_entries) is True
+        assert "_id" not in _entries[0].data()
+        assert _db.get("Oscar", "Age") == 28
+        with pytest.raises(ValueError):
+            _db.insert_many([_db.create_entry(Name="Nina"), _db.create_entry(Name="Harold")])
+        assert "Nina" not in _db
+        assert client.test_db.test_collection.count_documents({}) == 3
+
+
+    @mongomock.patch(servers=(("mocked.server.com", 27017),))
+    def test_shared_client(self):
+        client = pymongo.MongoClient("mocked.server.com")
+        client.test_db.test_collection.insert_many(self._gen_items(10))
+        client.test_db.other_collection.insert_many(self._gen_items(10))
+        _settings = MongoDbSettings(
+            ip="mocked.server.com",
+            username="none",
+            password="none",
+            collection_name="test_collection",
+            database_name="test_db"
+        )
+        _stats = MongoClientRegistry().stats()
+        _db1 = MongoDatabase(settings=_settings)
+        _db2 = MongoDatabase(settings=_settings)
+        _settings.collection_name = "other_collection"
+        _db3 = MongoDatabase(settings=_settings)
+        assert _db1._client is _db2._client is _db3._client
+        _new_stats = MongoClientRegistry().stats()
+        assert _new_stats["clients"] == 1
+        assert _new_stats["clients_created"] - _stats["clients_created"] == 1
+        assert _new_stats["clients_reused"] - _stats["clients_reused"] == 2
+        assert _new_stats["probes"] - _stats["probes"] == 2
+        assert _new_stats["probes_skipped"] - _stats["probes_skipped"] == 1
+        assert "mocked.server.com:27017" in _new_stats["pools"]
+
+    @mongomock.patch(servers=(("mocked.server.com", 27017),))
+    def test_replace_many_removes_extra_keys(self, mocker):
+        client = pymongo.MongoClient("mocked.server.com")
+        client.test_db.test_collection.insert_many([dict(Name="Harold", Age=55, Legacy="x"), dict(Name="Linda")])
+        _settings = MongoDbSettings(
+            ip="mocked.server.com",
+            username="none",
+            password="none",
+            collection_name="test_collection",
+            database_name="test_db"
+        )
+        _db = MongoDatabase(settings=_settings)
+        _db.set_valid_keys([Key("Name", primary=True), Key("Age", type=KeyType.Integer)])
+        _source = [dict(Name="Harold", Age=56), dict(Name="Linda")]
+        _diff = diff_entries(_source, _db.find(), primary_key="Name")
+        assert _diff.changed == ["Harold"]
+        _collection = _db._collection
+        _calls = []
+
+        def _bulk_write(operations, ordered=True):
+            # mongomock can not run pymongo's ReplaceOne in bulk_write, apply the operations one by one
+            _calls.append((len(operations), ordered))
+            _results = [_collection.replace_one(_op._filter, _op._doc, upsert=_op._upsert) for _op in operations]
+            return BulkWriteResult({"nMatched": sum(_r.matched_count for _r in _results),
+                                    "nModified": sum(_r.modified_count for _r in _results)}, acknowledged=True)
+
+        mocker.patch.object(_collection, "bulk_write", side_effect=_bulk_write)
+        _entries = [_db.create_entry(**_source[0]), _db.create_entry(Name="Oscar", Age=1)]
+        assert _db.replace_many(_entries) == dict(matched=1, modified=1)
+        assert _calls == [(2, False)]
+        assert _db.get_entry("Oscar") is None
+        assert _db.get_entry("Harold").data() == dict(Name="Harold", Age=56)
+        _diff = diff_entries(_source, _db.find(), primary_key="Name")
+        assert (_diff.changed, _diff.unchanged) == ([], 2)
+
+    @mongomock.patch(servers=(("mocked.server.com", 27017),))
+    def test_create_index_once_per_process(self):
+        client = pymongo.MongoClient("mocked.server.com")
+        client.test_db.test_collection.insert_many(self._gen_items(10))
+        _settings = MongoDbSettings(
+            ip="mocked.server.com",
+            username="none",
+            password="none",
+            collection_name="test_collection",
+            database_name="test_db"
+        )
+        _stats = MongoClientRegistry().stats()
+        for _ in range(3):
+            _db = MongoDatabase(settings=_settings)
+            _db.set_valid_keys([Key("Name", primary=True), Key("Age", type=KeyType.Integer)])
+            assert _db.create_index("Age") is True
+        _new_stats = MongoClientRegistry().stats()
+        assert _new_stats["indexes_created"] - _stats["indexes_created"] == 1
+        assert _new_stats["indexes_skipped"] - _stats["indexes_skipped"] == 2
+        assert "Age_1" in client.test_db.test_collection.index_information()
+
+    @mongomock.patch(servers=(("mocked.server.com", 27017),))
+    def test_create_index_retried_after_failure(self, mocker):
+        client = pymongo.MongoClient("mocked.server.com")
+        client.test_db.test_collection.insert_many(self._gen_items(10))
+        _settings = MongoDbSettings(
+            ip="mocked.server.com",
+            username="none",
+            password="none",
+            collection_name="test_collection",
+            database_name="test_db"
+        )
+        _db = MongoDatabase(settings=_settings)
+        _db.set_valid_keys([Key("Name", primary=True), Key("Age", type=KeyType.Integer)])
+        _create_index = mocker.patch.object(type(_db._collection), "create_index",
+                                            side_effect=[OperationFailure("not authorized"), "Age_1"])
+        assert _db.create_index("Age") is False
+        assert _db.create_index("Age") is True
+        assert _db.create_index("Age") is True
+        assert _create_index.call_count == 2
+
+
+class TestDatabaseDiff:
+    def test_entry_hash_ignores_key_order(self):
+        assert entry_hash({"name": "Harold", "age": 82}) == entry_hash({"age": 82, "name": "Harold"})
+        assert entry_hash({"name": "Harold", "age": 82}) != entry_hash({"name": "Harold", "age": 83})
+
+    def test_diff_entries(self):
+        _source = [dict(name="Harold", age=82), dict(name="Linda", age=43), dict(name="Oscar")]
+        _target = [dict(age=82, name="Harold"), dict(name="Linda", age=44), dict(name="Nina")]
+        _diff = diff_entries(_source, _target, primary_key="name")
+        assert _diff.added == ["Oscar"]
+        assert _diff.removed == ["Nina"]
+        assert _diff.changed == ["Linda"]
+        assert _diff.unchanged == 1
+
+
+class TestFileSystemIndex:
+    def _create_tree(self, root):
+        for _season in ("S01", "S02"):
+            _dir = root / "Show" / _season
+            _dir.mkdir(parents=True)
+            for _ep in range(1, 4):
+                (_dir / f"Show.{_season}E0{_ep}.720p-GRP.mkv").touch()
+            (_dir / "info.nfo").touch()
+        (root / "Other Show").mkdir()
+
+    def test_refresh_and_files(self, tmp_path):
+        _root = tmp_path / "tv"
+        self._create_tree(_root)
+        _index = FileSystemIndex(_root, tmp_path / "index.json")
+        _stats = _index.refresh()
+        assert _stats.dirs_scanned == 5
+        assert sorted(p.name for p in _index.sub_dirs()) == ["Other Show", "Show"]
+        assert len(list(_index.files(extensions=[".mkv"]))) == 6
+        assert len(list(_index.files("Show/S01"))) == 4
+        assert _root / "Show" / "S02" / "Show.S02E01.720p-GRP.mkv" in _index.files(_root / "Show")
+
+    def test_refresh_only_changed(self, tmp_path):
+        _root = tmp_path / "tv"
+        self._create_tree(_root)
+        FileSystemIndex(_root, tmp_path / "index.json").refresh()
+        (_root / "Show" / "S02" / "Show.S02E04.720p-GRP.mkv").touch()
+        shutil.rmtree(_root / "Other Show")
+        _index = FileSystemIndex(_root, tmp_path / "index.json")
+        _stats = _index.refresh()
+        assert _stats.dirs_checked == 4
+        assert _stats.dirs_scanned == 2  # root and S02
+        assert _stats.dirs_removed == 1
+        assert len(list(_index.files(extensions=[".mkv"]))) == 7
+        assert _index.refresh().dirs_scanned == 0
@@ -0,0 +1,152 @@
+import json
+import sqlite3
+import urllib.error
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from media.online_search import tvmaze
+from media.online_search.omdb import OMDb
+from media.online_search.http_cache import HttpCache
+from media.online_search.memory_cache import LRUCache
+from media.online_search.request import fetch
+from media.online_search.transport import UrllibTransport, set_default_transport
+from media.online_search.scheduler import RequestScheduler
+from media.show import ShowData
+
+URL = "http://api.tvmaze.com/singlesearch/shows?q=Some+Cool+Show"
+
+
+@pytest.fixture(autouse=True)
+def urllib_transport():
+    # requests are mocked at urllib.request.urlopen
+    set_default_transport(UrllibTransport())
+    yield
+    set_default_transport(None)
+
+
+@pytest.fixture(autouse=True)
+def unlimited_scheduler(monkeypatch):
+    # no rate limit shared between tests
+    monkeypatch.setattr(tvmaze.TvMaze, "_scheduler", RequestScheduler())
+
+
+class TestHttpCache:
+    def test_put_get(self, tmp_path):
+        _cache = HttpCache(tmp_path / "cache.db")
+        assert _cache.get(URL) is None
+        _cache.put(URL, {"id": 123}, ttl=60, etag='"abc"')
+        _res = _cache.get(URL)
+        assert json.loads(_res.body) == {"id": 123}
+        assert _res.fresh is True
+        assert _res.etag == '"abc"'
+        _cache.put(URL, "[]", ttl=-1)
+        assert _cache.get(URL).fresh is False
+        _stats = HttpCache(tmp_path / "cache.db").stats()  # persisted
+        assert (_stats["hits"], _stats["misses"], _stats["stale"], _stats["stores"]) == (1, 1, 1, 2)
+        assert _stats["entries"] == 1
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        _cache = HttpCache(tmp_path / "cache.db", max_bytes=250)
+        for _ix in range(3):
+            _cache.put(f"{URL}{_ix}", b"x" * 100, ttl=60)
+            _cache.get(f"{URL}0")
+        assert _cache.get(f"{URL}0") is not None
+        assert _cache.get(f"{URL}1") is None
+        assert _cache.get(f"{URL}2") is not None
+        assert _cache.stats()["evictions"] == 1
+
+
+    def test_key_without_apikey(self, tmp_path):
+        _url = "http://www.omdbapi.com?apikey=secret&type=movie&i=tt0111161"
+        _conn = sqlite3.connect(str(tmp_path / "cache.db"))
+        HttpCache(tmp_path / "cache.db")
+        with _conn:
+            _conn.execute("INSERT INTO responses VALUES (?, ?, NULL, NULL, NULL, 0, 2)", (_url, b"{}"))
+        _cache = HttpCache(tmp_path / "cache.db")
+        assert _cache.stats()["entries"] == 0  # stored with the key by an earlier version
+        _cache.put(_url, {"Title": "The Shawshank Redemption"}, ttl=60)
+        assert _cache.get("http://www.omdbapi.com?apikey=other&type=movie&i=tt0111161") is not None
+        assert [_row[0] for _row in _conn.execute("SELECT url FROM responses")] == \
+               ["http://www.omdbapi.com?type=movie&i=tt0111161"]
+        _conn.close()
+
+class TestLRUCache:
+    def test_max_entries(self):
+        _cache = LRUCache(max_entries=2)
+        _cache["a"], _cache["b"] = 1, 2
+        assert _cache.get("a") == 1
+        _cache["c"] = 3
+        assert "b" not in _cache
+        assert _cache.get("b") is None
+        assert (_cache.get("a"), _cache.get("c")) == (1, 3)
+        _stats = _cache.stats()
+        assert (_stats["hits"], _stats["misses"], _stats["evictions"], _stats["entries"]) == (3, 1, 1, 2)
+
+    def test_max_bytes(self):
+        _cache = LRUCache(max_entries=100, max_bytes=30)
+        for _ix in range(3):
+            _cache[_ix] = {"name": "x" * 5}  # 16 bytes as json
+        assert len(_cache) == 1
+        assert _cache.get(2) == {"name": "xxxxx"}
+        assert _cache.stats()["bytes"] == 16
+        assert _cache.stats()["evictions"] == 2
+
+    def test_instances_do_not_share_results(self, mocker: MockerFixture):
+        urllib_mock = mocker.patch("urllib.request.urlopen")
+        urllib_mock.return_value.getcode.return_value = 200
+        urllib_mock.return_value.read.return_value = b'{"id": 1, "name": "Some Cool Show"}'
+        for _ in range(2):
+            _tvmaze = tvmaze.TvMaze(use_cache=True)
+            _tvmaze.show_search(ShowData(title="Some Cool Show"))
+            _tvmaze.show_search(ShowData(title="Some Cool Show"))
+            assert _tvmaze.memory_cache_stats()["hits"] == 1
+        assert urllib_mock.call_count == 2
+
+
+class TestFetch:
+    def test_preloaded_no_network(self, tmp_path, mocker: MockerFixture):
+        urllib_mock = mocker.patch("urllib.request.urlopen")
+        _cache = HttpCache(tmp_path / "cache.db")
+        _cache.preload(URL, {"id": 123, "name": "Some Cool Show"})
+        _tvmaze = tvmaze.TvMaze(http_cache=_cache)
+        res = _tvmaze.show_search(ShowData(title="Some Cool Show"))
+        assert res.title == "Some Cool Show"
+        urllib_mock.assert_not_called()
+
+    def test_stores_response(self, tmp_path, mocker: MockerFixture):
+        urllib_mock = mocker.patch("urllib.request.urlopen")
+        urllib_mock.return_value.getcode.return_value = 200
+        urllib_mock.return_value.read.return_value = b'{"id": 1}'
+        urllib_mock.return_value.headers = {"ETag": '"v1"'}
+        _cache = HttpCache(tmp_path / "cache.db")
+        assert fetch(URL, cache=_cache, ttl=60) == b'{"id": 1}'
+        assert fetch(URL, cache=_cache, ttl=60) == b'{"id": 1}'
+        assert urllib_mock.call_count == 1
+        assert _cache.get(URL).etag == '"v1"'
+
+    def test_revalidates_stale(self, tmp_path, mocker: MockerFixture):
+        urllib_mock = mocker.patch("urllib.request.urlopen")
+        urllib_mock.side_effect = urllib.error.HTTPError(URL, 304, "Not Modified", {}, None)
+        _cache = HttpCache(tmp_path / "cache.db")
+        _cache.put(URL, b'{"id": 1}', ttl=-1, etag='"v1"')
+        assert fetch(URL, cache=_cache, ttl=60) == b'{"id": 1}'
+        _request = urllib_mock.call_args[0][0]
+        assert _request.get_header("If-none-match") == '"v1"'
+        assert _cache.get(URL).fresh is True
+        assert _cache.stats()["revalidated"] == 1
+
+    def test_omdb_error_not_stored(self, tmp_path, mocker: MockerFixture):
+        urllib_mock = mocker.patch("urllib.request.urlopen")
+        urllib_mock.return_value.getcode.return_value = 200
+        urllib_mock.return_value.read.return_value = b'{"Response": "False", "Error": "Request limit reached!"}'
+        urllib_mock.return_value.headers = {}
+        _cache = HttpCache(tmp_path / "cache.db")
+        _url = "http://www.omdbapi.com?apikey=secret&type=movie&i=tt0111161"
+        for _ in range(2):
+            fetch(_url, cache=_cache, ttl=60, cacheable=OMDb._cacheable)
+        assert urllib_mock.call_count == 2
+        assert _cache.get(_url) is None
+        urllib_mock.return_value.read.return_value = b'{"Response": "True", "Title": "The Shawshank Redemption"}'
+        fetch(_url, cache=_cache, ttl=60, cacheable=OMDb._cacheable)
+        assert _cache.get(_url) is not None
@@ -0,0 +1,121 @@
+import gzip
+import json
+import socket
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from media.online_search import tvmaze
+from media.online_search.request import fetch
+from media.online_search.transport import PooledTransport
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+    responses = {}
+    redirects = {}
+
+    def setup(self):
+        StubHandler.connections += 1
+        BaseHTTPRequestHandler.setup(self)
+
+    def do_GET(self):
+        if self.path in self.redirects:
+            self.send_response(301)
+            self.send_header("Location", self.redirects[self.path])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path not in self.responses:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        _body = json.dumps(self.responses[self.path]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", '"v1"')
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            _body = gzip.compress(_body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(_body)))
+        self.end_headers()
+        self.wfile.write(_body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubHandler.connections = 0
+    StubHandler.responses = {
+        "/shows/1": {"id": 1, "name": "Some Cool Show"},
+        "/shows/1/episodes": [{"id": 11, "season": 1, "number": 2, "name": "Pilot 2",
+                               "_links": {"self": {"href": "http://localhost/episodes/11"}}}],
+    }
+    StubHandler.redirects = {"/lookup/shows?imdb=tt0000001": "/shows/1", "/loop": "/loop"}
+    _server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    _thread = threading.Thread(target=_server.serve_forever, daemon=True)
+    _thread.start()
+    yield f"http://127.0.0.1:{_server.server_address[1]}"
+    _server.shutdown()
+    _server.server_close()
+
+
+class TestPooledTransport:
+    def test_reuses_connection(self, stub_server):
+        _transport = PooledTransport()
+        for _ in range(3):
+            _resp = _transport.get(f"{stub_server}/shows/1")
+            assert _resp.status == 200
+            assert json.loads(_resp.body) == {"id": 1, "name": "Some Cool Show"}  # gzip decoded
+            assert _resp.header("ETag") == '"v1"'
+        _stats = _transport.stats()
+        assert (_stats["requests"], _stats["connections_opened"], _stats["connections_reused"]) == (3, 1, 2)
+        assert StubHandler.connections == 1
+        assert len(_transport.latencies()) == 3
+        assert _stats["latency_max"] > 0
+        _transport.close()
+
+    def test_reconnects_closed_connection(self, stub_server):
+        _transport = PooledTransport()
+        _transport.get(f"{stub_server}/shows/1")
+        for _conns in _transport._idle.values():
+            for _conn in _conns:
+                _conn.sock.shutdown(socket.SHUT_RDWR)  # as if the server closed the idle connection
+        assert _transport.get(f"{stub_server}/shows/1").status == 200
+        _transport.close()
+
+    def test_follows_redirect(self, stub_server):
+        _transport = PooledTransport()
+        _resp = _transport.get(f"{stub_server}/lookup/shows?imdb=tt0000001")
+        assert _resp.status == 200
+        assert json.loads(_resp.body) == {"id": 1, "name": "Some Cool Show"}
+        assert json.loads(fetch(f"{stub_server}/lookup/shows?imdb=tt0000001", transport=_transport))["id"] == 1
+        assert _transport.stats()["connections_opened"] == 1
+        _transport.close()
+
+    def test_redirect_limit(self, stub_server):
+        _transport = PooledTransport()
+        assert _transport.get(f"{stub_server}/loop").status == 301
+        assert StubHandler.connections == 1
+        with pytest.raises(ConnectionError):
+            fetch(f"{stub_server}/loop", transport=_transport)
+        _transport.close()
+
+    def test_fetch_not_found(self, stub_server):
+        with pytest.raises(ConnectionError):
+            fetch(f"{stub_server}/shows/2", transport=PooledTransport())
+
+    def test_tvmaze(self, stub_server):
+        _transport = PooledTransport()
+        _tvmaze = tvmaze.TvMaze(use_cache=False, transport=_transport)
+        _tvmaze.URL = stub_server
+        _res = _tvmaze.episode_search(tvmaze.TvMazeId(1, media_type=tvmaze.MediaType.Show),
+                                      season_num=1, episode_num=2)
+        assert _res.title == "Pilot 2"
+        assert _transport.stats()["connections_opened"] == 1
+        _transport.close()
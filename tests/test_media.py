@@ -3,7 +3,8 @@ from string import ascii_letters
 
 from media.movie import Movie, MovieData
 from media.show import Show, ShowData
-from media.regex import parse_season_and_episode, parse_year, parse_quality, parse_show_title_from_episode
+from media.regex import parse_season_and_episode, parse_year, parse_quality, parse_show_title_from_episode, \
+    ReleaseNameParser
 import config
 
 
@@ -46,6 +47,17 @@ class TestRegex:
         _str = "Tower.of.the.Dragoon.S01E08.The.Lord.of.Flutes.2160p.ZMAX.WEB-DL.DDP5.1.DoVi.HEVC-BTn"
         assert parse_show_title_from_episode(_str) == "Tower of the Dragoon"
 
+    def test_release_name_parser(self):
+        _parser = ReleaseNameParser(cache_size=10)
+        _rel = _parser.parse("Some Show S02E05 1080p WEB H264-GRP.mkv")
+        assert (_rel.season, _rel.episode, _rel.show_title) == (2, 5, "Some Show")
+        assert (_rel.year, _rel.quality, _rel.matches_movie) == (None, "1080p", True)
+        _rel = _parser.parse("Movie.2000.2015.1080p.WEB-DL.DD5.1.H264-Grp")
+        assert (_rel.season, _rel.episode, _rel.show_title, _rel.year) == (None, None, None, 2015)
+        assert _parser.parse("Movie.2000.2015.1080p.WEB-DL.DD5.1.H264-Grp") is _rel
+        assert _parser.parse("Show.S03.720p.BluRay.x264-GRP").matches_season is True
+        assert _parser.cache_info().hits == 1
+
 
 class TestShow:
     SHOW_PATH = Path.home() / "TVShows"
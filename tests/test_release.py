@@ -0,0 +1,88 @@
+import util_movie
+import util_tv
+from media.release import ReleaseType, classify, classify_many, determine_release_type
+from media.util import Util
+
+
+class TestClassify:
+    def test_movie(self):
+        _rel = classify("Some.Cool.Movie.2007.1080p.BluRay.DTS.x264-Grp")
+        assert _rel.type == ReleaseType.MovieDir
+        assert (_rel.title, _rel.year, _rel.is_movie) == ("Some Cool Movie", 2007, True)
+        assert classify("Some.Cool.Movie.2007.1080p.BluRay.DTS.x264-Grp.mkv").type == ReleaseType.MovieFile
+
+    def test_episode(self):
+        _rel = classify("Show.Name.S04E02.iNTERNAL.1080p.WEB.H264-GRP.mkv")
+        assert _rel.type == ReleaseType.TvShowEpisodeFile
+        assert (_rel.season, _rel.episode, _rel.show) == (4, 2, "Show Name")
+        assert (_rel.is_episode, _rel.is_season, _rel.is_movie) == (True, False, False)
+        assert determine_release_type("Show.Name.S04E02.iNTERNAL.1080p.WEB.H264-GRP") == ReleaseType.TvShowEpisodeDir
+
+    def test_season(self):
+        _rel = classify("Show.Name.S04.1080p.WEB.H264-GRP")
+        assert _rel.type == ReleaseType.TvShowSeasonPackDir
+        assert (_rel.season, _rel.episode, _rel.is_season) == (4, None, True)
+
+    def test_other(self):
+        assert classify("Some.Movie.2007.SUBPACK-Grp").type == ReleaseType.SubPack
+        assert classify("Some.Movie.2007.1080p.SUBPACK-Grp").is_movie is True
+        assert classify("Packt.Learning.Python").type == ReleaseType.Education
+        assert classify("random_name").type == ReleaseType.Unknown
+
+    def test_media_util_uses_scene_patterns(self):
+        for _name, _expected in [("Some.Movie.2019.1080p.BluRay.DTS5.1-GRP", (True, False, False)),
+                                 ("Movie.Title.2010.mkv", (False, False, False)),
+                                 ("Show.S04.1080p.WEB.H264-GRP", (True, False, True)),
+                                 ("Show.S04E02.1080p.WEB.H264-GRP.mkv", (False, True, False)),
+                                 ("Show.Name.S01E01", (False, False, False)),
+                                 ("Show.S04", (False, False, False))]:
+            _rel = classify(_name)
+            assert (_rel.matches_movie, _rel.matches_episode, _rel.matches_season) == _expected
+            assert (Util.is_movie(_name), Util.is_episode(_name), Util.is_season(_name)) == _expected
+
+    def test_movie_audio_channels_not_season(self):
+        _rel = classify("Some.Movie.2019.1080p.BluRay.DTS5.1-GRP")
+        assert (_rel.is_movie, _rel.season, _rel.type) == (True, None, ReleaseType.MovieDir)
+
+    def test_movie_without_quality(self):
+        _rel = classify("Movie.Title.2010.mkv")
+        assert (_rel.is_movie, _rel.type, _rel.year) == (True, ReleaseType.MovieFile, 2010)
+        assert _rel.matches_movie is False
+
+    def test_classify_many(self):
+        _names = ["Show.S01E01.720p-GRP.mkv", "Movie.1999.720p-GRP", "Show.S01E01.720p-GRP.mkv"]
+        _releases = classify_many(_names)
+        assert list(_releases) == _names[:2]
+        assert _releases["Movie.1999.720p-GRP"] is classify("Movie.1999.720p-GRP")
+
+
+class TestUtilRules:
+    """Results of the util_tv/util_movie rules before classify, pinned"""
+
+    def test_episodes(self):
+        for _name, _type, _season_episode, _show in [
+                ("Show.Name.S01E01", ReleaseType.TvShowEpisodeDir, (1, 1), "Show Name"),
+                ("show.name.S01E02E03.1080p-grp", ReleaseType.TvShowEpisodeDir, (1, 2), "show name"),
+                ("Show Name s1e2", ReleaseType.TvShowEpisodeDir, (1, 2), "Show Name"),
+                ("show_name_s01e01.mkv", ReleaseType.TvShowEpisodeFile, (1, 1), "show_name_")]:
+            assert determine_release_type(_name) == _type
+            assert util_tv.parse_season_episode(_name) == _season_episode
+            assert (util_tv.is_episode(_name), util_tv.is_season(_name)) == (True, False)
+            assert util_tv.guess_show_name_from_episode_name(_name) == _show
+
+    def test_season_pack(self):
+        _name = "Some.Show.S01.COMPLETE.720p-GRP"
+        assert determine_release_type(_name) == ReleaseType.TvShowSeasonPackDir
+        assert util_tv.parse_season_episode(_name) == (1, None)
+        assert (util_tv.is_episode(_name), util_tv.is_season(_name), util_movie.is_movie(_name)) == \
+               (False, True, False)
+
+    def test_movies(self):
+        for _name, _type, _year, _title in [
+                ("Movie.Name.2019", ReleaseType.MovieDir, "2019", "Movie Name"),
+                ("Movie.Name.2019.mkv", ReleaseType.MovieFile, "2019", "Movie Name"),
+                ("2001.A.Space.Odyssey.1968", ReleaseType.MovieDir, "2001", "2001 A Space Odyssey")]:
+            assert determine_release_type(_name) == _type
+            assert util_movie.is_movie(_name) is True
+            assert util_movie.parse_year(_name) == _year
+            assert util_movie.determine_title(_name) == _title
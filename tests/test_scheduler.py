@@ -0,0 +1,102 @@
+import threading
+from typing import List, Dict, Optional
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from media.online_search.request import HttpStatusError
+from media.online_search.scheduler import RequestScheduler
+from media.online_search.transport import HttpTransport, TransportResponse
+
+URL = "http://api.tvmaze.com/shows/1"
+
+
+class ScriptedTransport(HttpTransport):
+    """Returns the given responses in order, the last one repeated"""
+
+    def __init__(self, responses: List[TransportResponse], block: Optional[threading.Event] = None):
+        HttpTransport.__init__(self)
+        self._responses: List[TransportResponse] = responses
+        self._block: Optional[threading.Event] = block
+        self.calls: List[Dict[str, str]] = []
+
+    def _get(self, url, headers):
+        self.calls.append(headers)
+        if self._block is not None:
+            self._block.wait(timeout=5)
+        return self._responses[min(len(self.calls), len(self._responses)) - 1]
+
+
+@pytest.fixture
+def sleep_mock(mocker: MockerFixture):
+    return mocker.patch("media.online_search.scheduler.sleep")
+
+
+class TestRequestScheduler:
+    def test_retries_rate_limited(self, sleep_mock):
+        _transport = ScriptedTransport([TransportResponse(429, b"", {"retry-after": "3"}),
+                                        TransportResponse(503, b""),
+                                        TransportResponse(200, b'{"id": 1}')])
+        _scheduler = RequestScheduler()
+        assert _scheduler.fetch(URL, transport=_transport) == b'{"id": 1}'
+        assert len(_transport.calls) == 3
+        assert sleep_mock.call_count == 2
+        assert sleep_mock.call_args_list[0][0][0] == pytest.approx(3.0)  # Retry-After
+        assert _scheduler.stats()["retries"] == 2
+
+    def test_gives_up(self, sleep_mock):
+        _transport = ScriptedTransport([TransportResponse(500, b"")])
+        _scheduler = RequestScheduler(max_retries=2)
+        with pytest.raises(HttpStatusError):
+            _scheduler.fetch(URL, transport=_transport)
+        assert len(_transport.calls) == 3
+        assert _scheduler.stats()["failures"] == 1
+
+    def test_not_found_not_retried(self, sleep_mock):
+        _transport = ScriptedTransport([TransportResponse(404, b"")])
+        with pytest.raises(ConnectionError):
+            RequestScheduler().fetch(URL, transport=_transport)
+        assert len(_transport.calls) == 1
+        sleep_mock.assert_not_called()
+
+    def test_deduplicates_in_flight(self):
+        _release = threading.Event()
+        _transport = ScriptedTransport([TransportResponse(200, b"[]")], block=_release)
+        _scheduler = RequestScheduler()
+        _results = []
+        _threads = [threading.Thread(target=lambda: _results.append(_scheduler.fetch(URL, transport=_transport)))
+                    for _ in range(4)]
+        for _thread in _threads:
+            _thread.start()
+        while _scheduler.stats()["requests"] < 4:
+            _release.wait(0.001)
+        _release.set()
+        for _thread in _threads:
+            _thread.join()
+        assert _results == [b"[]"] * 4
+        assert len(_transport.calls) == 1
+        assert _scheduler.stats()["deduplicated"] == 3
+
+    def test_concurrency_cap(self):
+        _active, _max_active = [0], [0]
+        _lock = threading.Lock()
+
+        class _Transport(HttpTransport):
+            def _get(self, url, headers):
+                with _lock:
+                    _active[0] += 1
+                    _max_active[0] = max(_max_active[0], _active[0])
+                threading.Event().wait(0.01)
+                with _lock:
+                    _active[0] -= 1
+                return TransportResponse(200, b"{}")
+
+        _scheduler = RequestScheduler(max_concurrent=2)
+        _transport = _Transport()
+        _threads = [threading.Thread(target=_scheduler.fetch, args=(f"{URL}{_ix}",), kwargs=dict(transport=_transport))
+                    for _ix in range(8)]
+        for _thread in _threads:
+            _thread.start()
+        for _thread in _threads:
+            _thread.join()
+        assert _max_active[0] == 2
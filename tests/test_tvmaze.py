@@ -7,15 +7,34 @@ import pytest
 
 from media.episode import EpisodeData
 from media.online_search import tvmaze
+from media.online_search.rate_limit import TokenBucket
+from media.online_search.transport import UrllibTransport, set_default_transport
+from media.online_search.scheduler import RequestScheduler
+from media.online_search.tvmaze_index import TvMazeShowIndex, normalize_title
 from media.show import ShowData
 from media.imdb_id import IMDBId
 from media.tvmaze_id import TvMazeId
 from media.enums import Type
 import json
+import urllib.error
 
 from pytest_mock.plugin import MockerFixture
 
 
+@pytest.fixture(autouse=True)
+def urllib_transport():
+    # requests are mocked at urllib.request.urlopen
+    set_default_transport(UrllibTransport())
+    yield
+    set_default_transport(None)
+
+
+@pytest.fixture(autouse=True)
+def unlimited_scheduler(monkeypatch):
+    # no rate limit shared between tests
+    monkeypatch.setattr(tvmaze.TvMaze, "_scheduler", RequestScheduler())
+
+
 class MockHelper:
     @dataclass
     class EpisodeListResponseParams:
@@ -281,6 +300,26 @@ class TestTvMazeEpisodeSearch:
         assert res.season == _s
         assert res.title == "Sloppy CrabCakes"
 
+    def test_search_many(self, mocker: MockerFixture):
+        _tvmaze = tvmaze.TvMaze(use_cache=True)
+        urllib_mock = mocker.patch("urllib.request.urlopen")
+        _show_id = 6368
+        _s, _e = 2, 4
+        _url_show = f"http://api.tvmaze.com/shows/{_show_id}"
+        _url_list = f"http://api.tvmaze.com/shows/{_show_id}/episodes"
+        _p = MockHelper.EpisodeListResponseParams(required_season_num=_s, required_episode_num=_e, required_id=1,
+                                                  num_seasons=3, num_eps_per_season=8)
+        _map = {_url_show: MockHelper.gen_mock(mocker, _show_id, title="A Show"),
+                _url_list: MockHelper.gen_mock_episode_list(mocker, _p)}
+        urllib_mock.side_effect = lambda arg, timeout: _map[arg]
+        _show = TvMazeId(_show_id, media_type=Type.Show)
+        res = _tvmaze.episode_search_many(_show, [(1, 1), (_s, _e), (3, 8), (4, 1)])
+        assert [(r.season, r.episode) for r in res[:3]] == [(1, 1), (_s, _e), (3, 8)]
+        assert int(res[1].id) == 1
+        assert res[3] is None
+        assert _tvmaze.episode_search(_show, episode_num=_e, season_num=_s) is res[1]
+        assert urllib_mock.call_count == 2
+
 
 class TestTvMazeExceptions:
     def test_show_search_status_code_not_ok(self, mocker: MockerFixture):
@@ -315,3 +354,74 @@ class TestTvMazeSearchResult:
         assert res.valid is False
         res = tvmaze.TvMazeEpisodeSearchResult("String")
         assert res.valid is False
+
+
+class TestTokenBucket:
+    def test_waits_when_empty(self, mocker: MockerFixture):
+        _sleep_mock = mocker.patch("media.online_search.rate_limit.sleep")
+        _time = mocker.patch("media.online_search.rate_limit.monotonic")
+        _time.side_effect = [100.0, 100.0, 100.1, 100.2, 100.5]
+        _bucket = TokenBucket(rate=2.0, capacity=2)
+        assert _bucket.wait() == 0.0
+        assert _bucket.wait() == 0.0
+        assert _bucket.wait() == pytest.approx(0.3)
+        _sleep_mock.assert_called_once()
+
+
+SHOW_INDEX_PAGES = [
+    [{"id": 1, "name": "The Office", "premiered": "2001-07-09", "weight": 80, "genres": ["Comedy"],
+      "externals": {"imdb": "tt0290978"}},
+     {"id": 2, "name": "Doctor Who", "premiered": "1963-11-23", "weight": 70, "externals": {"imdb": "tt0056751"}}],
+    [{"id": 526, "name": "The Office", "premiered": "2005-03-24", "weight": 99, "genres": ["Comedy"],
+      "externals": {"imdb": "tt0386676"}},
+     {"id": 210, "name": "Doctor Who", "premiered": "2005-03-26", "weight": 98, "externals": {"imdb": None}},
+     {"id": 300, "name": "Law & Order: Special Victims Unit", "premiered": "1999-09-20", "weight": 95}],
+]
+
+
+@pytest.fixture
+def show_index_urlopen(mocker: MockerFixture):
+    """Serves SHOW_INDEX_PAGES as /shows?page=N, 404 after the last page"""
+    def _urlopen(url, timeout):
+        _page = int(url.split("page=")[-1])
+        if _page >= len(SHOW_INDEX_PAGES):
+            raise urllib.error.HTTPError(url, 404, "Not Found", {}, None)
+        _cm = mocker.MagicMock()
+        _cm.getcode.return_value = 200
+        _cm.read.return_value = json.dumps(SHOW_INDEX_PAGES[_page]).encode("utf-8")
+        return _cm
+    _mock = mocker.patch("urllib.request.urlopen")
+    _mock.side_effect = _urlopen
+    return _mock
+
+
+class TestTvMazeShowIndex:
+    def test_normalize_title(self):
+        assert normalize_title("The Office") == "office"
+        assert normalize_title("Law and Order: Special Victims Unit") == "law and order special victims unit"
+        assert normalize_title("Law & Order  Special Victims Unit") == "law and order special victims unit"
+        assert normalize_title("Pokémon") == "pokemon"
+
+    def test_update_and_find(self, tmp_path, show_index_urlopen):
+        _index = TvMazeShowIndex(tmp_path / "shows.json.gz")
+        assert _index.update(tvmaze.TvMaze(use_cache=False)) == 2
+        assert show_index_urlopen.call_count == 3
+        _index.save()
+        _index = TvMazeShowIndex(tmp_path / "shows.json.gz")
+        assert len(_index) == 5
+        assert _index.find("the office")["id"] == 526  # most popular
+        assert _index.find("The Office", year=2001)["id"] == 1
+        assert _index.find("Law and Order Special Victims Unit")["id"] == 300
+        assert _index.find_imdb(IMDBId("tt0056751"))["name"] == "Doctor Who"
+        assert _index.find("Not Indexed") is None
+        assert _index.update(tvmaze.TvMaze(use_cache=False)) == 1  # continues with the last page
+
+    def test_show_search_uses_index(self, tmp_path, show_index_urlopen):
+        _index = TvMazeShowIndex(tmp_path / "shows.json.gz")
+        _index.update(tvmaze.TvMaze(use_cache=False))
+        show_index_urlopen.reset_mock()
+        _tvmaze = tvmaze.TvMaze(use_cache=True, show_index=_index)
+        res = _tvmaze.show_search(ShowData(title="Doctor Who", year=2005))
+        assert (int(res.id), res.title, res.year) == (210, "Doctor Who", 2005)
+        assert _tvmaze.show_search(IMDBId("tt0290978")).title == "The Office"
+        show_index_urlopen.assert_not_called()
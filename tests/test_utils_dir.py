@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from utils.dir_util import scandir_walk, DirectoryInfo
+
+
+class TestScandirWalk:
+    def _create_tree(self, root: Path):
+        for _show in ("Show A", "Show B"):
+            for _season in ("S01", "S02"):
+                _dir = root / _show / _season
+                _dir.mkdir(parents=True)
+                for _ep in range(1, 4):
+                    (_dir / f"{_show}.{_season}E0{_ep}.mkv").touch()
+
+    def test_matches_rglob(self, tmp_path):
+        self._create_tree(tmp_path)
+        _expected = sorted(tmp_path.rglob("*"))
+        assert sorted(Path(e.path) for e in scandir_walk([tmp_path], workers=4)) == _expected
+
+    def test_multiple_roots_single_worker(self, tmp_path):
+        self._create_tree(tmp_path)
+        _roots = [tmp_path / "Show A", tmp_path / "Show B" / "S01"]
+        _files = [e.name for e in scandir_walk(_roots, workers=1) if e.is_file()]
+        assert len(_files) == 9
+
+    def test_does_not_follow_symlinked_dirs(self, tmp_path):
+        self._create_tree(tmp_path)
+        (tmp_path / "Show A" / "S01" / "loop").symlink_to("..", target_is_directory=True)
+        _expected = sorted(tmp_path.rglob("*.mkv"))
+        assert sorted(Path(e.path) for e in scandir_walk([tmp_path], workers=4) if e.name.endswith(".mkv")) == \
+               _expected
+        assert len(_expected) == 12
+
+    def test_deterministic_order(self, tmp_path):
+        self._create_tree(tmp_path)
+        _paths = [e.path for e in scandir_walk([tmp_path], workers=4)]
+        assert [e.path for e in scandir_walk([tmp_path], workers=1)] == _paths
+        assert [Path(_p).relative_to(tmp_path).as_posix() for _p in _paths[:6]] == \
+               ["Show A", "Show B", "Show A/S01", "Show A/S02", "Show B/S01", "Show B/S02"]
+
+    def test_missing_root(self, tmp_path):
+        assert list(scandir_walk([tmp_path / "missing"])) == []
+
+    def test_early_exit(self, tmp_path):
+        self._create_tree(tmp_path)
+        _walker = scandir_walk([tmp_path], workers=2)
+        assert next(_walker) is not None
+        _walker.close()
+
+
+class TestDirectoryInfo:
+    def test_prefetched_stat(self, tmp_path, mocker):
+        _dir = tmp_path / "dir"
+        _dir.mkdir(mode=0o755)
+        _dir.chmod(0o755)
+        _stat = _dir.stat()
+        _stat_mock = mocker.patch.object(Path, "stat")
+        _di = DirectoryInfo(_dir, stat_res=_stat)
+        assert _di.has_permissions(0o755) is True
+        _stat_mock.assert_not_called()
+
+    def test_not_a_directory(self, tmp_path):
+        _file = tmp_path / "file.txt"
+        _file.touch()
+        with pytest.raises(FileNotFoundError):
+            DirectoryInfo(_file)
+        with pytest.raises(FileNotFoundError):
+            DirectoryInfo(_file, stat_res=_file.stat())
+        with pytest.raises(FileNotFoundError):
+            DirectoryInfo(tmp_path / "missing")
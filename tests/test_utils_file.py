@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import pytest
+
+from utils.file_utils import FileInfo
+
+
+class TestFileInfo:
+    def test_single_stat(self, tmp_path, mocker):
+        _file = tmp_path / "file.mkv"
+        _file.write_text("data")
+        _file.chmod(0o644)
+        _stat_spy = mocker.spy(Path, "stat")
+        _fi = FileInfo(_file)
+        assert _fi.has_permissions(0o644) is True
+        assert _fi.size.size_bytes == 4
+        assert _stat_spy.call_count == 1
+
+    def test_prefetched_stat(self, tmp_path, mocker):
+        _file = tmp_path / "file.mkv"
+        _file.touch()
+        _stat = _file.stat()
+        _stat_spy = mocker.spy(Path, "stat")
+        _fi = FileInfo(_file, stat_res=_stat)
+        assert _fi.stat is _stat
+        assert _stat_spy.call_count == 0
+
+    def test_not_a_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            FileInfo(tmp_path)
+        with pytest.raises(FileNotFoundError):
+            FileInfo(tmp_path / "missing.mkv")
@@ -1,10 +1,17 @@
+import time
+from types import SimpleNamespace
+
+from base_log import BaseLog
 from config import ConfigurationManager
 
 from pathlib import Path, PurePosixPath
 
-from wb.helper_methods import parse_download_arg, gen_find_cmd
+from wb.helper_methods import parse_download_arg, gen_find_cmd, merge_find_cmd_outputs
 from wb.item import FileListItem
 from wb.list import FileList
+from wb.listing_cache import ListingCache
+from wb.server import Server, ServerHandler
+from wb.table import FileTable
 
 import pytest
 
@@ -45,6 +52,18 @@ class TestHelperMethods:
         arg = "124-123,111-115"  # invalid range + valid range
         assert parse_download_arg(arg, 1000) == [111, 112, 113, 114, 115]
 
+    def test_gen_find_cmd_newer_than(self):
+        _expected = r'find /home/johndoe/files \( -iname "*.mkv" \) -newermt "@1623879181.751918"' \
+                    r' -printf "%T@ | %s | %p\n" | sort -n'
+        assert gen_find_cmd(["mkv"], newer_than=1623879181.7519188610) == _expected
+        assert '-newermt "@1623879181.999999"' in gen_find_cmd(["mkv"], newer_than=1623879181.9999997)
+
+    def test_merge_find_cmd_outputs(self):
+        _outputs = {"server1": ["1.5 | 1 | a\n", "3.0 | 1 | c\n"],
+                    "server2": ["1.2 | 1 | b\n", "2.0 | 1 | d\n", "4 | 1 | e\n"]}
+        assert [(_s, _l.split(" | ")[2].strip()) for _s, _l in merge_find_cmd_outputs(_outputs)] == \
+               [("server2", "b"), ("server1", "a"), ("server2", "d"), ("server1", "c"), ("server2", "e")]
+
     def test_parse_download_arg_get_last(self):
         arg = "-5"
         assert parse_download_arg(arg, 10) == [6, 7, 8, 9, 10]
@@ -181,6 +200,21 @@ class TestFileListItem:
         assert _item.is_movie is True
         assert _item.is_tvshow is False
 
+    def test_is_movie_audio_channels_in_name(self):
+        _line = r"1611998314.0000000000 | 50000000 | " \
+                r"/home/johndoe/files/Some.Movie.2019.1080p.BluRay.DTS5.1-GRP/" \
+                r"some.movie.2019.1080p.bluray.dts5.1-grp.mkv"
+        _item = FileListItem(_line)
+        assert _item.is_movie is True
+        assert _item.media_type == FileListItem.MediaType.Movie
+
+    def test_is_not_movie_without_quality(self):
+        _line = r"1611998314.0000000000 | 50000000 | " \
+                r"/home/johndoe/files/Movie.Title.2010.mkv"
+        _item = FileListItem(_line)
+        assert _item.is_movie is False
+        assert _item.media_type == FileListItem.MediaType.Unknown
+
     def test_is_episode_rar_in_dir(self):
         _line = r"1623879181.7519188610 | 4025725826 | " \
                 r"/home/johndoe/files/Show.S04E02.iNTERNAL.1080p.WEB.H264-GROUPNAME/" \
@@ -380,3 +414,171 @@ class TestFileList:
         _list.parse_find_cmd_output(_find_output, "server1")
         with pytest.raises(TypeError):
             _list.get(123.123)
+
+
+    def test_parse_merged_in_chunks(self, monkeypatch):
+        monkeypatch.setattr(FileList, "CHUNK_SIZE", 2)
+        _calls = []
+        _append_lines = FileTable.append_lines
+
+        def _spy(table, lines, server_id="", errors=None):
+            _calls.append((server_id, len(lines)))
+            return _append_lines(table, lines, server_id, errors)
+
+        monkeypatch.setattr(FileTable, "append_lines", _spy)
+        _servers = ["server1", "server1", "server1", "server2", "server1"]
+        _lines = [(_server, self.TEMPLATE_SHOW.format(_ix, "100000", f"S01E{_ix:02d}"))
+                  for _ix, _server in enumerate(_servers, 1)]
+        _list = FileList()
+        _list.parse_merged_find_cmd_output(iter(_lines))
+        assert _calls == [("server1", 2), ("server1", 1), ("server2", 1), ("server1", 1)]
+        _items = _list.items()
+        assert [(_i.index, _i.timestamp, _i.server_id) for _i in _items] == \
+               [(_ix, _ix, _server) for _ix, _server in enumerate(_servers, 1)]
+
+class TestFileTable:
+    ROOT = r"/home/johndoe/files"
+
+    def test_append_lines(self):
+        _lines = [f"1623879181.75 | 100 | {self.ROOT}/Show.S04.1080p.WEB.H264-GRP/Show.S04E01.1080p.WEB.H264-GRP.mkv",
+                  f"1623879182.75 | 200 | {self.ROOT}/Show.S04.1080p.WEB.H264-GRP/Show.S04E02.1080p.WEB.H264-GRP.mkv",
+                  f"1623879183.75 | 300 | {self.ROOT}/Cool.Movie.2007.1080p.BluRay.x264-Grp/cm.part01.rar",
+                  f"1623879184.75 | 300 | {self.ROOT}/Cool.Movie.2007.1080p.BluRay.x264-Grp/cm.part02.rar",
+                  f"1623879185.75 | 400 | {self.ROOT}/Some.Release.mkv",
+                  r"not a find output line"]
+        _table = FileTable(PurePosixPath(self.ROOT))
+        _errors = []
+        assert _table.append_lines(_lines, "server1", errors=_errors) == range(0, 5)
+        assert len(_errors) == 1
+        assert list(_table.timestamps) == [1623879181, 1623879182, 1623879183, 1623879184, 1623879185]
+        assert list(_table.sizes) == [100, 200, 300, 300, 400]
+        assert list(_table.valid) == [1, 1, 1, 0, 1]
+        assert _table.parent_names == ["Show.S04.1080p.WEB.H264-GRP", "Cool.Movie.2007.1080p.BluRay.x264-Grp"]
+        assert list(_table.parents) == [0, 0, 1, 1, FileTable.NO_PARENT]
+        assert [_table.media_type(_row) for _row in range(5)] == \
+               [FileTable.TYPE_EPISODE, FileTable.TYPE_EPISODE, FileTable.TYPE_MOVIE, FileTable.TYPE_MOVIE,
+                FileTable.TYPE_UNKNOWN]
+        assert _table.append_lines(_lines[:1], "server2") == range(5, 6)
+        assert (_table.server_id(0), _table.server_id(5)) == ("server1", "server2")
+
+    def test_items_are_views(self):
+        _list = FileList()
+        _list.parse_find_cmd_output([f"2 | 100 | {self.ROOT}/Show.S01E02.1080p.WEB.H264-GRP.mkv",
+                                     f"1 | 100 | {self.ROOT}/Movie.2001.1080p.WEB.H264-GRP.mkv",
+                                     f"3 | 100 | {self.ROOT}/Movie.2001.1080p.WEB.H264-GRP/Sample/s.mkv"], "server1")
+        _items = _list.items()
+        assert [_i.name for _i in _items] == ["Movie.2001.1080p.WEB.H264-GRP.mkv", "Show.S01E02.1080p.WEB.H264-GRP.mkv"]
+        assert [_i.index for _i in _items] == [1, 2]
+        assert [_i.media_type for _i in _items] == [FileListItem.MediaType.Movie, FileListItem.MediaType.Episode]
+
+
+class TestListingCache:
+    def test_full_and_delta_update(self, tmp_path):
+        _cache = ListingCache(tmp_path / "server1.listing")
+        assert len(_cache) == 0
+        assert _cache.max_timestamp is None
+        assert _cache.full_refresh_due() is True
+        _lines = _cache.update(["1623879182.5 | 200 | /files/b.mkv\r\n", "1623879181.25 | 100 | /files/a.mkv\r\n",
+                                "could not split"], full=True)
+        assert _lines == ["1623879181.2500000000 | 100 | /files/a.mkv", "1623879182.5000000000 | 200 | /files/b.mkv"]
+        assert _cache.max_timestamp == 1623879182.5
+        assert _cache.full_refresh_due() is False
+        assert _cache.full_refresh_due(now=_cache.full_listing_time + ListingCache.FULL_REFRESH_INTERVAL + 1) is True
+        _cache.update(["1623879190.0 | 300 | /files/a.mkv", "1623879191.0 | 400 | /files/c.mkv"], full=False)
+        _cache.close()
+        _cache = ListingCache(tmp_path / "server1.listing")  # memory mapped from file
+        assert list(_cache.rows()) == [(1623879182.5, 200, "/files/b.mkv"), (1623879190.0, 300, "/files/a.mkv"),
+                                       (1623879191.0, 400, "/files/c.mkv")]
+        _cache.close()
+
+    def test_invalid_file(self, tmp_path):
+        _path = tmp_path / "server1.listing"
+        _path.write_bytes(b"not a listing cache file, not a listing cache file")
+        _cache = ListingCache(_path)
+        assert len(_cache) == 0
+        assert _cache.full_refresh_due() is True
+
+
+class StubConnection:
+    def __init__(self, lines, exit_status=0):
+        self.connected = True
+        self.exit_status = None
+        self.commands = []
+        self._lines = lines
+        self._exit_status = exit_status
+
+    def run_command(self, command, read_line_cb=None, collect_output=True):
+        self.commands.append(command)
+        for _line in self._lines:
+            if read_line_cb:
+                read_line_cb(_line)
+        self.exit_status = self._exit_status
+        return list(self._lines)
+
+
+class TestServerListFiles:
+    @staticmethod
+    def _server(cache, connection, full_list=False):
+        _server = Server.__new__(Server)
+        BaseLog.__init__(_server, use_global_settings=True)
+        _server._settings = SimpleNamespace(full_list=full_list)
+        _server._listing_cache = cache
+        _server._ssh = connection
+        return _server
+
+    def test_cache_not_written_on_failed_find(self, tmp_path):
+        _cache = ListingCache(tmp_path / "server1.listing")
+        _lines = ["1623879181.25 | 100 | /files/a.mkv\n"]
+        _server = self._server(_cache, StubConnection(_lines, exit_status=1))
+        assert _server.list_files() == _lines
+        assert len(_cache) == 0
+        assert not (tmp_path / "server1.listing").exists()
+        _server._ssh = StubConnection(_lines)
+        _server.list_files()
+        assert list(_cache.rows()) == [(1623879181.25, 100, "/files/a.mkv")]
+        _server._ssh = StubConnection(["1623879190.0 | 300 | /files/b.mkv\n"], exit_status=1)
+        assert _server.list_files() == ["1623879181.2500000000 | 100 | /files/a.mkv",
+                                         "1623879190.0000000000 | 300 | /files/b.mkv"]
+        assert "-newermt" in _server._ssh.commands[0]
+        assert list(_cache.rows()) == [(1623879181.25, 100, "/files/a.mkv")]
+        _cache.close()
+
+    def test_cache_not_written_on_find_errors(self, tmp_path):
+        _cache = ListingCache(tmp_path / "server1.listing")
+        _lines = ["find: '/files/private': Permission denied\r\n", "1623879181.25 | 100 | /files/a.mkv\r\n"]
+        _server = self._server(_cache, StubConnection(_lines))
+        assert _server.list_files() == _lines
+        assert _server._ssh.commands[0].startswith("set -o pipefail; find ")
+        _server._ssh = StubConnection([])
+        assert _server.list_files() == []
+        assert not (tmp_path / "server1.listing").exists()
+        _cache.close()
+
+
+class StubServer:
+    def __init__(self, hostname, lines, delay=0.0):
+        self.hostname = hostname
+        self._lines = lines
+        self._delay = delay
+
+    def list_files(self, read_line_cb=None):
+        for _line in self._lines:
+            time.sleep(self._delay)
+            read_line_cb(_line)
+        return []
+
+    def error(self, *_):
+        pass
+
+
+class TestServerHandler:
+    TEMPLATE = r"{} | 100 | /home/johndoe/files/Show.S01E{:02d}.1080p.WEB.H264-GRP.mkv"
+
+    def test_init_file_list_merges_servers(self):
+        _handler = ServerHandler(settings=None)
+        _handler._servers = [StubServer("server1", [self.TEMPLATE.format(_i, _i) for _i in (1, 4, 5)], delay=0.01),
+                             StubServer("server2", [self.TEMPLATE.format(_i, _i) for _i in (2, 3, 6)])]
+        assert _handler.number_of_items() == 6
+        _items = _handler._file_list.items()
+        assert [(_i.index, _i.timestamp) for _i in _items] == [(_i, _i) for _i in range(1, 7)]
+        assert [_i.server_id for _i in _items] == ["server1", "server2", "server2", "server1", "server1", "server2"]
@@ -7,8 +7,8 @@ import re
 from pathlib import Path
 
 import util
-import util_tv
-from db.cache import MovieCache
+from media import release
+from db.fs_index import FileSystemIndex
 from config import ConfigurationManager
 
 from printout import pfcs
@@ -23,10 +23,9 @@ MOVIE_DIR = CFG.get('path_film')
 
 def parse_year(movie_dir_name):
     ''' Determines the movie year from dir '''
-    re_year = re.compile(r'(19|20)\d{2}')
-    year = re_year.search(movie_dir_name)
+    year = release.classify(movie_dir_name).year
     if year:
-        return year.group()
+        return str(year)
     return None
 
 
@@ -58,9 +57,9 @@ def get_full_path_of_movie_filename(file_name: str, use_cache=True):
     "Returns the full path of an episode, if found"
     if use_cache:
         letter = determine_letter(file_name)
-        for path in MovieCache().get_file_path_list(letter):
-            if file_name in path:
-                return path
+        for path in FileSystemIndex.movies().files(letter, extensions=util.video_extensions()):
+            if file_name in str(path):
+                return str(path)
         else:
             return None
     for path, filename in list_all_movie_files():
@@ -73,9 +72,9 @@ def get_full_path_to_movie_filename(folder: str, use_cache=True):
     "Returns the full path of movie, if found"
     if use_cache:
         letter = determine_letter(folder)
-        for path in MovieCache().get_file_path_list(letter):
-            if folder in path:
-                return path
+        for path in FileSystemIndex.movies().files(letter, extensions=util.video_extensions()):
+            if folder in str(path):
+                return str(path)
         else:
             return None
     for path, filename in list_all_movie_files():
@@ -96,14 +95,7 @@ def list_all(full_path=False) -> list:
 
 def determine_title(folder):
     ''' Determine the movie title from dir '''
-    re_title = re.compile(
-        r'.+?(?=\.(\d{4}|REPACK|720p|1080p|2160|DVD|BluRay))')
-    title = re_title.search(folder)
-    if title:
-        title = re.sub('(REPACK|LiMiTED|EXTENDED|Unrated)',
-                       '.', title.group(0))
-        return re.sub(r'\.', ' ', title)
-    return None
+    return release.classify(folder).title
 
 
 def remove_extras_from_folder(folder):
@@ -117,12 +109,7 @@ def remove_extras_from_folder(folder):
 
 def is_movie(string: str):
     "Try to determine if a string is movie name"
-    if util_tv.is_episode(string) or util_tv.is_season(string):
-        return False
-    has_year = parse_year(string) != None
-    parsed_title = determine_title(string) != None
-    can_determine_title = parsed_title and parsed_title != string
-    return has_year or can_determine_title
+    return release.classify(string).is_movie
 
 
 def exists(movie_dir_name: str):
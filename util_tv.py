@@ -6,8 +6,9 @@ import os
 import re
 
 from config import ConfigurationManager
-from db.cache import TvCache
+from db.fs_index import FileSystemIndex
 import util
+from media import release
 from pathlib import Path
 
 CFG = ConfigurationManager()
@@ -31,9 +32,8 @@ def list_all_shows() -> list:
 def list_all_episodes(use_cache=True):
     '''Returns a list of all current tv show files'''
     if use_cache:
-        for eisode_path in TvCache().get_file_path_list():
-            path = Path(eisode_path)
-            yield (path.parents[0], path.parts[-1])
+        for path in FileSystemIndex.tv().files(extensions=util.video_extensions()):
+            yield (path.parent, path.name)
         return []
     show_paths = [os.path.join(SHOW_DIR, sp) for sp in list_all_shows()]
     season_paths = [os.path.join(show, season)
@@ -48,9 +48,9 @@ def list_all_episodes(use_cache=True):
 def get_full_path_of_episode_filename(file_name: str, use_cache=True):
     "Returns the full path of an episode, if found"
     if use_cache:
-        for path in TvCache().get_file_path_list():
-            if file_name in path:
-                return path
+        for path in FileSystemIndex.tv().files(extensions=util.video_extensions()):
+            if file_name in str(path):
+                return str(path)
         return ""
     for path, filename in list_all_episodes():
         if filename in file_name:
@@ -59,9 +59,10 @@ def get_full_path_of_episode_filename(file_name: str, use_cache=True):
 
 
 def parse_season_episode(episode_filename: str, season_as_year=False):
-    re_str = r"[Ss]\d{1,2}[Ee]\d{1,2}"
-    if season_as_year:
-        re_str = r"[Ss]\d{4}[Ee]\d{1,2}"
+    if not season_as_year:
+        _release = release.classify(episode_filename)
+        return (_release.season, _release.episode)
+    re_str = r"[Ss]\d{4}[Ee]\d{1,2}"
     match = re.search(re_str, episode_filename)
     if match:
         se_string = match.group().lower()
@@ -69,10 +70,7 @@ def parse_season_episode(episode_filename: str, season_as_year=False):
         season = int(se_list[0])
         episode = int(se_list[1])
         return (season, episode)
-    re_str = r"[Ss]\d{1,2}"
-    if season_as_year:
-        re_str = r"[Ss]\d{4}"
-    match = re.search(re_str, episode_filename)
+    match = re.search(r"[Ss]\d{4}", episode_filename)
     if match:
         s_string = match.group().lower().replace('s', '')
         return (int(s_string), None)
@@ -93,24 +91,17 @@ def parse_season(episode_filename: str):
 
 def is_episode(string: str):
     "Try to determine if a string is an episode name"
-    season, episode = parse_season_episode(string)
-    return season is not None and episode is not None
+    return release.classify(string).is_episode
 
 
 def is_season(string: str):
     "Try to determine if a string is a season folder"
-    season, episode = parse_season_episode(string)
-    return season is not None and episode is None
+    return release.classify(string).is_season
 
 
 def guess_show_name_from_episode_name(episode_filename: str):
     "Try to determine the Show name from episode name"
-    match = re.search(r'[Ss]\d{1,2}[Ee]\d{1,2}', episode_filename)
-    if match:
-        se_string = match.group()
-        show_name = episode_filename.split(se_string)[0]
-        return show_name.replace('.', ' ').strip()
-    return None
+    return release.classify(episode_filename).show
 
 
 def determine_show_from_episode_name(episode_filename: str):
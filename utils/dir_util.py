@@ -1,7 +1,10 @@
 from pathlib import Path
 from os import stat_result
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+import os
 import stat
-from typing import Optional
+from typing import Optional, Iterable, Generator, List, Tuple, Union, Deque
 
 from utils.size_utils import SizeBytes
 
@@ -9,11 +12,17 @@ from utils.size_utils import SizeBytes
 class DirectoryInfo:
     ST_MODE_PERMISSIONS_MASK = 0o777
 
-    def __init__(self, path_to_dir: Path):
-        if not path_to_dir.is_dir():
+    def __init__(self, path_to_dir: Path, stat_res: Optional[stat_result] = None):
+        """stat_res: already fetched stat result of the path (e.g. from os.scandir), saves the stat call"""
+        if stat_res is None:
+            try:
+                stat_res = path_to_dir.stat()
+            except (FileNotFoundError, NotADirectoryError):
+                raise FileNotFoundError(f"{path_to_dir} is not a directory!")
+        if not stat.S_ISDIR(stat_res.st_mode):
             raise FileNotFoundError(f"{path_to_dir} is not a directory!")
         self._path = path_to_dir
-        self._stat_res: Optional[stat_result] = None
+        self._stat_res: Optional[stat_result] = stat_res
 
     def _stat(self) -> stat_result:
         if self._stat_res is None:
@@ -48,6 +57,37 @@ class DirectoryInfo:
         return (self._stat().st_mode & self.ST_MODE_PERMISSIONS_MASK) == permissions_bits
 
 
+def _list_dir(path: Union[Path, str]) -> Tuple[List[os.DirEntry], List[str]]:
+    _entries = []
+    try:
+        with os.scandir(path) as _it:
+            _entries = sorted(_it, key=lambda _entry: _entry.name)
+    except OSError:
+        pass
+    # symlinked directories are not followed (as Path.rglob), a link to a parent directory would never end
+    return _entries, [_entry.path for _entry in _entries if _entry.is_dir(follow_symlinks=False)]
+
+
+def scandir_walk(roots: Iterable[Union[Path, str]], workers: int = 8) -> Generator[os.DirEntry, None, None]:
+    """
+    Yields DirEntry objects of all files and directories below roots (like Path.rglob("*")), breadth first,
+    entries of a directory sorted by name. Directories are listed concurrently by a pool of workers, each directory
+    is read with a single os.scandir, file type checks on the yielded entries do not need any extra stat calls.
+    """
+    _executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    _pending: Deque[Future] = deque()
+    try:
+        for _root in roots:
+            _pending.append(_executor.submit(_list_dir, _root))
+        while _pending:
+            _entries, _sub_dirs = _pending.popleft().result()
+            for _sub_dir in _sub_dirs:
+                _pending.append(_executor.submit(_list_dir, _sub_dir))
+            yield from _entries
+    finally:
+        _executor.shutdown(wait=True, cancel_futures=True)
+
+
 def main():
     import argparse
     parser = argparse.ArgumentParser("DirectoryUtils")
@@ -9,11 +9,17 @@ from utils.size_utils import SizeBytes
 class FileInfo:
     ST_MODE_PERMISSIONS_MASK = 0o777
 
-    def __init__(self, path_to_file: Path):
-        if not path_to_file.is_file():
+    def __init__(self, path_to_file: Path, stat_res: Optional[stat_result] = None):
+        """stat_res: already fetched stat result of the path (e.g. from os.scandir), saves the stat call"""
+        if stat_res is None:
+            try:
+                stat_res = path_to_file.stat()
+            except (FileNotFoundError, NotADirectoryError):
+                raise FileNotFoundError(f"{path_to_file} is not a file!")
+        if not stat.S_ISREG(stat_res.st_mode):
             raise FileNotFoundError(f"{path_to_file} is not a file!")
         self._path = path_to_file
-        self._stat_res: Optional[stat_result] = None
+        self._stat_res: Optional[stat_result] = stat_res
 
     def _stat(self) -> stat_result:
         if self._stat_res is None:
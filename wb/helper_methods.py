@@ -1,5 +1,8 @@
+import heapq
+import math
+from itertools import repeat
 from pathlib import PurePosixPath
-from typing import List, Union
+from typing import List, Union, Dict, Iterable, Iterator, Tuple, Optional
 
 from config import ConfigurationManager, SettingKeys, SettingSection
 
@@ -14,14 +17,36 @@ def get_remote_tmp_dir() -> PurePosixPath:
     return PurePosixPath(f"/home/{_username}/.tmp/")
 
 
-def gen_find_cmd(extensions: List[str]) -> str:
+def gen_find_cmd(extensions: List[str], newer_than: Optional[float] = None) -> str:
+    """newer_than: only list files modified after this (unix) timestamp, floored to microseconds"""
     _files_path = get_remote_files_path()
     _cmd_str = f"find {_files_path} \\("
     for _ix, _ext in enumerate(extensions, 0):
         if _ix:
             _cmd_str += " -o"
         _cmd_str += f" -iname \"*.{_ext}\""
-    return _cmd_str + " \\) -printf \"%T@ | %s | %p\\n\" | sort -n"
+    _cmd_str += " \\)"
+    if newer_than is not None:
+        # rounding up could skip files modified in the same microsecond, those listed twice are deduped by path
+        _micro = math.floor(newer_than * 1_000_000)
+        _cmd_str += f" -newermt \"@{_micro // 1_000_000}.{_micro % 1_000_000:06d}\""
+    return _cmd_str + " -printf \"%T@ | %s | %p\\n\" | sort -n"
+
+
+def _find_output_sort_key(item: Tuple[str, str]) -> float:
+    try:
+        return float(item[1].split(" | ", 1)[0])
+    except ValueError:
+        return 0.0  # as sort -n orders lines without a leading number
+
+
+def merge_find_cmd_outputs(outputs: Dict[str, Iterable[str]]) -> Iterator[Tuple[str, str]]:
+    """
+    Merges the (sort -n ordered) find command outputs of several servers to (server id, line) ordered by timestamp,
+    lines are yielded as soon as the next line of every unfinished output is known
+    """
+    return heapq.merge(*[zip(repeat(_server_id), _lines) for _server_id, _lines in outputs.items()],
+                       key=_find_output_sort_key)
 
 
 def parse_download_arg(download_arg: str, number_of_items: int) -> List[Union[str, int]]:
@@ -1,14 +1,13 @@
-import re
 from enum import Enum
 from pathlib import PurePosixPath, Path
 from typing import Optional, Union, List
 
 from base_log import BaseLog
 from printout import cstr, Color
-from wb.helper_methods import get_remote_files_path
+from wb.table import FileTable
 from utils.size_utils import SizeBytes
 
-from media.util import Util as MediaUtil
+from media.release import classify
 from media.episode import Episode
 from media.movie import Movie
 
@@ -19,62 +18,37 @@ FilterType = Union[str, List[str]]
 
 
 class FileListItem(BaseLog):
+    """Row of a FileTable"""
     class MediaType(Enum):
         Movie = "movie"
         Episode = "episode"
         Unknown = "unknown"
 
-    _ignore = ["sample", "subs", "subpack"]
+    _types = {FileTable.TYPE_MOVIE: MediaType.Movie, FileTable.TYPE_EPISODE: MediaType.Episode}
 
     def __init__(self, string: str, server_id: str = ""):
+        _table = FileTable()
+        _errors: List[str] = []
+        _rows = _table.append_lines([string], server_id, errors=_errors)
+        self._init_view(_table, _rows[0] if _rows else None)
+        for _error in _errors:
+            self.error(_error)
+
+    @classmethod
+    def view(cls, table: FileTable, row: int) -> "FileListItem":
+        """Item of an already parsed row"""
+        _item = cls.__new__(cls)
+        _item._init_view(table, row)
+        return _item
+
+    def _init_view(self, table: FileTable, row: Optional[int]) -> None:
         BaseLog.__init__(self, verbose=True)
         self.set_log_prefix("ITEM")
-        self._raw = string.replace("\n", "").strip()
+        self._table: FileTable = table
+        self._row: Optional[int] = row
+        self._path: Optional[PurePosixPath] = None
         self._index: Optional[int] = None
-        self._server_id: str = server_id
-        self._type: Optional[FileListItem.MediaType] = None
         self._downloaded: bool = False
-        self._parse()
-
-    def _parse(self) -> None:
-        self._valid = False
-        try:
-            _stamp, _bytes, _path = self._raw.split(" | ")
-        except ValueError as _:
-            self.error(f"could not split line: {self._raw}")
-            return
-        self._path = PurePosixPath(_path)
-        _files_path = get_remote_files_path()
-        if hasattr(self._path, "is_relative_to"):
-            is_rel = self._path.is_relative_to(_files_path)
-        else:
-            is_rel = str(self._path).startswith(str(_files_path))
-        if not is_rel:
-            self.error(f"path {self._path} is not relative to: {_files_path}")
-            return
-        if not _bytes.isdigit():
-            self.error(f"bytes value: {_bytes} is not an integer!")
-            return
-        self._bytes = int(_bytes)
-        try:
-            self._timestamp = int(_stamp.split(".")[0])
-        except ValueError as _:
-            self.error(f"could not parse timestamp from: {_stamp}")
-            return
-        self._valid = True
-
-    def _determine_type(self) -> None:
-        self._type = self.MediaType.Unknown
-        if MediaUtil.is_movie(self.name):
-            self._type = self.MediaType.Movie
-        elif MediaUtil.is_episode(self.name):
-            self._type = self.MediaType.Episode
-        elif self._path.parent != get_remote_files_path():
-            _parent_name = self._path.parent.name
-            if MediaUtil.is_movie(_parent_name):
-                self._type = self.MediaType.Movie
-            elif MediaUtil.is_episode(_parent_name):
-                self._type = self.MediaType.Episode
 
     @property
     def index(self) -> Optional[int]:
@@ -86,31 +60,31 @@ class FileListItem(BaseLog):
 
     @property
     def name(self) -> str:
-        return self._path.name
+        return self._table.name(self._row)
 
     @property
     def parent_name(self) -> Optional[str]:
-        if self._path.parent != get_remote_files_path():
-            return self._path.parent.name
-        return None
+        return self._table.parent_name(self._row)
 
     @property
     def parent_is_season_dir(self) -> bool:
         if self.parent_name:
-            return MediaUtil.is_season(self.parent_name)
+            return classify(self.parent_name).matches_season
         return False
 
     @property
     def path(self) -> PurePosixPath:
+        if self._path is None:
+            self._path = PurePosixPath(self._table.paths[self._row])
         return self._path
 
     @property
     def remote_download_path(self) -> PurePosixPath:
         if self.is_rar:
-            if self._path.parent == get_remote_files_path():
+            if self.parent_name is None:
                 raise AssertionError("parent is remote file path!")
-            return self._path.parent
-        return self._path
+            return self.path.parent
+        return self.path
 
     def local_destination(self, ignore_is_rar: bool = False) -> Optional[Path]:
         if not ignore_is_rar and self.is_rar:
@@ -140,45 +114,39 @@ class FileListItem(BaseLog):
 
     @property
     def is_movie(self) -> bool:
-        if self._type is None:
-            self._determine_type()
-        return self._type == self.MediaType.Movie
+        return self.media_type == self.MediaType.Movie
 
     @property
     def is_tvshow(self) -> bool:
-        if self._type is None:
-            self._determine_type()
-        return self._type == self.MediaType.Episode
+        return self.media_type == self.MediaType.Episode
 
     @property
     def media_type(self) -> MediaType:
-        if self._type is None:
-            self._determine_type()
-        return self._type
+        return self._types.get(self._table.media_type(self._row), self.MediaType.Unknown)
 
     @property
     def is_video(self) -> bool:
-        return self._path.suffix == ".mkv"
+        return self.path.suffix == ".mkv"
 
     @property
     def is_rar(self) -> bool:
-        return self._path.suffix == ".rar"
+        return self.path.suffix == ".rar"
 
     @property
     def size(self) -> int:
-        return self._bytes
+        return self._table.sizes[self._row]
 
     @property
     def size_human_readable(self) -> str:
-        return SizeBytes(self._bytes).to_string()
+        return SizeBytes(self.size).to_string()
 
     @property
     def timestamp(self) -> int:
-        return self._timestamp
+        return self._table.timestamps[self._row]
 
     @property
     def server_id(self) -> str:
-        return self._server_id
+        return self._table.server_id(self._row)
 
     @property
     def downloaded(self) -> bool:
@@ -192,33 +160,21 @@ class FileListItem(BaseLog):
 
     @property
     def valid(self) -> bool:
-        if not self._valid:
-            return False
-        if any([_i in self.name.lower() for _i in self._ignore]):
-            return False
-        if self.is_rar:
-            _match = re.search(r"\.part\d{2,3}\.rar", self._path.name)
-            if _match:
-                return self._path.name.endswith("part01.rar")
-            if any([s in self._path.parent.name.lower() for s in ["subpack", "subs"]]):
-                return False
-        if self.is_video:
-            if "sample" in self._path.parent.name.lower():
-                return False
-        return True
+        return self._row is not None and bool(self._table.valid[self._row])
 
     def exists_in_database(self, database: Union[MovieDatabase, EpisodeDatabase]) -> bool:
-        if self._type == FileListItem.MediaType.Movie and not isinstance(database, MovieDatabase):
+        _type = self.media_type
+        if _type == FileListItem.MediaType.Movie and not isinstance(database, MovieDatabase):
             return False
-        if self._type == FileListItem.MediaType.Episode and not isinstance(database, EpisodeDatabase):
+        if _type == FileListItem.MediaType.Episode and not isinstance(database, EpisodeDatabase):
             return False
         _candidates: List[str] = []
-        if self._type == FileListItem.MediaType.Movie:
+        if _type == FileListItem.MediaType.Movie:
             _folder = self.parent_name or self.path.stem
             _candidates.append(_folder)
             if " " in _folder:
                 _candidates.append(_folder.replace(" ", "."))
-        elif self._type == FileListItem.MediaType.Episode:
+        elif _type == FileListItem.MediaType.Episode:
             _candidates.append(self.name)
             if self.is_rar:
                 _candidates.extend([
@@ -257,7 +213,7 @@ class FileListItem(BaseLog):
             _print_info_line(str(_valid), prefix="valid", color=_valid_color)
             _print_info_line(_ep.name, prefix="parsed name")
             _print_info_line(str(self.size_human_readable), prefix="size")  # FIXME: handle multiple RARs
-            _print_info_line(str(self._path.suffix.replace(".", "")), prefix="ext")
+            _print_info_line(str(self.path.suffix.replace(".", "")), prefix="ext")
 
         def _print_extras_for_movie() -> None:
             _mov = Movie(Path(self.path))
@@ -267,7 +223,7 @@ class FileListItem(BaseLog):
             _print_info_line(str(_valid), prefix="matches regex", color=_valid_color)
             _print_info_line(_mov.name, prefix="parsed name")
             _print_info_line(str(self.size_human_readable), prefix="size")  # FIXME: handle multiple RARs
-            _print_info_line(str(self._path.suffix.replace(".", "")), prefix="ext")
+            _print_info_line(str(self.path.suffix.replace(".", "")), prefix="ext")
 
         def _to_color(text: str, color: Optional[Color], hooks: bool = False) -> str:
             _ret_str = f"[{text}]" if hooks else text
@@ -1,7 +1,8 @@
-from typing import List, Optional, Union
+from typing import List, Optional, Union, Iterable, Tuple
 from timeit import default_timer
 
 from wb.item import FileListItem
+from wb.table import FileTable
 from base_log import BaseLog
 from wb.settings import WBSettings
 
@@ -10,10 +11,13 @@ from db.db_tv import EpisodeDatabase
 
 
 class FileList(BaseLog):
+    CHUNK_SIZE = 256  # merged lines parsed and classified at once
+
     def __init__(self, settings: Optional[WBSettings] = None):
         BaseLog.__init__(self, use_global_settings=True)
         self.set_log_prefix("FileList")
         self._settings: Optional[WBSettings] = settings
+        self._table: FileTable = FileTable()
         self._items: List[FileListItem] = []
         self._sorted: bool = False
         self._compared_to_database: bool = False
@@ -22,10 +26,57 @@ class FileList(BaseLog):
         return len([i for i in self._items if i.valid])
 
     def parse_find_cmd_output(self, lines: List[str], server_id: str) -> None:
-        for line in lines:
-            _item = FileListItem(line, server_id)
-            if _item.valid:
+        _errors: List[str] = []
+        _rows = self._table.append_lines(lines, server_id, errors=_errors)
+        for _error in _errors:
+            self.error(_error)
+        _valid = self._table.valid
+        self._items.extend(FileListItem.view(self._table, _row) for _row in _rows if _valid[_row])
+        self._sorted = False
+
+    def parse_merged_find_cmd_output(self, lines: Iterable[Tuple[str, str]], print_items: bool = False) -> None:
+        """
+        Parses (server id, line) pairs ordered by timestamp as they arrive, e.g. the merged find outputs of
+        several servers. Items are indexed in arrival order and printed right away if print_items.
+        """
+        _start = default_timer()
+        if not self._sorted:
+            self._sort()
+        if print_items:
+            _databases = MovieDatabase(), EpisodeDatabase()
+            if not self._compared_to_database:
+                for _item in self._items:
+                    self._compare_item_to_database(_item, *_databases)
+                self._compared_to_database = True
+        _valid = self._table.valid
+        _chunk: List[str] = []
+        _chunk_server_id: Optional[str] = None
+
+        def _flush() -> None:
+            _errors: List[str] = []
+            for _row in self._table.append_lines(_chunk, _chunk_server_id, errors=_errors):
+                if not _valid[_row]:
+                    continue
+                _item = FileListItem.view(self._table, _row)
+                _item.index = len(self._items) + 1
                 self._items.append(_item)
+                if print_items:
+                    self._compare_item_to_database(_item, *_databases)
+                    self._print_item(_item)
+            for _error in _errors:
+                self.error(_error)
+            _chunk.clear()
+
+        # consecutive lines of the same server are parsed in chunks, keeping the merged order
+        for _server_id, _line in lines:
+            if _chunk and (_server_id != _chunk_server_id or len(_chunk) >= self.CHUNK_SIZE):
+                _flush()
+            _chunk_server_id = _server_id
+            _chunk.append(_line)
+        if _chunk:
+            _flush()
+        if print_items:
+            self.log(f"listing operation took: {default_timer() - _start}s")
 
     def print(self) -> None:
         _start = default_timer()
@@ -34,14 +85,16 @@ class FileList(BaseLog):
         if not self._compared_to_database:
             self.log("comparing items to database...")
             self._compare_to_database()
-        _show_additional_info = self._settings and self._settings.show_extra_info
-        _filter = self._settings.filter_list if self._settings else []
         for item in self._items:
-            if item.matches_filter(_filter):
-                item.print(show_additional_info=_show_additional_info)
+            self._print_item(item)
         _elapsed = default_timer() - _start
         self.log(f"listing operation took: {_elapsed}s")
 
+    def _print_item(self, item: FileListItem) -> None:
+        _filter = self._settings.filter_list if self._settings else []
+        if item.matches_filter(_filter):
+            item.print(show_additional_info=self._settings and self._settings.show_extra_info)
+
     def empty(self) -> bool:
         return len(self._items) == 0
 
@@ -82,7 +135,11 @@ class FileList(BaseLog):
         _movdb = MovieDatabase()
         _epdb = EpisodeDatabase()
         for item in self._items:
-            if item.is_movie:
-                item.downloaded = item.exists_in_database(_movdb)
-            elif item.is_tvshow:
-                item.downloaded = item.exists_in_database(_epdb)
+            self._compare_item_to_database(item, _movdb, _epdb)
+
+    @staticmethod
+    def _compare_item_to_database(item: FileListItem, movdb: MovieDatabase, epdb: EpisodeDatabase) -> None:
+        if item.is_movie:
+            item.downloaded = item.exists_in_database(movdb)
+        elif item.is_tvshow:
+            item.downloaded = item.exists_in_database(epdb)
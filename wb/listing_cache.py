@@ -0,0 +1,140 @@
+import mmap
+import struct
+import time
+from array import array
+from pathlib import Path
+from typing import Optional, List, Tuple, Iterator, Union
+
+from config import ConfigurationManager, SettingKeys
+
+# timestamp, size, path
+ListingRow = Tuple[float, int, str]
+
+
+def parse_listing_line(line: str) -> Optional[ListingRow]:
+    """Row of a find -printf "%T@ | %s | %p\\n" output line, None if the line can not be parsed"""
+    try:
+        _stamp, _bytes, _path = line.replace("\n", "").strip().split(" | ")
+        return float(_stamp), int(_bytes), _path
+    except ValueError:
+        return None
+
+
+class ListingCache:
+    """
+    Last file listing of a server, used to only request files modified after the newest cached file.
+    Rows are stored column wise (timestamps, sizes, path end offsets, utf-8 paths) after a fixed size header,
+    the file is memory mapped when read. Deleted files are only removed by a full listing, requested when the
+    last full listing is older than FULL_REFRESH_INTERVAL.
+    """
+    FULL_REFRESH_INTERVAL = 24 * 60 * 60
+    _MAGIC = b"WBLIST01"
+    _HEADER = struct.Struct("=8sdqq")  # magic, time of last full listing, rows, path bytes
+
+    def __init__(self, file_path: Union[Path, str]):
+        self._path: Path = Path(file_path)
+        self._mmap: Optional[mmap.mmap] = None
+        self._timestamps: Optional[memoryview] = None
+        self._sizes: Optional[memoryview] = None
+        self._offsets: Optional[memoryview] = None
+        self._paths: Optional[memoryview] = None
+        self.full_listing_time: Optional[float] = None
+        self._load()
+
+    @classmethod
+    def for_server(cls, server_id: str) -> Optional["ListingCache"]:
+        """Cache of a server in the configured cache directory, None if no directory is configured"""
+        _dir = ConfigurationManager().path(SettingKeys.PATH_WB_LISTING_CACHE, convert_to_path=False)
+        if not _dir:
+            return None
+        Path(_dir).mkdir(parents=True, exist_ok=True)
+        return cls(Path(_dir) / f"{server_id}.listing")
+
+    def __len__(self) -> int:
+        return len(self._timestamps) if self._timestamps is not None else 0
+
+    @property
+    def max_timestamp(self) -> Optional[float]:
+        """Modification time of the newest cached file"""
+        return self._timestamps[-1] if len(self) else None
+
+    def full_refresh_due(self, now: Optional[float] = None) -> bool:
+        if self.full_listing_time is None:
+            return True
+        return (now or time.time()) - self.full_listing_time > self.FULL_REFRESH_INTERVAL
+
+    def row(self, index: int) -> ListingRow:
+        _start = self._offsets[index - 1] if index else 0
+        return self._timestamps[index], self._sizes[index], \
+            str(self._paths[_start:self._offsets[index]], "utf-8")
+
+    def rows(self) -> Iterator[ListingRow]:
+        for _ix in range(len(self)):
+            yield self.row(_ix)
+
+    def update(self, lines: List[str], full: bool, save: bool = True) -> List[str]:
+        """
+        Stores a full listing or merges the lines of files modified after max_timestamp into the cached rows.
+        Returns the (merged) listing, the cache file is left as is if save is False.
+        """
+        _new = [_row for _row in map(parse_listing_line, lines) if _row is not None]
+        if full:
+            _rows, _full_time = _new, time.time()
+        else:
+            _new_paths = {_path for _, _, _path in _new}
+            _rows = [_row for _row in self.rows() if _row[2] not in _new_paths] + _new
+            _full_time = self.full_listing_time
+        _rows.sort(key=lambda _row: _row[0])
+        if save:
+            self._save(_rows, _full_time)
+        return [f"{_stamp:.10f} | {_size} | {_path}" for _stamp, _size, _path in _rows]
+
+    def close(self) -> None:
+        for _view in (self._timestamps, self._sizes, self._offsets, self._paths):
+            if _view is not None:
+                _view.release()
+        self._timestamps = self._sizes = self._offsets = self._paths = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _load(self) -> None:
+        self.close()
+        self.full_listing_time = None
+        if not self._path.is_file() or self._path.stat().st_size < self._HEADER.size:
+            return
+        with open(self._path, "rb") as _fp:
+            _mmap = mmap.mmap(_fp.fileno(), 0, access=mmap.ACCESS_READ)
+        _magic, _full_time, _rows, _path_bytes = self._HEADER.unpack_from(_mmap)
+        if _magic != self._MAGIC or len(_mmap) != self._HEADER.size + _rows * 24 + _path_bytes:
+            _mmap.close()
+            return
+        _view = memoryview(_mmap)
+        _pos = self._HEADER.size
+        self._timestamps = _view[_pos:_pos + _rows * 8].cast("d")
+        _pos += _rows * 8
+        self._sizes = _view[_pos:_pos + _rows * 8].cast("q")
+        _pos += _rows * 8
+        self._offsets = _view[_pos:_pos + _rows * 8].cast("q")
+        _pos += _rows * 8
+        self._paths = _view[_pos:]
+        _view.release()
+        self._mmap = _mmap
+        self.full_listing_time = _full_time
+
+    def _save(self, rows: List[ListingRow], full_listing_time: Optional[float]) -> None:
+        _paths = bytearray()
+        _offsets = array("q")
+        for _, _, _path in rows:
+            _paths += _path.encode("utf-8")
+            _offsets.append(len(_paths))
+        self.close()
+        _tmp = self._path.with_name(self._path.name + ".tmp")
+        with open(_tmp, "wb") as _fp:
+            _fp.write(self._HEADER.pack(self._MAGIC, full_listing_time or 0.0, len(rows), len(_paths)))
+            _fp.write(array("d", [_row[0] for _row in rows]).tobytes())
+            _fp.write(array("q", [_row[1] for _row in rows]).tobytes())
+            _fp.write(_offsets.tobytes())
+            _fp.write(_paths)
+        _tmp.replace(self._path)
+        self._load()
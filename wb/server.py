@@ -1,5 +1,7 @@
 from pathlib import PurePosixPath, Path
-from typing import Optional, List, Union, Callable
+from queue import Queue
+from threading import Thread
+from typing import Optional, List, Union, Callable, Dict, Iterable
 
 from paramiko import SSHClient, AutoAddPolicy
 from scp import SCPClient
@@ -11,8 +13,9 @@ from utils.external_app_utils import UnrarOutputParser
 from utils.dir_util import DirectoryInfo
 from utils.file_utils import FileInfo
 
-from wb.helper_methods import gen_find_cmd, get_remote_tmp_dir
+from wb.helper_methods import gen_find_cmd, get_remote_tmp_dir, merge_find_cmd_outputs
 from wb.list import FileList
+from wb.listing_cache import ListingCache, parse_listing_line
 from wb.item import FileListItem
 from wb.settings import WBSettings
 
@@ -32,6 +35,7 @@ class Server(BaseLog):
             self._connected = False
             self._used_password: Optional[bool] = None
             self._scp = None
+            self.exit_status: Optional[int] = None  # exit status of the last command run
 
         def _init_scp(self) -> bool:
             if not self._connected:
@@ -56,16 +60,20 @@ class Server(BaseLog):
                 self.error(f"FAIL: {error}")
                 self._connected = False
 
-        def run_command(self, command: str,
-                        read_line_cb: Optional[Callable[[str], None]] = None) -> Optional[List[str]]:
+        def run_command(self, command: str, read_line_cb: Optional[Callable[[str], None]] = None,
+                        collect_output: bool = True) -> Optional[List[str]]:
+            """Output lines are passed to read_line_cb as they arrive, not collected if collect_output is False"""
+            self.exit_status = None
             if not self._connected:
                 return None
             _, stdout, _ = self._ssh_client.exec_command(command, get_pty=True)
             _ret = []
             for line in iter(stdout.readline, ""):
-                _ret.append(line)
+                if collect_output:
+                    _ret.append(line)
                 if read_line_cb:
                     read_line_cb(line)
+            self.exit_status = stdout.channel.recv_exit_status()
             return _ret
 
         @property
@@ -97,6 +105,7 @@ class Server(BaseLog):
         self._hostname = hostname
         self._user: Optional[str] = None
         self._ssh = self.Connection()
+        self._listing_cache: Optional[ListingCache] = ListingCache.for_server(hostname)
         self._connect()
 
     def _connect(self) -> None:
@@ -108,12 +117,57 @@ class Server(BaseLog):
         self._user = ConfigurationManager().get(SettingKeys.WB_USERNAME, section=SettingSection.WB)
         self._ssh.connect(self._hostname, username=self._user, password=_pw, use_rsa_key=self._settings.use_rsa_key)
 
-    def list_files(self) -> Optional[List[str]]:
+    def list_files(self, read_line_cb: Optional[Callable[[str], None]] = None) -> Optional[List[str]]:
+        """
+        Lines of the find command output, only passed to read_line_cb if set. With a listing cache only files
+        modified after the newest cached file are listed, all files if the last full listing is too old.
+        The cache is only written if find succeeded and printed no errors. Merged (cached) lines are passed to
+        read_line_cb once the listing of new files is done.
+        """
         if not self._ssh.connected:
             self.error("cannot retrieve file list, not connected")
             return None
-        _cmd = gen_find_cmd(extensions=["mkv", "rar"])
-        return self._ssh.run_command(_cmd)
+        _cache = self._listing_cache
+        _extensions = ["mkv", "rar"]
+        if _cache is None:
+            _cmd = gen_find_cmd(extensions=_extensions)
+            return self._ssh.run_command(_cmd, read_line_cb=read_line_cb, collect_output=read_line_cb is None)
+        if self._settings.full_list or _cache.full_refresh_due() or _cache.max_timestamp is None:
+            self.log("listing all files")
+            _lines = self._ssh.run_command(self._pipefail(gen_find_cmd(extensions=_extensions)),
+                                           read_line_cb=read_line_cb)
+            if self._listing_ok(_lines, full=True):
+                _cache.update(_lines, full=True)
+            return [] if read_line_cb else _lines
+        _cmd = gen_find_cmd(extensions=_extensions, newer_than=_cache.max_timestamp)
+        _new = self._ssh.run_command(self._pipefail(_cmd))
+        self.log(f"listed {len(_new)} new file(s), {len(_cache)} cached")
+        _lines = _cache.update(_new, full=False, save=self._listing_ok(_new, full=False))
+        if read_line_cb is None:
+            return _lines
+        for _line in _lines:
+            read_line_cb(_line)
+        return []
+
+    @staticmethod
+    def _pipefail(command: str) -> str:
+        """Exit status of a find | sort pipeline is the one of find if it failed"""
+        return f"set -o pipefail; {command}"
+
+    def _listing_ok(self, lines: Optional[List[str]], full: bool) -> bool:
+        """True if the find output can be cached: exit status 0, no error lines and rows for a full listing"""
+        if lines is None or self._ssh.exit_status != 0:
+            self.error(f"find exited with status {self._ssh.exit_status}, listing cache not updated")
+            return False
+        _lines = [_line for _line in lines if _line.strip()]
+        _errors = [_line for _line in _lines if parse_listing_line(_line) is None]
+        if _errors:
+            self.error(f"find printed {len(_errors)} error(s), listing cache not updated: {_errors[0].strip()}")
+            return False
+        if full and not _lines:
+            self.error("find listed no files, listing cache not updated")
+            return False
+        return True
 
     @property
     def hostname(self) -> str:
@@ -191,15 +245,30 @@ class ServerHandler(BaseLog):
 
     def print_file_list(self) -> None:
         if self._file_list.empty():
-            self._init_file_list()
+            self._init_file_list(print_items=True)
+            return
         self._file_list.print()
 
-    def _init_file_list(self) -> None:
+    def _init_file_list(self, print_items: bool = False) -> None:
+        """Lists the files of all servers concurrently, items are parsed (and printed) while the listings arrive"""
         self.log("gathering item from server(s)")
+        _outputs: Dict[str, Iterable[str]] = {}
         for server in self._servers:
-            self._file_list.parse_find_cmd_output(server.list_files(), server_id=server.hostname)
+            _queue: Queue = Queue()
+            Thread(target=self._list_files, args=(server, _queue), daemon=True).start()
+            _outputs[server.hostname] = iter(_queue.get, None)
+        self._file_list.parse_merged_find_cmd_output(merge_find_cmd_outputs(_outputs), print_items=print_items)
         self.log(f"found {len(self._file_list)} number of items")
 
+    @staticmethod
+    def _list_files(server: Server, queue: Queue) -> None:
+        try:
+            server.list_files(read_line_cb=queue.put)
+        except Exception as error:
+            server.error(f"could not list files: {error}")
+        finally:
+            queue.put(None)
+
     def number_of_items(self) -> int:
         if self._file_list.empty():
             self._init_file_list()
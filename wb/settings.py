@@ -48,6 +48,10 @@ def _get_args() -> Namespace:
                          action="store_true",
                          dest="extract",
                          help="attempt to extract compressed item before downloading")
+    _parser.add_argument("--full-list",
+                         action="store_true",
+                         dest="full_list",
+                         help="list all files on the server(s), ignore the cached listing")
     _parser.add_argument("--filter",
                          dest="list_filter",
                          nargs="+")
@@ -94,6 +98,10 @@ class WBSettings:
     def extract(self) -> bool:
         return self.__args.extract
 
+    @property
+    def full_list(self) -> bool:
+        return self.__args.full_list
+
     @property
     def filter_list(self) -> Optional[List[str]]:
         return self.__args.list_filter
@@ -0,0 +1,144 @@
+import re
+from array import array
+from pathlib import PurePosixPath
+from typing import List, Optional, Dict, Iterable
+
+from media.release import Release, classify, classify_many
+from wb.helper_methods import get_remote_files_path
+
+_RE_RAR_PART = re.compile(r"\.part\d{2,3}\.rar")
+
+
+class FileTable:
+    """
+    Remote file listing (lines of find -printf "%T@ | %s | %p\\n") stored column wise, one row per file.
+    Lines are parsed with string operations and the valid rows of each batch are classified at once,
+    release names shared by several files (parent directories) are classified only once.
+    """
+    TYPE_UNKNOWN = 0
+    TYPE_MOVIE = 1
+    TYPE_EPISODE = 2
+    TYPE_UNCLASSIFIED = 255  # invalid rows are classified when needed
+    NO_PARENT = -1  # file is directly in the remote files directory
+
+    _ignore = ("sample", "subs", "subpack")
+
+    def __init__(self, files_path: Optional[PurePosixPath] = None):
+        self._files_path: str = str(files_path or get_remote_files_path())
+        self.timestamps: array = array("q")
+        self.sizes: array = array("q")
+        self.paths: List[str] = []
+        self.types: bytearray = bytearray()
+        self.valid: bytearray = bytearray()
+        self.parents: array = array("l")  # index in parent_names or NO_PARENT
+        self.parent_names: List[str] = []
+        self.servers: array = array("H")  # index in server_ids
+        self.server_ids: List[str] = []
+        self._parent_ix: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def append_lines(self, lines: Iterable[str], server_id: str = "", errors: Optional[List[str]] = None) -> range:
+        """Parses and classifies find output lines, returns the added rows, unparsable lines are skipped"""
+        _first = len(self.paths)
+        _server = self._server_index(server_id)
+        _root = self._files_path
+        _prefix = _root + "/"
+        _to_classify: List[int] = []
+        for _line in lines:
+            _line = _line.replace("\n", "").strip()
+            _parts = _line.split(" | ")
+            if len(_parts) != 3:
+                self._error(errors, f"could not split line: {_line}")
+                continue
+            _stamp, _bytes, _path = _parts
+            if _path != _root and not _path.startswith(_prefix):
+                self._error(errors, f"path {_path} is not relative to: {_root}")
+                continue
+            if not _bytes.isdigit():
+                self._error(errors, f"bytes value: {_bytes} is not an integer!")
+                continue
+            try:
+                _timestamp = int(_stamp.split(".")[0])
+            except ValueError as _:
+                self._error(errors, f"could not parse timestamp from: {_stamp}")
+                continue
+            _dir, _, _name = _path.rpartition("/")
+            _dir_name = _dir.rpartition("/")[2]
+            if _dir == _root:
+                _parent = self.NO_PARENT
+            elif (_parent := self._parent_ix.get(_dir_name, None)) is None:
+                _parent = self._parent_ix[_dir_name] = len(self.parent_names)
+                self.parent_names.append(_dir_name)
+            _valid = self._is_valid(_name, _dir_name)
+            if _valid:
+                _to_classify.append(len(self.paths))
+            self.timestamps.append(_timestamp)
+            self.sizes.append(int(_bytes))
+            self.paths.append(_path)
+            self.parents.append(_parent)
+            self.servers.append(_server)
+            self.valid.append(_valid)
+            self.types.append(self.TYPE_UNCLASSIFIED)
+        _releases = classify_many([self.name(_row) for _row in _to_classify] +
+                                  [self.parent_names[_ix] for _ix in {self.parents[_row] for _row in _to_classify}
+                                   if _ix != self.NO_PARENT])
+        for _row in _to_classify:
+            _parent_name = self.parent_name(_row)
+            self.types[_row] = self._type(_releases[self.name(_row)],
+                                          _releases[_parent_name] if _parent_name else None)
+        return range(_first, len(self.paths))
+
+    def name(self, row: int) -> str:
+        return self.paths[row].rpartition("/")[2]
+
+    def parent_name(self, row: int) -> Optional[str]:
+        _ix = self.parents[row]
+        return None if _ix == self.NO_PARENT else self.parent_names[_ix]
+
+    def server_id(self, row: int) -> str:
+        return self.server_ids[self.servers[row]]
+
+    def media_type(self, row: int) -> int:
+        """One of the TYPE_* values"""
+        if self.types[row] == self.TYPE_UNCLASSIFIED:
+            _parent_name = self.parent_name(row)
+            self.types[row] = self._type(classify(self.name(row)), classify(_parent_name) if _parent_name else None)
+        return self.types[row]
+
+    def _server_index(self, server_id: str) -> int:
+        if server_id not in self.server_ids:
+            self.server_ids.append(server_id)
+        return self.server_ids.index(server_id)
+
+    @classmethod
+    def _is_valid(cls, name: str, dir_name: str) -> bool:
+        _name = name.lower()
+        if any(_i in _name for _i in cls._ignore):
+            return False
+        if name.endswith(".rar") and name != ".rar":
+            if _RE_RAR_PART.search(name):
+                return name.endswith("part01.rar")
+            if any(_s in dir_name.lower() for _s in ("subpack", "subs")):
+                return False
+        if name.endswith(".mkv") and name != ".mkv":
+            if "sample" in dir_name.lower():
+                return False
+        return True
+
+    @classmethod
+    def _type(cls, release: Release, parent_release: Optional[Release] = None) -> int:
+        for _release in (release, parent_release):
+            if _release is None:
+                continue
+            if _release.matches_movie:
+                return cls.TYPE_MOVIE
+            if _release.matches_episode:
+                return cls.TYPE_EPISODE
+        return cls.TYPE_UNKNOWN
+
+    @staticmethod
+    def _error(errors: Optional[List[str]], message: str) -> None:
+        if errors is not None:
+            errors.append(message)